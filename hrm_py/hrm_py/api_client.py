@@ -0,0 +1,181 @@
+# api_client.py
+"""
+Streamlit フロント（app.py）から Django API を呼ぶクライアント。
+
+  - APIベースURLごとに keep-alive の requests.Session（接続プール）を1つ共有する
+  - GET は st.cache_data で TTL（HRM_API_CACHE_TTL 秒）キャッシュする。
+    キーは ベースURL・トークン・パス・パラメータ・世代。POST（打刻・申請・承認・取消）が
+    成功したら invalidate() でそのブラウザセッションの世代を進め、以後の GET は取り直す
+  - キャッシュ切れで取り直すときは ETag で再検証し、304 なら前回の本文を使う
+  - get_async() / submit() で独立した GET をスレッドプールで同時に投げる
+    （描画時間が各呼び出しの合計ではなく一番遅い呼び出しで決まる）
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except Exception:
+    add_script_run_ctx = get_script_run_ctx = None
+
+CACHE_TTL = float(os.environ.get("HRM_API_CACHE_TTL", "30"))
+POOL_SIZE = int(os.environ.get("HRM_API_POOL_SIZE", "8"))
+TIMEOUT = 20
+
+Params = Tuple[Tuple[str, str], ...]
+
+
+def _url(base_url: str, path: str) -> str:
+    return base_url.rstrip("/") + "/" + path.lstrip("/")
+
+
+@st.cache_resource(show_spinner=False)
+def _session(base_url: str) -> requests.Session:
+    """ベースURLごとの接続プール（全ブラウザセッション・全スレッドで共有）"""
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+@st.cache_resource(show_spinner=False)
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="hrm-api")
+
+
+class _ETagStore:
+    """(URL, パラメータ, トークン) → (ETag, 本文)。件数上限付き"""
+
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[tuple, Tuple[str, Any]]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[Tuple[str, Any]]:
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None:
+                self._data.move_to_end(key)
+            return hit
+
+    def put(self, key: tuple, etag: str, body: Any) -> None:
+        with self._lock:
+            self._data[key] = (etag, body)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_etags = _ETagStore()
+
+
+def _params(params: Optional[Dict[str, Any]]) -> Params:
+    """キャッシュのキーにできる形へ（None の項目は requests と同じく送らない）"""
+    return tuple(sorted((k, str(v)) for k, v in (params or {}).items() if v is not None))
+
+
+def _get(base_url: str, token: str, path: str, params: Params) -> Any:
+    url = _url(base_url, path)
+    headers = {"Authorization": "Bearer " + token}
+    key = (url, params, token)
+    cached = _etags.get(key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    r = _session(base_url).get(url, headers=headers, params=list(params), timeout=TIMEOUT)
+    if r.status_code == 304 and cached:
+        return cached[1]  # 変わっていない（サーバは集計もシリアライズもしていない）
+    r.raise_for_status()
+    try:
+        data = r.json()
+    except ValueError:
+        return {}
+    if r.headers.get("ETag"):
+        _etags.put(key, r.headers["ETag"], data)
+    return data
+
+
+@st.cache_data(ttl=CACHE_TTL, max_entries=2000, show_spinner=False)
+def _cached_get(base_url: str, token: str, path: str, params: Params, generation: int) -> Any:
+    return _get(base_url, token, path, params)
+
+
+# ---- 世代（POST 後の無効化） ----
+
+def generation() -> int:
+    return st.session_state.get("_api_generation", 0)
+
+
+def invalidate() -> None:
+    """このブラウザセッションの GET キャッシュを捨てる（次の GET から取り直す）"""
+    st.session_state["_api_generation"] = generation() + 1
+
+
+# ---- 公開API ----
+
+def get(base_url: str, token: str, path: str, params: Optional[Dict[str, Any]] = None,
+        cache: bool = True) -> Any:
+    """GET して JSON を返す。cache=False は在席状況のように毎回最新が要るもの"""
+    if not cache:
+        return _get(base_url, token, path, _params(params))
+    return _cached_get(base_url, token, path, _params(params), generation())
+
+
+def post(base_url: str, token: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Any:
+    """POST して JSON を返す。成功したら GET キャッシュを無効化する"""
+    r = _session(base_url).post(_url(base_url, path), headers={"Authorization": "Bearer " + token},
+                                json=(payload or {}), timeout=TIMEOUT)
+    r.raise_for_status()
+    invalidate()
+    try:
+        return r.json()
+    except ValueError:
+        return {}
+
+
+def login(base_url: str, username: str, password: str) -> Dict[str, Any]:
+    """POST /api/auth/token/ → {"access", "refresh"}"""
+    r = _session(base_url).post(_url(base_url, "/api/auth/token/"),
+                                json={"username": username, "password": password}, timeout=10)
+    r.raise_for_status()
+    return r.json()
+
+
+@st.cache_data(ttl=10, show_spinner=False)
+def ping(base_url: str) -> bool:
+    """接続確認（/api/health が無い環境でも /api/ で OK とする）。再実行のたびには叩かない"""
+    for path in ("/api/health", "/api/"):
+        try:
+            r = _session(base_url).get(_url(base_url, path), timeout=3)
+            if r.ok or r.status_code in (200, 401, 404):
+                return True
+        except requests.exceptions.RequestException:
+            pass
+    return False
+
+
+def submit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+    """スレッドプールで実行する。st.cache_data が使えるよう実行中のスクリプトの文脈を引き継ぐ"""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def run():
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+    return _executor().submit(run)
+
+
+def get_async(base_url: str, token: str, path: str, params: Optional[Dict[str, Any]] = None,
+              cache: bool = True) -> Future:
+    """get() を並行で投げる。世代はここ（スクリプトのスレッド）で読んでおく"""
+    p = _params(params)
+    if not cache:
+        return submit(_get, base_url, token, path, p)
+    return submit(_cached_get, base_url, token, path, p, generation())
@@ -0,0 +1,151 @@
+# attendance/aggregates.py
+"""
+打刻のペアリング（IN→OUT / BREAK_START→BREAK_END）をDB側で行う集計パス。
+
+calc.compute_day（Python版・参照実装、ATTENDANCE_POLICY）と同じ規則で区間を作る：
+  - 開始が連続した場合は最初の開始を採用し、後続の開始は無視
+  - 開始の無い終了は無視、終了の無い開始（末尾）も無視
+  - 区間ごとに分単位で切り捨てて合計
+
+deduct_breaks=True のときは HR_CORE_POLICY と同じく、勤務区間ごとに区間と重なる休憩を
+（重なりごとに分切り捨てで）差し引き、休憩分は勤務区間内に収まった分だけを数える。
+
+ウィンドウ関数（SUM() OVER）で「その打刻より前にある終了打刻の数」を振り、
+(ユーザー, 日, 種別, 番号) ごとに開始の最小時刻と終了時刻を取ると1区間になる。
+DBから返るのは (user_id, work_date, work_minutes, break_minutes) のみ。
+SQLite 3.25+ / PostgreSQL / MySQL 8+ / Oracle で動作する。
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timezone as dt_tz
+from typing import List, Tuple
+
+from django.db import connections
+from django.db.models import (
+    Case, DurationField, ExpressionWrapper, F, Func, IntegerField, QuerySet, Sum, Value, When, Window,
+)
+from django.db.models.expressions import RowRange
+
+PUNCH_IN = "IN"
+PUNCH_OUT = "OUT"
+BREAK_START = "BREAK_START"
+BREAK_END = "BREAK_END"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_tz.utc)
+_US_PER_MIN = 60 * 1000 * 1000
+
+
+class EpochMicroseconds(Func):
+    """DurationField の式を整数マイクロ秒に変換する（SQLite/MySQL はそのまま整数）"""
+    output_field = IntegerField()
+    template = "%(expressions)s"
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(EXTRACT(EPOCH FROM %(expressions)s) * 1000000 AS BIGINT)",
+            **extra_context,
+        )
+
+    def as_oracle(self, compiler, connection, **extra_context):
+        sql, params = compiler.compile(self.source_expressions[0])
+        parts = " + ".join(
+            f"EXTRACT({unit} FROM {sql}) * {mult}"
+            for unit, mult in (("DAY", 86400000000), ("HOUR", 3600000000), ("MINUTE", 60000000), ("SECOND", 1000000))
+        )
+        return f"CAST(({parts}) AS NUMBER(19))", params * 4
+
+
+def daily_minutes_sql(queryset: QuerySet, day_expression=None,
+                      deduct_breaks: bool = False) -> List[Tuple[int, date, int, int]]:
+    """
+    打刻の queryset から (user_id, work_date, work_minutes, break_minutes) をDB側で算出する。
+    day_expression は日付バケットの式（既定は work_date 列）。
+    deduct_breaks=True なら勤務分から区間内の休憩を控除する（HR_CORE_POLICY 相当）。
+    """
+    day = day_expression if day_expression is not None else F("work_date")
+    partition = [F("user_id"), day, F("kind")]
+    order = [F("punched_at").asc(), F("id").asc()]
+
+    inner = (
+        queryset
+        .order_by()
+        .filter(punch_type__in=[PUNCH_IN, PUNCH_OUT, BREAK_START, BREAK_END])
+        .annotate(
+            uid=F("user_id"),
+            wd=day,
+            kind=Case(When(punch_type__in=[PUNCH_IN, PUNCH_OUT], then=Value("W")), default=Value("B")),
+            is_start=Case(When(punch_type__in=[PUNCH_IN, BREAK_START], then=Value(1)), default=Value(0)),
+            ts_us=EpochMicroseconds(
+                ExpressionWrapper(F("punched_at") - Value(_EPOCH), output_field=DurationField())
+            ),
+        )
+        .annotate(
+            # 自分より前にある同種の終了打刻の数＝区間番号
+            grp=Window(
+                Sum(Case(When(punch_type__in=[PUNCH_OUT, BREAK_END], then=Value(1)), default=Value(0))),
+                partition_by=partition,
+                order_by=order,
+                frame=RowRange(start=None, end=-1),
+            ),
+        )
+        .values_list("uid", "wd", "kind", "is_start", "ts_us", "grp")
+    )
+
+    connection = connections[queryset.db]
+    inner_sql, params = inner.query.get_compiler(connection=connection).as_sql()
+    q = connection.ops.quote_name
+    uid, wd, kind, is_start, ts_us, grp = (q(c) for c in ("uid", "wd", "kind", "is_start", "ts_us", "grp"))
+
+    # 1行＝1区間（開始の最小時刻 s と、区間を閉じる終了時刻 e）
+    intervals = f"""
+        SELECT {uid}, {wd}, {kind}, COALESCE({grp}, 0) AS grp,
+               MIN(CASE WHEN {is_start} = 1 THEN {ts_us} END) AS s,
+               MIN(CASE WHEN {is_start} = 0 THEN {ts_us} END) AS e
+        FROM ({inner_sql}) punches
+        GROUP BY {uid}, {wd}, {kind}, COALESCE({grp}, 0)
+        HAVING MIN(CASE WHEN {is_start} = 0 THEN {ts_us} END)
+               > MIN(CASE WHEN {is_start} = 1 THEN {ts_us} END)
+    """
+    if not deduct_breaks:
+        sql = f"""
+            SELECT {uid}, {wd},
+                   SUM(CASE WHEN {kind} = 'W' THEN FLOOR((e - s) / {_US_PER_MIN}) ELSE 0 END),
+                   SUM(CASE WHEN {kind} = 'B' THEN FLOOR((e - s) / {_US_PER_MIN}) ELSE 0 END)
+            FROM ({intervals}) intervals
+            GROUP BY {uid}, {wd}
+        """
+    else:
+        # 勤務区間 w ごとに重なる休憩区間 b を結合し、重なり（分切り捨て）の合計を勤務区間の長さで頭打ちにする。
+        # GREATEST/LEAST は SQLite に無いので CASE で書く（休憩の無い勤務区間は b.* が NULL なので 0）
+        overlap = f"""CASE WHEN b.s IS NULL THEN 0
+                           ELSE FLOOR(((CASE WHEN b.e < w.e THEN b.e ELSE w.e END)
+                                       - (CASE WHEN b.s > w.s THEN b.s ELSE w.s END)) / {_US_PER_MIN}) END"""
+        seg_work = f"FLOOR((w.e - w.s) / {_US_PER_MIN})"
+        seg_break = f"SUM({overlap})"
+        sql = f"""
+            WITH iv AS ({intervals})
+            SELECT {uid}, {wd}, SUM(seg_work - seg_break), SUM(seg_break)
+            FROM (
+                SELECT w.{uid} AS {uid}, w.{wd} AS {wd}, {seg_work} AS seg_work,
+                       CASE WHEN {seg_break} > {seg_work} THEN {seg_work} ELSE {seg_break} END AS seg_break
+                FROM iv w
+                LEFT JOIN iv b
+                  ON b.{uid} = w.{uid} AND b.{wd} = w.{wd} AND b.{kind} = 'B' AND b.s < w.e AND b.e > w.s
+                WHERE w.{kind} = 'W'
+                GROUP BY w.{uid}, w.{wd}, w.grp, w.s, w.e
+            ) segments
+            GROUP BY {uid}, {wd}
+        """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    result: List[Tuple[int, date, int, int]] = []
+    for user_id, work_date, work_min, break_min in rows:
+        if isinstance(work_date, str):
+            work_date = date.fromisoformat(work_date[:10])
+        elif isinstance(work_date, datetime):
+            work_date = work_date.date()
+        result.append((int(user_id), work_date, int(work_min or 0), int(break_min or 0)))
+    return result
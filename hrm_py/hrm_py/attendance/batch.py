@@ -0,0 +1,202 @@
+# attendance/batch.py
+"""
+多数のユーザー×日を NumPy で一括計算するバッチエンジン。
+
+入力は列指向の配列（user_id, day, epoch マイクロ秒, 打刻種別コード）。
+calc.compute_day（ATTENDANCE_POLICY）と同じ規則（最初の開始を採用・区間ごとに分切り捨て・休憩は控除しない）で
+勤務分／休憩分を算出し、所定労働分が与えられれば残業分も返す。
+deduct_breaks=True なら HR_CORE_POLICY と同じく勤務区間ごとに区間内の休憩を控除する。
+
+時刻は浮動小数の秒ではなく int64 のマイクロ秒で受け取る
+（ちょうど60分などの境界で切り捨て結果が compute_day とずれないようにするため）。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone as dt_tz
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except Exception:  # numpy が無い環境では compute_day のループにフォールバックする
+    np = None  # type: ignore
+
+CODE_IN = 0
+CODE_OUT = 1
+CODE_BREAK_START = 2
+CODE_BREAK_END = 3
+TYPE_CODES = {"IN": CODE_IN, "OUT": CODE_OUT, "BREAK_START": CODE_BREAK_START, "BREAK_END": CODE_BREAK_END}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_tz.utc)
+_ONE_US = timedelta(microseconds=1)
+_US_PER_MIN = 60 * 1000 * 1000
+
+
+def is_available() -> bool:
+    return np is not None
+
+
+@dataclass
+class BatchResult:
+    """バケット（user_id, day）ごとの結果。各配列は同じ長さ・同じ並び。"""
+    user_ids: "np.ndarray"
+    days: "np.ndarray"
+    work_minutes: "np.ndarray"
+    break_minutes: "np.ndarray"
+    overtime_minutes: "np.ndarray"
+
+    def as_dict(self) -> Dict[Tuple[int, int], Tuple[int, int, int]]:
+        return {
+            (int(u), int(d)): (int(w), int(b), int(o))
+            for u, d, w, b, o in zip(self.user_ids, self.days, self.work_minutes,
+                                      self.break_minutes, self.overtime_minutes)
+        }
+
+
+def _pair_intervals(bucket: "np.ndarray", ts: "np.ndarray", codes: "np.ndarray",
+                    start_code: int, end_code: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """開始/終了コードの区間をペアリングし、有効な区間の (バケット, 開始, 終了) をバケット順に返す"""
+    sel = (codes == start_code) | (codes == end_code)
+    b = bucket[sel]
+    if b.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    t = ts[sel]
+    is_end = codes[sel] == end_code
+
+    # バケット内で「自分より前にある終了の数」＝区間番号
+    first = np.empty(b.size, dtype=bool)
+    first[0] = True
+    np.not_equal(b[1:], b[:-1], out=first[1:])
+    cum = np.cumsum(is_end) - is_end
+    grp = cum - cum[np.flatnonzero(first)][np.cumsum(first) - 1]
+
+    seg_new = first.copy()
+    seg_new[1:] |= grp[1:] != grp[:-1]
+    seg_starts = np.flatnonzero(seg_new)
+
+    hi = np.iinfo(np.int64).max
+    lo = np.iinfo(np.int64).min
+    s = np.minimum.reduceat(np.where(is_end, hi, t), seg_starts)  # 区間内で最初の開始
+    e = np.maximum.reduceat(np.where(is_end, t, lo), seg_starts)  # 区間を閉じる終了（高々1つ）
+    valid = (s != hi) & (e != lo) & (e > s)
+    return b[seg_starts][valid], s[valid], e[valid]
+
+
+def _pair_minutes(intervals, n_buckets: int) -> "np.ndarray":
+    """区間ごとに分切り捨てした長さをバケットごとに合計する"""
+    b, s, e = intervals
+    return np.bincount(b, weights=(e - s) // _US_PER_MIN, minlength=n_buckets).astype(np.int64)
+
+
+def _deduct_breaks(work_iv, break_iv, n_buckets: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    勤務区間ごとに同じバケットの休憩区間との重なり（分切り捨て）を合計し、区間の長さで頭打ちにして差し引く。
+    (バケットごとの勤務分, 区間内の休憩分) を返す。
+    """
+    wb, ws, we = work_iv
+    bb, bs, be = break_iv
+    seg_work = (we - ws) // _US_PER_MIN
+
+    # 勤務区間 × 同じバケットの休憩区間 の組を列挙する（1日の区間数は少ないので組も少ない）
+    lo = np.searchsorted(bb, wb, side="left")
+    n = np.searchsorted(bb, wb, side="right") - lo
+    wi = np.repeat(np.arange(wb.size), n)
+    bi = np.repeat(lo - (np.cumsum(n) - n), n) + np.arange(wi.size)
+    ov = np.minimum(we[wi], be[bi]) - np.maximum(ws[wi], bs[bi])
+    ov_min = np.where(ov > 0, ov, 0) // _US_PER_MIN
+
+    seg_break = np.bincount(wi, weights=ov_min, minlength=wb.size).astype(np.int64)
+    seg_break = np.minimum(seg_break, seg_work)
+    work = np.bincount(wb, weights=seg_work - seg_break, minlength=n_buckets).astype(np.int64)
+    brk = np.bincount(wb, weights=seg_break, minlength=n_buckets).astype(np.int64)
+    return work, brk
+
+
+def compute_days_batch(
+    user_ids: Iterable[int],
+    days: Iterable[int],
+    epoch_us: Iterable[int],
+    type_codes: Iterable[int],
+    tiebreak: Optional[Iterable[int]] = None,
+    base_minutes: Union[None, int, Mapping[int, int]] = None,
+    default_base_minutes: int = 8 * 60,
+    presorted: bool = False,
+    deduct_breaks: bool = False,
+) -> BatchResult:
+    """
+    全打刻を1回のソートとベクトル演算で (user_id, day) ごとに集計する。
+      - day: 日付を表す整数（date.toordinal() など）
+      - tiebreak: 同時刻の並び順（打刻ID）。compute_day の (punched_at, id) 順に合わせる
+      - base_minutes: 所定労働分（全員共通の整数、または user_id→分）。None なら残業は 0
+      - presorted: 入力が (user_id, day, 時刻, tiebreak) 順に並んでいればソートを省略する
+      - deduct_breaks: 勤務区間内の休憩を勤務分から控除する（HR_CORE_POLICY 相当）
+    """
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+
+    uid = np.asarray(user_ids, dtype=np.int64)
+    day = np.asarray(days, dtype=np.int64)
+    ts = np.asarray(epoch_us, dtype=np.int64)
+    codes = np.asarray(type_codes, dtype=np.int8)
+    tb = np.asarray(tiebreak, dtype=np.int64) if tiebreak is not None else np.arange(uid.size, dtype=np.int64)
+
+    empty = np.zeros(0, dtype=np.int64)
+    if uid.size == 0:
+        return BatchResult(empty, empty, empty, empty, empty)
+
+    if not presorted:
+        order = np.lexsort((tb, ts, day, uid))
+        uid, day, ts, codes = uid[order], day[order], ts[order], codes[order]
+
+    new_bucket = np.empty(uid.size, dtype=bool)
+    new_bucket[0] = True
+    new_bucket[1:] = (uid[1:] != uid[:-1]) | (day[1:] != day[:-1])
+    bucket = np.cumsum(new_bucket) - 1
+    heads = np.flatnonzero(new_bucket)
+    n_buckets = heads.size
+
+    work_iv = _pair_intervals(bucket, ts, codes, CODE_IN, CODE_OUT)
+    break_iv = _pair_intervals(bucket, ts, codes, CODE_BREAK_START, CODE_BREAK_END)
+    if deduct_breaks:
+        work, brk = _deduct_breaks(work_iv, break_iv, n_buckets)
+    else:
+        work = _pair_minutes(work_iv, n_buckets)
+        brk = _pair_minutes(break_iv, n_buckets)
+
+    b_uid = uid[heads]
+    if base_minutes is None:
+        overtime = np.zeros(n_buckets, dtype=np.int64)
+    else:
+        if isinstance(base_minutes, Mapping):
+            users, inverse = np.unique(b_uid, return_inverse=True)
+            base = np.array([base_minutes.get(int(u), default_base_minutes) for u in users], dtype=np.int64)[inverse]
+        else:
+            base = np.full(n_buckets, int(base_minutes), dtype=np.int64)
+        overtime = np.maximum(work - base, 0)
+
+    return BatchResult(b_uid, day[heads], work, brk, overtime)
+
+
+def columns_from_rows(rows: Iterable[Tuple[int, date, datetime, str, int]]):
+    """
+    (user_id, work_date, punched_at, punch_type, id) のタプル列を
+    compute_days_batch に渡す列（user_ids, days, epoch_us, type_codes, tiebreak）に変換する。
+    """
+    user_ids, days, epoch_us, codes, ids = [], [], [], [], []
+    for uid, d, at, ptype, pk in rows:
+        code = TYPE_CODES.get(ptype)
+        if code is None:
+            continue
+        user_ids.append(uid)
+        days.append(d.toordinal())
+        epoch_us.append((at - _EPOCH) // _ONE_US)
+        codes.append(code)
+        ids.append(pk)
+    return (
+        np.array(user_ids, dtype=np.int64),
+        np.array(days, dtype=np.int64),
+        np.array(epoch_us, dtype=np.int64),
+        np.array(codes, dtype=np.int8),
+        np.array(ids, dtype=np.int64),
+    )
@@ -0,0 +1,173 @@
+# attendance/calc.py
+"""
+勤怠計算カーネル（attendance / hr_core 共通・Django非依存）。
+
+1日分の打刻から 勤務分／休憩分／残業分 を算出する。規則は1つだけで、
+アプリごとの違いは CalcPolicy で明示する：
+  - ペアリング: 開始が連続した場合は最初の開始を採用、開始の無い終了・末尾の開始は無視
+  - deduct_breaks: 休憩を勤務区間から控除するか（控除時は勤務区間内に収まる部分だけを休憩とする）
+  - base_minutes: 所定労働分（これを超えた勤務分が残業）
+  - rounding_unit / rounding: 区間ごとの丸め（既定は1分単位の切り捨て）
+
+入力はモデルインスタンスでも PunchRecord（__slots__ の軽量レコード）でもよい。
+punch_type / punched_at / id 属性があれば何でも受け付ける。
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+PUNCH_IN = "IN"
+PUNCH_OUT = "OUT"
+BREAK_START = "BREAK_START"
+BREAK_END = "BREAK_END"
+
+FLOOR = "floor"
+CEIL = "ceil"
+NEAREST = "nearest"
+ROUNDING_MODES = (FLOOR, CEIL, NEAREST)
+
+_ONE_US = timedelta(microseconds=1)
+_US_PER_MIN = 60 * 1000 * 1000
+
+Interval = Tuple[datetime, datetime]
+
+
+class PunchRecord:
+    """計算に必要な項目だけを持つ打刻レコード"""
+    __slots__ = ("id", "punch_type", "punched_at")
+
+    def __init__(self, punch_type: str, punched_at: datetime, id: int = 0):
+        self.id = id
+        self.punch_type = punch_type
+        self.punched_at = punched_at
+
+    def __repr__(self) -> str:
+        return f"PunchRecord({self.punch_type!r}, {self.punched_at!r}, id={self.id!r})"
+
+    @classmethod
+    def from_values(cls, rows: Iterable[Tuple[int, str, datetime]]) -> List["PunchRecord"]:
+        """values_list("id", "punch_type", "punched_at") の結果をレコード列にする"""
+        return [cls(ptype, at, pk) for pk, ptype, at in rows]
+
+
+@dataclass(frozen=True)
+class CalcPolicy:
+    deduct_breaks: bool = False
+    base_minutes: int = 8 * 60
+    rounding_unit: int = 1  # 分
+    rounding: str = FLOOR
+
+    def __post_init__(self):
+        if self.rounding not in ROUNDING_MODES:
+            raise ValueError(f"rounding must be one of {ROUNDING_MODES}")
+        if self.rounding_unit < 1:
+            raise ValueError("rounding_unit must be >= 1")
+
+    def with_base_minutes(self, base_minutes: int) -> "CalcPolicy":
+        return replace(self, base_minutes=int(base_minutes))
+
+
+@dataclass
+class DayTotals:
+    work_minutes: int = 0
+    break_minutes: int = 0
+    overtime_minutes: int = 0
+
+    def as_dict(self):
+        return {
+            "work_minutes": self.work_minutes,
+            "break_minutes": self.break_minutes,
+            "overtime_minutes": self.overtime_minutes,
+        }
+
+
+# attendance アプリ：休憩は控除しない（IN/OUT が勤務の外側、BREAK が内側に入る設計）
+ATTENDANCE_POLICY = CalcPolicy(deduct_breaks=False)
+# hr_core アプリ：勤務区間ごとに休憩を控除する
+HR_CORE_POLICY = CalcPolicy(deduct_breaks=True)
+
+
+def sort_punches(punches: Iterable) -> list:
+    """(punched_at, id) 順に並べる。既に並んでいればそのまま返す"""
+    punches = list(punches)
+    for a, b in zip(punches, punches[1:]):
+        if (a.punched_at, a.id or 0) > (b.punched_at, b.id or 0):
+            return sorted(punches, key=lambda x: (x.punched_at, x.id or 0))
+    return punches
+
+
+def pair_intervals(punches: Sequence, start_type: str, end_type: str) -> List[Interval]:
+    """
+    ソート済みの打刻から開始/終了タイプをペアリングして区間リストを返す。
+    不完全ペアは末尾は無視（安全側）。
+    """
+    start_at: Optional[datetime] = None
+    intervals: List[Interval] = []
+    for ev in punches:
+        ptype = ev.punch_type
+        if ptype == start_type:
+            if start_at is None:
+                start_at = ev.punched_at
+        elif ptype == end_type and start_at is not None:
+            end_at = ev.punched_at
+            if end_at > start_at:
+                intervals.append((start_at, end_at))
+            start_at = None
+    return intervals
+
+
+def round_minutes(delta: timedelta, policy: CalcPolicy) -> int:
+    """区間の長さを policy に従って分に丸める（マイクロ秒の整数で計算し境界の誤差を避ける）"""
+    us = delta // _ONE_US
+    if us <= 0:
+        return 0
+    unit = policy.rounding_unit * _US_PER_MIN
+    if policy.rounding == FLOOR:
+        n = us // unit
+    elif policy.rounding == CEIL:
+        n = -(-us // unit)
+    else:
+        n = (us + unit // 2) // unit
+    return int(n * policy.rounding_unit)
+
+
+def _overlap(a: Interval, b: Interval) -> Optional[Interval]:
+    s = a[0] if a[0] > b[0] else b[0]
+    e = a[1] if a[1] < b[1] else b[1]
+    return (s, e) if e > s else None
+
+
+def compute_day(punches: Iterable, policy: CalcPolicy = ATTENDANCE_POLICY) -> DayTotals:
+    """1日の打刻から 勤務分／休憩分／残業分 を算出する"""
+    punches = sort_punches(punches)
+    if not punches:
+        return DayTotals()
+
+    work_intervals = pair_intervals(punches, PUNCH_IN, PUNCH_OUT)
+    break_intervals = pair_intervals(punches, BREAK_START, BREAK_END)
+
+    if not policy.deduct_breaks:
+        work_min = sum(round_minutes(e - s, policy) for s, e in work_intervals)
+        break_min = sum(round_minutes(e - s, policy) for s, e in break_intervals)
+    else:
+        # 勤務区間ごとに、区間内に収まる休憩を差し引く（区間外の休憩は数えない）
+        work_min = 0
+        break_min = 0
+        for w in work_intervals:
+            seg_break = 0
+            for b in break_intervals:
+                ov = _overlap(w, b)
+                if ov is not None:
+                    seg_break += round_minutes(ov[1] - ov[0], policy)
+            seg_work = round_minutes(w[1] - w[0], policy)
+            seg_break = min(seg_break, seg_work)
+            work_min += seg_work - seg_break
+            break_min += seg_break
+
+    return DayTotals(
+        work_minutes=work_min,
+        break_minutes=break_min,
+        overtime_minutes=max(work_min - policy.base_minutes, 0),
+    )
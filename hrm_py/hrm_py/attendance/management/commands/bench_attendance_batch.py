@@ -0,0 +1,134 @@
+# attendance/management/commands/bench_attendance_batch.py
+"""
+compute_day（1バケットずつのPythonループ）と batch.compute_days_batch（NumPy一括）の比較ベンチマーク。
+DBは使わず、メモリ上に合成した打刻で計測する。
+
+    python manage.py bench_attendance_batch --users 1000 --days 31
+"""
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone as dt_tz
+
+from django.core.management.base import BaseCommand, CommandError
+
+from attendance import batch
+from attendance.calc import compute_day
+
+JST = dt_tz(timedelta(hours=9))
+
+
+@dataclass
+class _Punch:
+    id: int
+    user_id: int
+    work_date: date
+    punch_type: str
+    punched_at: datetime
+
+
+def _synthesize(users: int, days: int, seed: int):
+    """出勤・昼休憩・退勤の典型パターンに、二重打刻や打ち忘れを少し混ぜる"""
+    rnd = random.Random(seed)
+    first = date(2025, 10, 1)
+    punches = []
+    pk = 0
+    for uid in range(1, users + 1):
+        for i in range(days):
+            d = first + timedelta(days=i)
+            if d.weekday() >= 5 and rnd.random() < 0.9:
+                continue
+            base = datetime(d.year, d.month, d.day, tzinfo=JST)
+            seq = [
+                ("IN", 9 * 60 + rnd.randint(-30, 30)),
+                ("BREAK_START", 12 * 60 + rnd.randint(0, 10)),
+                ("BREAK_END", 13 * 60 + rnd.randint(0, 10)),
+                ("OUT", 18 * 60 + rnd.randint(-30, 180)),
+            ]
+            if rnd.random() < 0.05:
+                seq.append(("IN", seq[0][1] + 1))      # 二重打刻
+            if rnd.random() < 0.03:
+                seq.pop()                             # 退勤打ち忘れ
+            for ptype, minute in seq:
+                pk += 1
+                at = base + timedelta(minutes=minute, seconds=rnd.randint(0, 59), microseconds=rnd.randint(0, 999999))
+                punches.append(_Punch(pk, uid, d, ptype, at.astimezone(dt_tz.utc)))
+    return punches
+
+
+class Command(BaseCommand):
+    help = "compute_day ループと NumPy 一括エンジンの計算時間を比較する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=31)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **opts):
+        if not batch.is_available():
+            raise CommandError("numpy がインストールされていません")
+
+        punches = _synthesize(opts["users"], opts["days"], opts["seed"])
+        base_minutes = 8 * 60
+        self.stdout.write(f"punches={len(punches):,} users={opts['users']} days={opts['days']}")
+
+        def run_loop():
+            bucket = defaultdict(list)
+            for p in punches:
+                bucket[(p.user_id, p.work_date)].append(p)
+            out = {}
+            for (uid, d), ps in bucket.items():
+                calc = compute_day(ps)
+                out[(uid, d.toordinal())] = (
+                    calc.work_minutes, calc.break_minutes, max(calc.work_minutes - base_minutes, 0)
+                )
+            return out
+
+        # DBから (user, work_date, punched_at, id) 順で取得した想定の行
+        rows = sorted(
+            ((p.user_id, p.work_date, p.punched_at, p.punch_type, p.id) for p in punches),
+            key=lambda r: (r[0], r[1], r[2], r[4]),
+        )
+
+        def run_columns():
+            return batch.columns_from_rows(rows)
+
+        cols = run_columns()
+
+        def run_batch():
+            return batch.compute_days_batch(*cols, base_minutes=base_minutes)
+
+        def run_batch_presorted():
+            return batch.compute_days_batch(*cols, base_minutes=base_minutes, presorted=True)
+
+        t_loop, loop_res = self._best(run_loop, opts["repeat"])
+        t_cols, _ = self._best(run_columns, opts["repeat"])
+        t_batch, batch_res = self._best(run_batch, opts["repeat"])
+        t_sorted, sorted_res = self._best(run_batch_presorted, opts["repeat"])
+
+        for label, res in (("NumPy 一括", batch_res), ("NumPy 一括（ソート済み）", sorted_res)):
+            res = res.as_dict()
+            if loop_res != res:
+                diff = [k for k in loop_res if loop_res[k] != res.get(k)]
+                raise CommandError(f"{label}: 結果が一致しません: {len(diff)} バケット（例: {diff[:3]}）")
+
+        self.stdout.write(f"buckets={len(loop_res):,}  結果一致: OK")
+        self.stdout.write(f"compute_day ループ        : {t_loop * 1000:9.1f} ms")
+        self.stdout.write(f"列変換（DB行→配列）       : {t_cols * 1000:9.1f} ms")
+        self.stdout.write(f"NumPy 一括                : {t_batch * 1000:9.1f} ms  (x{t_loop / t_batch:.1f})")
+        self.stdout.write(f"NumPy 一括（ソート済み）  : {t_sorted * 1000:9.1f} ms  (x{t_loop / t_sorted:.1f})")
+        self.stdout.write(self.style.SUCCESS(
+            f"列変換込みの速度比: x{t_loop / (t_sorted + t_cols):.1f}"
+        ))
+
+    @staticmethod
+    def _best(fn, repeat):
+        best, result = None, None
+        for _ in range(max(repeat, 1)):
+            t0 = time.perf_counter()
+            result = fn()
+            dt = time.perf_counter() - t0
+            best = dt if best is None else min(best, dt)
+        return best, result
@@ -0,0 +1,90 @@
+# attendance/management/commands/bench_attendance_calc.py
+"""
+勤怠計算カーネル（calc.compute_day）のマイクロベンチマーク。
+DBは使わず、メモリ上に合成した打刻で「行→入力オブジェクトの生成」と「計算」を分けて計測する。
+
+    python manage.py bench_attendance_calc --users 1000 --days 31
+"""
+import gc
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from attendance import calc
+from attendance.models import Attendance
+
+from .bench_attendance_batch import _synthesize
+
+
+class Command(BaseCommand):
+    help = "勤怠計算カーネルの入力形式・ポリシー別の計算時間を計測する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=31)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    @staticmethod
+    def _best(fn, repeat):
+        """timeit と同じく計測中は GC を止め、最良値を返す"""
+        best, result = None, None
+        for _ in range(max(repeat, 1)):
+            result = None
+            gc.collect()
+            gc.disable()
+            try:
+                t0 = time.perf_counter()
+                result = fn()
+                dt = time.perf_counter() - t0
+            finally:
+                gc.enable()
+            best = dt if best is None else min(best, dt)
+        return best, result
+
+    def handle(self, *args, **opts):
+        punches = _synthesize(opts["users"], opts["days"], opts["seed"])
+        # DBから (punched_at, id) 順で取得した想定の行
+        rows = defaultdict(list)
+        for p in sorted(punches, key=lambda p: (p.user_id, p.work_date, p.punched_at, p.id)):
+            rows[(p.user_id, p.work_date)].append((p.id, p.punch_type, p.punched_at))
+        self.stdout.write(f"punches={len(punches):,} buckets={len(rows):,}")
+
+        def build_models():
+            return [[Attendance(id=pk, punch_type=t, punched_at=at) for pk, t, at in day] for day in rows.values()]
+
+        def build_records():
+            return [calc.PunchRecord.from_values(day) for day in rows.values()]
+
+        t_models, models = self._best(build_models, opts["repeat"])
+        t_records, records = self._best(build_records, opts["repeat"])
+
+        def run(days, policy):
+            return lambda: [calc.compute_day(day, policy) for day in days]
+
+        cases = [
+            ("生成: モデルインスタンス", t_models),
+            ("生成: PunchRecord", t_records),
+        ]
+        policies = [
+            ("ATTENDANCE_POLICY", calc.ATTENDANCE_POLICY),
+            ("HR_CORE_POLICY", calc.HR_CORE_POLICY),
+            ("15分切り捨て", calc.CalcPolicy(rounding_unit=15)),
+        ]
+        baseline = None  # (モデル, PunchRecord) の生成＋計算
+        for label, policy in policies:
+            t_m, res_m = self._best(run(models, policy), opts["repeat"])
+            t_r, res_r = self._best(run(records, policy), opts["repeat"])
+            assert res_m == res_r
+            cases.append((f"計算: {label} / モデル", t_m))
+            cases.append((f"計算: {label} / PunchRecord", t_r))
+            if baseline is None:
+                baseline = (t_models + t_m, t_records + t_r)
+
+        for label, sec in cases:
+            self.stdout.write(f"{label:<36}: {sec * 1000:9.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"生成＋計算（ATTENDANCE_POLICY）: モデル {baseline[0] * 1000:.1f} ms → "
+            f"PunchRecord {baseline[1] * 1000:.1f} ms"
+        ))
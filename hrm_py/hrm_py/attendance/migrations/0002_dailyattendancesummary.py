@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_dirty_summaries(apps, schema_editor):
+    """既存の打刻がある (user, work_date) に dirty なサマリ行を作る（中身は初回参照時に再計算）"""
+    Attendance = apps.get_model("attendance", "Attendance")
+    DailyAttendanceSummary = apps.get_model("attendance", "DailyAttendanceSummary")
+
+    keys = Attendance.objects.values_list("user_id", "work_date").distinct()
+    DailyAttendanceSummary.objects.bulk_create(
+        [DailyAttendanceSummary(user_id=uid, work_date=d, is_dirty=True) for uid, d in keys.iterator()],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_date', models.DateField()),
+                ('work_minutes', models.PositiveIntegerField(default=0)),
+                ('break_minutes', models.PositiveIntegerField(default=0)),
+                ('overtime_minutes', models.PositiveIntegerField(default=0)),
+                ('first_in', models.DateTimeField(blank=True, null=True)),
+                ('last_out', models.DateTimeField(blank=True, null=True)),
+                ('punch_count', models.PositiveIntegerField(default=0)),
+                ('notes', models.JSONField(blank=True, default=list)),
+                ('is_dirty', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_daily_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['work_date', 'user'], name='attendance__work_da_860900_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'work_date'), name='uniq_attendance_summary_user_date')],
+            },
+        ),
+        migrations.RunPython(backfill_dirty_summaries, migrations.RunPython.noop),
+    ]
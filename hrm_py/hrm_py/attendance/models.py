@@ -29,3 +29,31 @@ class Attendance(models.Model):
     def __str__(self):
         return f"{self.user.username} {self.work_date} {self.punch_type}"
 
+
+class DailyAttendanceSummary(models.Model):
+    """
+    ユーザー×work_date の事前集計。打刻登録時に当日分だけ再計算する。
+    is_dirty=True の行は集計APIの参照時に生打刻から再計算される。
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="attendance_daily_summaries")
+    work_date = models.DateField()
+    work_minutes = models.PositiveIntegerField(default=0)
+    break_minutes = models.PositiveIntegerField(default=0)
+    overtime_minutes = models.PositiveIntegerField(default=0)
+    first_in = models.DateTimeField(null=True, blank=True)
+    last_out = models.DateTimeField(null=True, blank=True)
+    punch_count = models.PositiveIntegerField(default=0)
+    notes = models.JSONField(default=list, blank=True)
+    is_dirty = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "work_date"], name="uniq_attendance_summary_user_date"),
+        ]
+        indexes = [
+            models.Index(fields=["work_date", "user"]),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.work_date} work={self.work_minutes}"
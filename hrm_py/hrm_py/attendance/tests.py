@@ -1,3 +1,204 @@
-from django.test import TestCase
+"""
+勤怠計算カーネル（calc.compute_day）の等価性・性質のテスト。
+ランダムに生成した打刻列（二重打刻・打ち忘れ・同時刻・秒未満を含む）に対して、
+旧実装・SQL のペアリング（aggregates.daily_minutes_sql）・NumPy 一括エンジン（batch）と突き合わせる。
+"""
+import random
+from datetime import date, datetime, timedelta, timezone as dt_tz
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from . import batch, calc
+from .aggregates import daily_minutes_sql
+from .calc import CalcPolicy, PunchRecord
+from .models import Attendance
+
+TYPES = (calc.PUNCH_IN, calc.PUNCH_OUT, calc.BREAK_START, calc.BREAK_END)
+CASES = 2000
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_tz.utc)
+
+
+# ---- 旧実装（比較用の参照。変更しないこと） ----
+
+def _legacy_attendance(punches):
+    punches = sorted(punches, key=lambda x: (x.punched_at, x.id))
+
+    def pair(start_type, end_type):
+        start_at = None
+        total = 0
+        for ev in punches:
+            if ev.punch_type == start_type and start_at is None:
+                start_at = ev.punched_at
+            elif ev.punch_type == end_type and start_at is not None:
+                if ev.punched_at > start_at:
+                    total += int((ev.punched_at - start_at).total_seconds() // 60)
+                start_at = None
+        return max(total, 0)
+
+    return pair(calc.PUNCH_IN, calc.PUNCH_OUT), pair(calc.BREAK_START, calc.BREAK_END)
+
+
+def _legacy_hr_core_work(punches):
+    punches = sorted(punches, key=lambda x: x.punched_at)
+    work_min = 0
+    break_min = 0
+    current_in = None
+    break_start = None
+    for p in punches:
+        t = p.punched_at
+        if p.punch_type == calc.PUNCH_IN:
+            current_in = t
+            break_start = None
+        elif p.punch_type == calc.BREAK_START and current_in is not None and break_start is None:
+            break_start = t
+        elif p.punch_type == calc.BREAK_END and current_in is not None and break_start is not None:
+            if t > break_start:
+                break_min += int((t - break_start).total_seconds() // 60)
+            break_start = None
+        elif p.punch_type == calc.PUNCH_OUT and current_in is not None:
+            duration = int((t - current_in).total_seconds() // 60)
+            work_min += max(0, duration - break_min)
+            current_in = None
+            break_start = None
+            break_min = 0
+    return work_min
+
+
+# ---- 打刻列の生成 ----
+
+def _random_day(rnd: random.Random):
+    """種別も時刻もランダムな打刻列（異常系を多く含む）"""
+    t = datetime(2025, 10, 1, tzinfo=dt_tz.utc)
+    out = []
+    for pk in range(1, rnd.randint(0, 10) + 1):
+        if rnd.random() > 0.1:  # 1割は直前と同時刻
+            t += timedelta(seconds=rnd.randint(0, 4 * 3600), microseconds=rnd.randint(0, 999999))
+        out.append(PunchRecord(rnd.choice(TYPES), t, pk))
+    return out
+
+
+def _well_formed_day(rnd: random.Random):
+    """IN → (BREAK_START → BREAK_END)* → OUT を1～3区間並べた打刻列"""
+    t = datetime(2025, 10, 1, tzinfo=dt_tz.utc)
+    seq = []
+    for _ in range(rnd.randint(1, 3)):
+        seq.append(calc.PUNCH_IN)
+        for _ in range(rnd.randint(0, 2)):
+            seq += [calc.BREAK_START, calc.BREAK_END]
+        seq.append(calc.PUNCH_OUT)
+    out = []
+    for pk, ptype in enumerate(seq, start=1):
+        t += timedelta(seconds=rnd.randint(1, 3 * 3600), microseconds=rnd.randint(0, 999999))
+        out.append(PunchRecord(ptype, t, pk))
+    return out
+
+
+def _break_inside_work(punches):
+    """整った打刻列の休憩分（区間ごとに分切り捨て）"""
+    total = 0
+    for s, e in calc.pair_intervals(punches, calc.BREAK_START, calc.BREAK_END):
+        total += int((e - s).total_seconds() // 60)
+    return total
+
+
+class KernelEquivalenceTests(SimpleTestCase):
+    def test_attendance_policy_matches_legacy(self):
+        rnd = random.Random(0)
+        for _ in range(CASES):
+            day = _random_day(rnd)
+            res = calc.compute_day(day, calc.ATTENDANCE_POLICY)
+            self.assertEqual((res.work_minutes, res.break_minutes), _legacy_attendance(day), day)
+
+    def test_hr_core_policy_matches_legacy_on_well_formed_days(self):
+        # 旧 hr_core は二重IN で後勝ち・休憩分は最後の区間分しか返さない不具合があったので整った打刻列のみ
+        rnd = random.Random(1)
+        for _ in range(CASES):
+            day = _well_formed_day(rnd)
+            res = calc.compute_day(day, calc.HR_CORE_POLICY)
+            self.assertEqual(res.work_minutes, _legacy_hr_core_work(day), day)
+            self.assertEqual(res.break_minutes, _break_inside_work(day), day)
+
+    def test_properties(self):
+        rnd = random.Random(2)
+        for _ in range(CASES):
+            day = _random_day(rnd)
+            shuffled = day[:]
+            rnd.shuffle(shuffled)
+            self.assertEqual(calc.compute_day(shuffled, calc.HR_CORE_POLICY),
+                             calc.compute_day(day, calc.HR_CORE_POLICY), day)
+
+            plain = calc.compute_day(day, calc.ATTENDANCE_POLICY)
+            base = rnd.choice((0, 6 * 60, 8 * 60))
+            ded = calc.compute_day(day, calc.HR_CORE_POLICY.with_base_minutes(base))
+            self.assertEqual(ded.overtime_minutes, max(ded.work_minutes - base, 0), day)
+            self.assertEqual(ded.work_minutes + ded.break_minutes, plain.work_minutes, day)
+
+            unit = rnd.choice((1, 5, 15, 30))
+            by_mode = [
+                calc.compute_day(day, CalcPolicy(rounding_unit=unit, rounding=mode)).work_minutes
+                for mode in (calc.FLOOR, calc.NEAREST, calc.CEIL)
+            ]
+            self.assertEqual(by_mode, sorted(by_mode), day)
+            self.assertTrue(all(m % unit == 0 for m in by_mode), day)
+
+
+@skipUnless(batch.is_available(), "numpy is not installed")
+class BatchEngineTests(SimpleTestCase):
+    def test_batch_matches_kernel(self):
+        rnd = random.Random(3)
+        days = [_random_day(rnd) for _ in range(CASES)]
+        uids, buckets, ts, codes, ids = [], [], [], [], []
+        for i, day in enumerate(days):
+            for p in day:
+                uids.append(i)
+                buckets.append(0)
+                ts.append((p.punched_at - _EPOCH) // timedelta(microseconds=1))
+                codes.append(batch.TYPE_CODES[p.punch_type])
+                ids.append(p.id)
+        got = batch.compute_days_batch(uids, buckets, ts, codes, ids).as_dict()
+        deducted = batch.compute_days_batch(uids, buckets, ts, codes, ids, base_minutes=8 * 60,
+                                            deduct_breaks=True).as_dict()
+        for i, day in enumerate(days):
+            res = calc.compute_day(day, calc.ATTENDANCE_POLICY)
+            w, b, _ = got.get((i, 0), (0, 0, 0))
+            self.assertEqual((w, b), (res.work_minutes, res.break_minutes), day)
+
+            res = calc.compute_day(day, calc.HR_CORE_POLICY)
+            self.assertEqual(deducted.get((i, 0), (0, 0, 0)),
+                             (res.work_minutes, res.break_minutes, res.overtime_minutes), day)
+
+
+class SqlPairingTests(TestCase):
+    """DB 側のペアリング（ウィンドウ関数）が compute_day（ATTENDANCE_POLICY / HR_CORE_POLICY）と一致する"""
+
+    def test_sql_matches_kernel(self):
+        rnd = random.Random(4)
+        users = [User.objects.create_user(f"u{i}") for i in range(3)]
+        days = {}
+        objs = []
+        for i in range(300):
+            user = users[i % len(users)]
+            work_date = date(2025, 1, 1) + timedelta(days=i)
+            day = _random_day(rnd)
+            days[(user.pk, work_date)] = day
+            objs += [Attendance(user=user, punch_type=p.punch_type, punched_at=p.punched_at, work_date=work_date)
+                     for p in day]
+        Attendance.objects.bulk_create(objs)
+
+        got = {(uid, d): (w, b) for uid, d, w, b in daily_minutes_sql(Attendance.objects.all())}
+        deducted = {(uid, d): (w, b)
+                    for uid, d, w, b in daily_minutes_sql(Attendance.objects.all(), deduct_breaks=True)}
+        # 同時刻の並びは打刻ID順なので、DB の ID で計算し直す
+        by_key = {}
+        for a in Attendance.objects.order_by("id"):
+            by_key.setdefault((a.user_id, a.work_date), []).append(PunchRecord(a.punch_type, a.punched_at, a.pk))
+        for key, day in days.items():
+            res = calc.compute_day(by_key.get(key, []), calc.ATTENDANCE_POLICY)
+            expected = (res.work_minutes, res.break_minutes)
+            self.assertEqual(got.get(key, (0, 0)), expected, (key, day))
+
+            res = calc.compute_day(by_key.get(key, []), calc.HR_CORE_POLICY)
+            expected = (res.work_minutes, res.break_minutes)
+            self.assertEqual(deducted.get(key, (0, 0)), expected, (key, day))
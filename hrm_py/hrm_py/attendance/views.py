@@ -2,11 +2,12 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from dataclasses import dataclass
 from datetime import datetime, date, timedelta
 from typing import Iterable, List, Dict, Tuple
 
-from django.db.models import QuerySet, Q
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, QuerySet, Q
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 
@@ -14,13 +15,22 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
 
-from .models import Attendance as AttendancePunch
+from . import batch
+from .aggregates import daily_minutes_sql
+from .calc import ATTENDANCE_POLICY, PunchRecord, compute_day
+from .models import Attendance as AttendancePunch, DailyAttendanceSummary
 
 # Employee 情報（残業判定の所定労働時間参照用：存在しなければ無視）
 try:
     from hr_core.models import Employee
+    from hr_core.directory import directory as employee_directory
+    from hr_core.roles import roles_for_user
+    from hr_core.fast_serialize import iso_formatter
 except Exception:  # hr_core が未導入でも動くように
     Employee = None  # type: ignore
+    employee_directory = None  # type: ignore
+    roles_for_user = None  # type: ignore
+    iso_formatter = None  # type: ignore
 
 
 # ==== 共通ユーティリティ ====
@@ -39,6 +49,8 @@ def is_hr_admin(user) -> bool:
     if getattr(user, "is_staff", False):
         return True
     try:
+        if roles_for_user is not None:
+            return roles_for_user(user).is_hr  # リクエスト内・プロセス内でキャッシュ
         return user.groups.filter(name="HR_ADMIN").exists()
     except Exception:
         return False
@@ -101,13 +113,16 @@ class PunchAPIView(APIView):
         now = timezone.now()
         work_date = timezone.localdate(now)
 
-        punch = AttendancePunch.objects.create(
-            user=request.user,
-            punch_type=ptype,
-            punched_at=now,
-            work_date=work_date,
-            note=note,
-        )
+        with transaction.atomic():
+            punch = AttendancePunch.objects.create(
+                user=request.user,
+                punch_type=ptype,
+                punched_at=now,
+                work_date=work_date,
+                note=note,
+            )
+            # 同一トランザクションで当日の日次サマリを更新
+            refresh_daily_summary(request.user.id, work_date)
 
         return Response(
             {
@@ -126,6 +141,7 @@ class PunchAPIView(APIView):
 class MyAttendanceAPIView(APIView):
     """
     GET /api/attendance/my?from=YYYY-MM-DD&to=YYYY-MM-DD
+    行はモデルを作らず values_list で読み、打刻時刻は固定オフセットでまとめて文字列化する（to_iso_dt と同じ値）。
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -138,89 +154,182 @@ class MyAttendanceAPIView(APIView):
             .order_by("punched_at", "id")
         )
 
+        fmt = iso_formatter() if iso_formatter is not None else to_iso_dt
         data = [
             {
-                "id": p.id,
-                "punch_type": p.punch_type,
-                "punched_at": to_iso_dt(p.punched_at),
-                "work_date": to_iso_date(p.work_date),
-                "note": p.note or "",
+                "id": pk,
+                "punch_type": punch_type,
+                "punched_at": fmt(punched_at),
+                "work_date": work_date.isoformat(),
+                "note": note or "",
             }
-            for p in qs
+            for pk, punch_type, punched_at, work_date, note
+            in qs.values_list("id", "punch_type", "punched_at", "work_date", "note")
         ]
         return Response(data)
 
 
 # ==== 日次集計 ====
+# 計算本体は calc.compute_day（hr_core と共通のカーネル）。ここでは休憩を控除しない ATTENDANCE_POLICY を使う。
+
 
-@dataclass
-class DayCalcResult:
-    work_minutes: int = 0
-    break_minutes: int = 0
+def _base_hours_for_users(user_ids: Iterable[int]) -> Dict[int, float]:
+    """
+    user_id → 所定労働時間（時間）。hr_core の社員ディレクトリからまとめて引く
+    （キャッシュに無い分だけ1クエリ）。プロフィールが無ければ 8h。
+    """
+    user_ids = set(user_ids)
+    entries = {}
+    try:
+        if employee_directory is not None:
+            entries = employee_directory.get_many(user_ids)
+    except Exception:
+        pass
+    return {uid: entries[uid].base_hours_per_day if uid in entries else 8.0 for uid in user_ids}
+
+
+def _base_hours_for_user(user) -> float:
+    """所定労働時間（時間）。user は User または user_id。"""
+    uid = getattr(user, "id", user)
+    return _base_hours_for_users([uid])[uid]
 
-    @property
-    def overtime_minutes(self) -> int:
-        # 実際の所定労働時間は呼び出し元で差し引く（ここはダミー）
-        return 0
 
+# ==== 日次サマリ（事前集計） ====
 
-def _pair_intervals(events: List[AttendancePunch], start_type: str, end_type: str) -> List[Tuple[datetime, datetime]]:
+def refresh_daily_summary(user_id: int, work_date: date) -> DailyAttendanceSummary | None:
     """
-    指定した開始/終了タイプをペアリングして区間リストを返す。
-    不完全ペアは末尾は無視（安全側）。
+    (user, work_date) の生打刻から日次サマリを再計算して保存する。
+    打刻が無くなった日は行を削除して None を返す。
     """
-    start_at: datetime | None = None
-    intervals: List[Tuple[datetime, datetime]] = []
-    for ev in events:
-        if ev.punch_type == start_type and start_at is None:
-            start_at = ev.punched_at
-        elif ev.punch_type == end_type and start_at is not None:
-            end_at = ev.punched_at
-            if end_at > start_at:
-                intervals.append((start_at, end_at))
-            start_at = None
-    return intervals
-
-
-def _minutes_total(intervals: List[Tuple[datetime, datetime]]) -> int:
-    total = 0
-    for s, e in intervals:
-        total += int((e - s).total_seconds() // 60)
-    return max(total, 0)
-
-
-def compute_day(punches: List[AttendancePunch]) -> DayCalcResult:
+    rows = list(
+        AttendancePunch.objects
+        .filter(user_id=user_id, work_date=work_date)
+        .order_by("punched_at", "id")
+        .values_list("id", "punch_type", "punched_at", "note")
+    )
+    if not rows:
+        DailyAttendanceSummary.objects.filter(user_id=user_id, work_date=work_date).delete()
+        return None
+
+    punches = [PunchRecord(ptype, at, pk) for pk, ptype, at, _ in rows]
+    policy = ATTENDANCE_POLICY.with_base_minutes(int(_base_hours_for_user(user_id) * 60))
+    calc = compute_day(punches, policy)
+    ins = [p.punched_at for p in punches if p.punch_type == PUNCH_IN]
+    outs = [p.punched_at for p in punches if p.punch_type == PUNCH_OUT]
+    row, _ = DailyAttendanceSummary.objects.update_or_create(
+        user_id=user_id,
+        work_date=work_date,
+        defaults={
+            **calc.as_dict(),
+            "first_in": ins[0] if ins else None,
+            "last_out": outs[-1] if outs else None,
+            "punch_count": len(rows),
+            "notes": [note for *_, note in rows if note],
+            "is_dirty": False,
+        },
+    )
+    return row
+
+
+# dirty な日がこれより多ければ、一括エンジンでまとめて再計算する
+#   "sql"   : ペアリングをDB側で行う（aggregates.daily_minutes_sql）
+#   "numpy" : 打刻を列で取得し NumPy で一括計算（batch.compute_days_batch）
+BULK_REFRESH_THRESHOLD = 20
+
+
+def _bulk_minutes(punches: QuerySet[AttendancePunch]) -> Dict[Tuple[int, date], Tuple[int, int]]:
+    engine = getattr(settings, "ATTENDANCE_BULK_ENGINE", "sql")
+    if engine == "numpy" and batch.is_available():
+        rows = (punches
+                .order_by("user_id", "work_date", "punched_at", "id")
+                .values_list("user_id", "work_date", "punched_at", "punch_type", "id"))
+        res = batch.compute_days_batch(*batch.columns_from_rows(rows.iterator()), presorted=True)
+        return {
+            (uid, date.fromordinal(d)): (wm, bm)
+            for (uid, d), (wm, bm, _) in res.as_dict().items()
+        }
+    return {(uid, d): (wm, bm) for uid, d, wm, bm in daily_minutes_sql(punches)}
+
+
+def refresh_daily_summaries_bulk(rows: List[DailyAttendanceSummary]) -> List[DailyAttendanceSummary]:
     """
-    1日の打刻（ソート済み）から 勤務分／休憩分 を算出。
-    - 勤務区間: IN→OUT のペア
-    - 休憩区間: BREAK_START→BREAK_END のペア
-    - 休憩は勤務時間から重複控除しない（IN/OUT が勤務の外側、BREAK が内側に入る設計を想定）
+    複数の日次サマリを一括で再計算する。打刻はモデルインスタンス化せず、
+    分数は一括エンジン、初回IN/最終OUT/件数は集約クエリ、備考は非空のものだけ取得する。
     """
-    if not punches:
-        return DayCalcResult()
+    if not rows:
+        return []
+    keys = {(r.user_id, r.work_date) for r in rows}
+    punches = AttendancePunch.objects.filter(
+        user_id__in={uid for uid, _ in keys},
+        work_date__gte=min(d for _, d in keys),
+        work_date__lte=max(d for _, d in keys),
+    )
+
+    minutes = _bulk_minutes(punches)
+    stats = {
+        (s["user_id"], s["work_date"]): s
+        for s in punches.order_by().values("user_id", "work_date").annotate(
+            first_in=Min("punched_at", filter=Q(punch_type=PUNCH_IN)),
+            last_out=Max("punched_at", filter=Q(punch_type=PUNCH_OUT)),
+            punch_count=Count("id"),
+        )
+    }
+    notes: Dict[Tuple[int, date], List[str]] = defaultdict(list)
+    for uid, d, note in punches.exclude(note="").order_by("punched_at", "id").values_list("user_id", "work_date", "note"):
+        notes[(uid, d)].append(note)
+
+    fresh: List[DailyAttendanceSummary] = []
+    empty: List[int] = []
+    base_hours = _base_hours_for_users(r.user_id for r in rows)
+    for row in rows:
+        key = (row.user_id, row.work_date)
+        st = stats.get(key)
+        if st is None:
+            empty.append(row.pk)
+            continue
+        wm, bm = minutes.get(key, (0, 0))
+        row.work_minutes = wm
+        row.break_minutes = bm
+        row.overtime_minutes = max(wm - int(base_hours[row.user_id] * 60), 0)
+        row.first_in = st["first_in"]
+        row.last_out = st["last_out"]
+        row.punch_count = st["punch_count"]
+        row.notes = notes.get(key, [])
+        row.is_dirty = False
+        fresh.append(row)
+
+    with transaction.atomic():
+        DailyAttendanceSummary.objects.filter(pk__in=empty).delete()
+        DailyAttendanceSummary.objects.bulk_update(
+            fresh,
+            ["work_minutes", "break_minutes", "overtime_minutes", "first_in", "last_out",
+             "punch_count", "notes", "is_dirty"],
+            batch_size=500,
+        )
+    return fresh
 
-    # 時系列に並べる
-    punches = sorted(punches, key=lambda x: (x.punched_at, x.id))
 
-    work_intervals = _pair_intervals(punches, PUNCH_IN, PUNCH_OUT)
-    break_intervals = _pair_intervals(punches, BREAK_START, BREAK_END)
+def _fresh_summaries(qs: QuerySet[DailyAttendanceSummary]) -> List[DailyAttendanceSummary]:
+    """サマリ行を返す。dirty な行だけ生打刻から再計算して差し替える。"""
+    rows = list(qs)
+    dirty = [row for row in rows if row.is_dirty]
+    if not dirty:
+        return rows
 
-    work_min = _minutes_total(work_intervals)
-    break_min = _minutes_total(break_intervals)
+    if len(dirty) > BULK_REFRESH_THRESHOLD:
+        # 再計算できた行は is_dirty=False になり、打刻の無くなった行だけ dirty のまま残る
+        refresh_daily_summaries_bulk(dirty)
+        return [row for row in rows if not row.is_dirty]
 
-    return DayCalcResult(work_minutes=work_min, break_minutes=break_min)
-
-
-def _base_hours_for_user(user) -> float:
-    """所定労働時間（時間）。Employee があれば参照、なければ 8h。"""
-    try:
-        if Employee is not None:
-            emp = Employee.objects.select_related(None).filter(user_id=user.id).first()
-            if emp and getattr(emp, "base_hours_per_day", None) is not None:
-                return float(emp.base_hours_per_day)
-    except Exception:
-        pass
-    return 8.0
+    result: List[DailyAttendanceSummary] = []
+    for row in rows:
+        if row.is_dirty:
+            with transaction.atomic():
+                row = refresh_daily_summary(row.user_id, row.work_date)
+            if row is None:
+                continue
+        result.append(row)
+    return result
 
 
 class SummaryAPIView(APIView):
@@ -241,8 +350,8 @@ class SummaryAPIView(APIView):
         user = request.user
         start, end = parse_range(request)
 
-        # ベースクエリ（期間）
-        qs: QuerySet[AttendancePunch] = AttendancePunch.objects.filter(
+        # ベースクエリ（期間）：打刻ではなく日次サマリを読む
+        qs: QuerySet[DailyAttendanceSummary] = DailyAttendanceSummary.objects.filter(
             work_date__gte=start,
             work_date__lte=end,
         )
@@ -259,45 +368,29 @@ class SummaryAPIView(APIView):
 
             # Employee を辿るフィルタは hr_core がある場合のみ
             if dept_id and Employee is not None:
-                qs = qs.filter(user__employee__department_id=dept_id)
+                qs = qs.filter(user__employee_profile__department_id=dept_id)
             if pos_id and Employee is not None:
-                qs = qs.filter(user__employee__position_id=pos_id)
+                qs = qs.filter(user__employee_profile__position_id=pos_id)
             if ecode and Employee is not None:
-                qs = qs.filter(user__employee__employee_code=ecode)
+                qs = qs.filter(user__employee_profile__employee_code=ecode)
             if uid:
                 qs = qs.filter(user_id=uid)
 
-        qs = qs.select_related("user").order_by("work_date", "punched_at", "id")
-
-        # ユーザー×日付のバケット
-        bucket: Dict[Tuple[int, date], List[AttendancePunch]] = defaultdict(list)
-        for p in qs:
-            bucket[(p.user_id, p.work_date)].append(p)
+        rows = _fresh_summaries(qs.order_by("work_date", "user_id"))
 
         # 日付ごとの集計（複数ユーザーが混在する場合は合算）
         results_by_date: Dict[date, Dict[str, int]] = {d: {"work": 0, "break": 0, "ot": 0} for d in daterange(start, end)}
         notes_by_date: Dict[date, List[str]] = {d: [] for d in daterange(start, end)}
 
-        # 事前にユーザーごとの所定労働時間（h）をキャッシュ
-        base_hours_cache: Dict[int, float] = {}
-
-        for (uid, d), punches in bucket.items():
-            # ユーザー別の所定労働時間（時間）
-            if uid not in base_hours_cache:
-                if Employee is not None:
-                    try:
-                        emp = Employee.objects.filter(user_id=uid).only("base_hours_per_day").first()
-                        base_hours_cache[uid] = float(emp.base_hours_per_day) if emp and emp.base_hours_per_day is not None else 8.0
-                    except Exception:
-                        base_hours_cache[uid] = 8.0
-                else:
-                    base_hours_cache[uid] = 8.0
-
-            calc = compute_day(punches)
+        # ユーザーごとの所定労働時間（h）をまとめて取得
+        base_hours_cache = _base_hours_for_users(row.user_id for row in rows)
+
+        for row in rows:
+            uid, d = row.user_id, row.work_date
             base_min = int(base_hours_cache[uid] * 60)
 
-            work_min = int(calc.work_minutes)
-            break_min = int(calc.break_minutes)
+            work_min = int(row.work_minutes)
+            break_min = int(row.break_minutes)
             ot_min = max(work_min - base_min, 0)
 
             results_by_date[d]["work"] += work_min
@@ -305,10 +398,9 @@ class SummaryAPIView(APIView):
             results_by_date[d]["ot"] += ot_min
 
             # 備考（note）をメモ（重複排除）
-            for p in punches:
-                if p.note:
-                    if p.note not in notes_by_date[d]:
-                        notes_by_date[d].append(p.note)
+            for note in row.notes:
+                if note not in notes_by_date[d]:
+                    notes_by_date[d].append(note)
 
         # レスポンス整形
         value = []
@@ -1,6 +1,6 @@
 # hr_core/admin.py
 from django.contrib import admin
-from .models import Department, Position, Employee as EmployeeModel
+from .models import Department, Position, Employee as EmployeeModel, WorkCalendar
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
@@ -17,3 +17,9 @@ class EmployeeAdmin(admin.ModelAdmin):
     # EmployeeProfile のフィールドが未確定でも安全に動く最小構成
     list_display = ("id",)
 
+@admin.register(WorkCalendar)
+class WorkCalendarAdmin(admin.ModelAdmin):
+    list_display = ("date", "kind", "name")
+    list_filter = ("kind",)
+    search_fields = ("name",)
+    date_hierarchy = "date"
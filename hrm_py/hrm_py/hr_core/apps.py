@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HrCoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hr_core'
+
+    def ready(self):
+        from . import signals  # noqa: F401  社員ディレクトリキャッシュの無効化
@@ -0,0 +1,95 @@
+# hr_core/authentication.py
+"""
+SimpleJWT の拡張：ロール（roles.Roles）を access token の "hr_roles" クレームに埋め込む。
+
+HR_ROLES_IN_TOKEN=True のときだけ有効。トークン発行・リフレッシュ時にロールを解決して載せ、
+認証時にクレームから復元するので、権限判定でDBを引かない。
+ロール変更の反映は最長で access token の有効期限まで遅れる（リフレッシュ時に再解決）。
+"""
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .roles import TOKEN_CLAIM, Roles, attach_roles, resolver
+
+
+def roles_in_token() -> bool:
+    return getattr(settings, "HR_ROLES_IN_TOKEN", False)
+
+
+class HrTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        if roles_in_token():
+            token[TOKEN_CLAIM] = resolver.resolve(user).as_claims()
+        return token
+
+
+class HrTokenRefreshSerializer(TokenRefreshSerializer):
+    """リフレッシュで発行する access token のロールを解決し直す（refresh token の古い値を引き継がない）"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if roles_in_token():
+            access = AccessToken(data["access"])
+            user_id = access.get(api_settings.USER_ID_CLAIM)
+            user = JWTAuthentication().get_user(access) if user_id is not None else None
+            if user is not None:
+                access[TOKEN_CLAIM] = resolver.resolve(user).as_claims()
+                data["access"] = str(access)
+        return data
+
+
+class HrJWTAuthentication(JWTAuthentication):
+    """クレームにロールがあれば request.user に持たせる（roles.roles_for_user がそれを返す）"""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None and roles_in_token():
+            user, token = result
+            claims = token.get(TOKEN_CLAIM)
+            if isinstance(claims, dict):
+                attach_roles(user, Roles.from_claims(claims, is_staff=bool(user.is_staff)))
+        return result
+
+    async def aauthenticate(self, request):
+        """
+        authenticate の async 版（async ビュー用。Django の HttpRequest をそのまま受け取る）。
+        トークンの検証はCPUのみ、ユーザーは aget() で読むのでスレッドを使わない。
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        user = await self.aget_user(token)
+        if roles_in_token():
+            claims = token.get(TOKEN_CLAIM)
+            if isinstance(claims, dict):
+                attach_roles(user, Roles.from_claims(claims, is_staff=bool(user.is_staff)))
+        return user, token
+
+    async def aget_user(self, validated_token):
+        """JWTAuthentication.get_user と同じ検査を async ORM で行う"""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
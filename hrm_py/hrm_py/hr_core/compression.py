@@ -0,0 +1,132 @@
+# hr_core/compression.py
+"""
+応答本文の圧縮ミドルウェア（Accept-Encoding で zstd / gzip を選ぶ）。
+
+  - 候補はサーバの優先順（zstd → gzip）で、クライアントが q>0 で受け付けるもの。zstd は zstandard が必要
+  - 通常の応答は HR_COMPRESS_MIN_BYTES 未満なら圧縮しない（小さい本文は圧縮しても得にならない）。
+    圧縮して小さくならなければ元のまま返す
+  - ストリーミング応答（CSV エクスポートなど）はチャンクごとに圧縮して流す（ブロック単位で flush）
+  - SSE（text/event-stream）と、すでに圧縮済みの形式（Parquet・zip・画像など）は触らない
+強い ETag は圧縮後の表現と一致しなくなるので弱い ETag にする（django.middleware.gzip と同じ）。
+"""
+import gzip
+import zlib
+from typing import Callable, Optional, Tuple
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import zstandard  # type: ignore
+except Exception:
+    zstandard = None
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+SKIP_TYPES = {
+    "text/event-stream",
+    "application/vnd.apache.parquet",
+    "application/zip",
+    "application/gzip",
+    "application/zstd",
+}
+
+
+def choose_encoding(header: str) -> Optional[str]:
+    """Accept-Encoding からサーバの優先順で使える符号化を選ぶ（無ければ None）"""
+    q = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        for p in params.split(";"):
+            k, _, v = p.strip().partition("=")
+            if k.strip() == "q":
+                try:
+                    weight = float(v)
+                except ValueError:
+                    weight = 0.0
+        q[name] = weight
+    for enc in ENCODINGS:
+        if q.get(enc, q.get("*", 0.0)) > 0:
+            return enc
+    return None
+
+
+def compress(encoding: str, data: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _stream_encoder(encoding: str) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """(チャンクを圧縮してブロック境界まで flush する関数, 終端を書く関数)"""
+    if encoding == "zstd":
+        obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+        return (lambda b: obj.compress(b) + obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), obj.flush
+    obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return (lambda b: obj.compress(b) + obj.flush(zlib.Z_SYNC_FLUSH)), obj.flush
+
+
+def _compress_sequence(encoding: str, chunks):
+    step, finish = _stream_encoder(encoding)
+    for chunk in chunks:
+        data = step(chunk if isinstance(chunk, bytes) else str(chunk).encode("utf-8"))
+        if data:
+            yield data
+    yield finish()
+
+
+async def _acompress_sequence(encoding: str, chunks):
+    step, finish = _stream_encoder(encoding)
+    async for chunk in chunks:
+        data = step(chunk if isinstance(chunk, bytes) else str(chunk).encode("utf-8"))
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """settings.MIDDLEWARE の先頭近く（本文を書き換える他のミドルウェアより外側）に置く"""
+
+    @property
+    def min_size(self) -> int:
+        # 応答ごとに読む（override_settings や設定の差し替えがそのまま効く）
+        return getattr(settings, "HR_COMPRESS_MIN_BYTES", 1024)
+
+    def process_response(self, request, response):
+        if response.status_code in (204, 304) or response.has_header("Content-Encoding"):
+            return response
+        content_type = response.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type in SKIP_TYPES or content_type.startswith(("image/", "video/", "audio/")):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_sequence(encoding, response.streaming_content)
+            else:
+                response.streaming_content = _compress_sequence(encoding, response.streaming_content)
+            del response["Content-Length"]
+        else:
+            compressed = compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
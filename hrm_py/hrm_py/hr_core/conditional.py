@@ -0,0 +1,118 @@
+# hr_core/conditional.py
+"""
+/api/attendance/my・/api/attendance/summary の条件付きGET（ETag / If-None-Match → 304）。
+
+検証子は要求スコープの
+  - 打刻：件数と最大ID（(user, work_date) インデックス）
+  - 日次サマリ：件数・最終更新時刻・dirty 件数（(user, work_date) 一意制約 / department インデックス）
+  - 社員プロフィール：最終更新時刻（所定労働時間や所属の変更）
+  - 勤務カレンダーの版（祝日・会社休日の注記と所定日数が変わる）
+を集計するだけで作るので、集計・シリアライズより十分安い。
+スコープ内に dirty な日次サマリがあるときは 304 を返さない（再計算で値が変わるため。
+再計算後の値で ETag を付け直して 200 を返す）。
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+from django.db.models import Count, Max, Q
+from django.utils.http import parse_etags, quote_etag
+
+from .models_attendance import AttendancePunch, DailyAttendanceSummary
+from .models_hr import EmployeeProfile
+
+CACHE_CONTROL = "private, no-cache"  # 保存はしてよいが毎回検証させる
+
+
+def _stamp(value) -> str:
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+PUNCH_AGG = {"n": Count("id"), "last": Max("id")}
+SUMMARY_AGG = {"n": Count("id"), "last": Max("updated_at"), "dirty": Count("id", filter=Q(is_dirty=True))}
+PROFILE_AGG = {"n": Count("id"), "last": Max("updated_at")}
+
+
+def _punches(user_id: int, dfrom: date, dto: date):
+    return AttendancePunch.objects.filter(user_id=user_id, work_date__gte=dfrom, work_date__lte=dto)
+
+
+def _summaries(dfrom: date, dto: date, user_id: Optional[int], department_id: Optional[int]):
+    q = Q(work_date__gte=dfrom, work_date__lte=dto)
+    if department_id is not None:
+        # 未計算（dirty）の行は部署が未確定なので現在の所属でも拾う（refresh_dirty_days と同じ）
+        q &= Q(department_id=department_id) | Q(user__employee_profile__department_id=department_id)
+    else:
+        q &= Q(user_id=user_id)
+    return DailyAttendanceSummary.objects.filter(q)
+
+
+def _profiles(user_id: Optional[int], department_id: Optional[int]):
+    if department_id is not None:
+        return EmployeeProfile.objects.filter(department_id=department_id)
+    return EmployeeProfile.objects.filter(user_id=user_id)
+
+
+def _etag(request, viewer_id: int, parts: Iterable) -> str:
+    """検証値＋表現を決める要素（パス・クエリ・閲覧者・Accept）から ETag を作る"""
+    h = hashlib.blake2b(digest_size=16)
+    for part in (request.path, sorted(request.GET.lists()), viewer_id,
+                 request.META.get("HTTP_ACCEPT", ""), *parts):
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\x00")
+    return "W/" + quote_etag(h.hexdigest())
+
+
+def _summary_parts(s, prof, p) -> Tuple:
+    parts = ("summary", s["n"], _stamp(s["last"]), "profile", prof["n"], _stamp(prof["last"]))
+    if p is not None:
+        parts += ("punches", p["n"], p["last"])
+    return parts
+
+
+def punch_list_etag(request, user_id: int, dfrom: date, dto: date) -> str:
+    p = _punches(user_id, dfrom, dto).aggregate(**PUNCH_AGG)
+    return _etag(request, user_id, ("punches", p["n"], p["last"]))
+
+
+async def apunch_list_etag(request, user_id: int, dfrom: date, dto: date) -> str:
+    p = await _punches(user_id, dfrom, dto).aaggregate(**PUNCH_AGG)
+    return _etag(request, user_id, ("punches", p["n"], p["last"]))
+
+
+def summary_etag(request, viewer_id: int, dfrom: date, dto: date, user_id: Optional[int],
+                 department_id: Optional[int], calendar_version: str = "") -> Tuple[str, bool]:
+    """(ETag, スコープ内に dirty な日次サマリがあるか)。calendar_version は勤務カレンダーの版"""
+    s = _summaries(dfrom, dto, user_id, department_id).aggregate(**SUMMARY_AGG)
+    prof = _profiles(user_id, department_id).aggregate(**PROFILE_AGG)
+    p = _punches(user_id, dfrom, dto).aggregate(**PUNCH_AGG) if department_id is None else None
+    parts = _summary_parts(s, prof, p) + ("calendar", calendar_version)
+    return _etag(request, viewer_id, parts), bool(s["dirty"])
+
+
+async def asummary_etag(request, viewer_id: int, dfrom: date, dto: date, user_id: Optional[int],
+                        department_id: Optional[int], calendar_version: str = "") -> Tuple[str, bool]:
+    s = await _summaries(dfrom, dto, user_id, department_id).aaggregate(**SUMMARY_AGG)
+    prof = await _profiles(user_id, department_id).aaggregate(**PROFILE_AGG)
+    p = await _punches(user_id, dfrom, dto).aaggregate(**PUNCH_AGG) if department_id is None else None
+    parts = _summary_parts(s, prof, p) + ("calendar", calendar_version)
+    return _etag(request, viewer_id, parts), bool(s["dirty"])
+
+
+def is_not_modified(request, etag: str) -> bool:
+    """If-None-Match が etag に一致するか（弱い比較）"""
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    strip = lambda t: t[2:] if t.startswith("W/") else t
+    return strip(etag) in {strip(t) for t in parse_etags(header)}
+
+
+def set_validator(response, etag: str):
+    response["ETag"] = etag
+    response["Cache-Control"] = CACHE_CONTROL
+    return response
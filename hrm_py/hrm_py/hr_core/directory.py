@@ -0,0 +1,144 @@
+# hr_core/directory.py
+"""
+社員ディレクトリのプロセス内キャッシュ（user_id → 所定労働時間・部署・役職など）。
+
+集計APIやプロフィールAPIがユーザーごとに EmployeeProfile を引く N+1 を避けるため、
+必要な user_id の集合を1クエリでまとめて読み込み、上限付き（LRU）で保持する（local_cache.LocalCache）。
+EmployeeProfile / Department / Position の保存・削除で signals.py から無効化される。
+他プロセスでの更新は TTL（HR_DIRECTORY_TTL 秒）経過で反映される。
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, NamedTuple, Optional
+
+from django.conf import settings
+
+from .local_cache import LocalCache
+from .models_hr import EmployeeProfile
+
+DEFAULT_BASE_HOURS = 8.0
+_CHUNK = 500  # IN 句のパラメータ数上限対策
+
+
+class Ref(NamedTuple):
+    """部署・役職の参照（DeptSerializer / PosSerializer でそのまま出力できる形）"""
+    id: int
+    name: str
+
+
+@dataclass(frozen=True)
+class EmployeeEntry:
+    user_id: int
+    employee_code: str
+    department: Optional[Ref]
+    position: Optional[Ref]
+    employment_type: str
+    base_hours_per_day: float
+    status: str
+    is_manager: bool
+
+    @property
+    def department_id(self) -> Optional[int]:
+        return self.department.id if self.department else None
+
+    @property
+    def position_id(self) -> Optional[int]:
+        return self.position.id if self.position else None
+
+    @property
+    def base_minutes(self) -> int:
+        return int(self.base_hours_per_day * 60)
+
+
+class EmployeeDirectory:
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        # user_id → entry。プロフィールが無いユーザーは None で覚える
+        self._cache = LocalCache(maxsize, ttl)
+
+    def get(self, user_id: int) -> Optional[EmployeeEntry]:
+        return self.get_many([user_id]).get(int(user_id))
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, EmployeeEntry]:
+        """プロフィールのあるユーザーだけを返す。キャッシュに無い分は1クエリで読み込む"""
+        now = time.monotonic()
+        found, missing = self._lookup(user_ids, now)
+        if missing:
+            self._store(missing, self._load(missing), now, found)
+        return found
+
+    async def aget(self, user_id: int) -> Optional[EmployeeEntry]:
+        return (await self.aget_many([user_id])).get(int(user_id))
+
+    async def aget_many(self, user_ids: Iterable[int]) -> Dict[int, EmployeeEntry]:
+        """get_many の async 版（キャッシュに無い分は async ORM で読み込む）"""
+        now = time.monotonic()
+        found, missing = self._lookup(user_ids, now)
+        if missing:
+            self._store(missing, await self._aload(missing), now, found)
+        return found
+
+    def _lookup(self, user_ids: Iterable[int], now: float):
+        """(キャッシュにあった分, 読み込みが必要な user_id のリスト)"""
+        hits, missing = self._cache.lookup({int(u) for u in user_ids if u is not None}, now)
+        return {uid: entry for uid, entry in hits.items() if entry is not None}, missing
+
+    def _store(self, missing, loaded: Dict[int, EmployeeEntry], now: float, found: Dict[int, EmployeeEntry]) -> None:
+        self._cache.put_many({uid: loaded.get(uid) for uid in missing}, now)
+        found.update((uid, loaded[uid]) for uid in missing if uid in loaded)
+
+    def base_hours(self, user_id: int) -> float:
+        entry = self.get(user_id)
+        return entry.base_hours_per_day if entry else DEFAULT_BASE_HOURS
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        self._cache.invalidate(int(uid) for uid in user_ids)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @staticmethod
+    def _rows(user_ids):
+        return (EmployeeProfile.objects
+                .filter(user_id__in=user_ids)
+                .values_list("user_id", "employee_code",
+                             "department_id", "department__name",
+                             "position_id", "position__name",
+                             "employment_type", "base_hours_per_day", "status", "is_manager"))
+
+    @staticmethod
+    def _entry(row) -> EmployeeEntry:
+        uid, code, dept_id, dept_name, pos_id, pos_name, etype, hours, st, mgr = row
+        return EmployeeEntry(
+            user_id=uid,
+            employee_code=code,
+            department=Ref(dept_id, dept_name) if dept_id is not None else None,
+            position=Ref(pos_id, pos_name) if pos_id is not None else None,
+            employment_type=etype,
+            base_hours_per_day=float(hours) if hours is not None else DEFAULT_BASE_HOURS,
+            status=st,
+            is_manager=mgr,
+        )
+
+    @classmethod
+    def _load(cls, user_ids) -> Dict[int, EmployeeEntry]:
+        result: Dict[int, EmployeeEntry] = {}
+        for i in range(0, len(user_ids), _CHUNK):
+            for row in cls._rows(user_ids[i:i + _CHUNK]):
+                result[row[0]] = cls._entry(row)
+        return result
+
+    @classmethod
+    async def _aload(cls, user_ids) -> Dict[int, EmployeeEntry]:
+        result: Dict[int, EmployeeEntry] = {}
+        for i in range(0, len(user_ids), _CHUNK):
+            async for row in cls._rows(user_ids[i:i + _CHUNK]):
+                result[row[0]] = cls._entry(row)
+        return result
+
+
+directory = EmployeeDirectory(
+    maxsize=getattr(settings, "HR_DIRECTORY_CACHE_SIZE", 4096),
+    ttl=getattr(settings, "HR_DIRECTORY_TTL", 300),
+)
@@ -0,0 +1,225 @@
+# hr_core/export_arrow.py
+"""
+勤怠データの Apache Arrow / Parquet 書き出し（分析用。views_export.py と export_attendance コマンドから使う）。
+
+CSV と違い列に型を持たせるので、pandas 側で日時の文字列解析が要らない。
+  - 日時：timestamp[us, UTC]（int64 のエポック）。pandas では datetime64 としてそのまま読める
+  - 日付：date32
+  - 打刻種別・社員コード・部署名：辞書エンコード（pandas では category）
+    辞書は先に全件（打刻種別の選択肢・社員コード・部署名）を作って全バッチで共有する
+    （Arrow のファイル形式はバッチごとの辞書の差し替えを許さないため）
+queryset は values_list().iterator() で読み、ROW_GROUP_SIZE 行ごとに1つのレコードバッチ
+（Parquet では1つの行グループ）にして書き出すので、期間・人数に関係なくメモリは一定。
+
+pyarrow は任意の依存。無い環境では ARROW_AVAILABLE が False になり、
+エンドポイントは 501、コマンドはエラーを返す。
+"""
+from __future__ import annotations
+
+import io
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models_attendance import AttendancePunch, DailyAttendanceSummary, PunchType
+from .models_hr import Department, EmployeeProfile
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:
+    pa = None
+    pq = None
+
+ARROW_AVAILABLE = pa is not None
+FORMATS = ("parquet", "arrow")
+CONTENT_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+ROW_GROUP_SIZE = getattr(settings, "HR_EXPORT_ROW_GROUP_SIZE", 65536)
+CHUNK_SIZE = 2000  # iterator() の1回の取得件数
+
+
+class _ChunkSink(io.RawIOBase):
+    """書き込まれたバイト列を溜めておき、drain() で取り出す出力先（HTTP のストリーミング用）"""
+
+    def __init__(self):
+        super().__init__()
+        self._buf = bytearray()
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._buf += b
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._buf.clear()
+        return data
+
+
+class _Dictionary:
+    """値 → 辞書インデックス。全バッチで同じ辞書を使う"""
+
+    def __init__(self, values: Sequence[str]):
+        self.values = pa.array(list(values), pa.string())
+        self._index: Dict[object, int] = {}
+
+    @classmethod
+    def keyed(cls, pairs: Sequence[Tuple[object, str]]) -> "_Dictionary":
+        """(キー, 表示値) から作る（同じ表示値は1つにまとめる）"""
+        labels: Dict[str, int] = {}
+        index: Dict[object, int] = {}
+        for key, label in pairs:
+            index[key] = labels.setdefault(label, len(labels))
+        d = cls(list(labels))
+        d._index = index
+        return d
+
+    def encode(self, keys: Sequence[object]):
+        index = self._index
+        indices = pa.array([index.get(k) for k in keys], pa.int32())
+        return pa.DictionaryArray.from_arrays(indices, self.values)
+
+
+def _dict_type():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def _timestamp():
+    return pa.timestamp("us", tz="UTC")
+
+
+def _employee_codes() -> _Dictionary:
+    return _Dictionary.keyed(list(EmployeeProfile.objects.exclude(employee_code="")
+                                  .values_list("user_id", "employee_code")))
+
+
+def _chunks(it, size: int) -> Iterator[List[tuple]]:
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---- 打刻 ----
+
+def punch_schema():
+    return pa.schema([
+        ("user_id", pa.int64()),
+        ("employee_code", _dict_type()),
+        ("work_date", pa.date32()),
+        ("punched_at", _timestamp()),
+        ("punch_type", _dict_type()),
+        ("note", pa.string()),
+    ])
+
+
+def punch_batches(dfrom: date, dto: date, q: Q) -> Iterator:
+    """打刻を (work_date, user) インデックス順に ROW_GROUP_SIZE 行ずつのレコードバッチで返す"""
+    schema = punch_schema()
+    codes = _employee_codes()
+    types = _Dictionary.keyed([(value, value) for value, _ in PunchType.choices])
+    qs = (AttendancePunch.objects
+          .filter(q, work_date__gte=dfrom, work_date__lte=dto)
+          .order_by("work_date", "user_id", "punched_at", "id")
+          .values_list("user_id", "work_date", "punched_at", "punch_type", "note"))
+    for rows in _chunks(qs.iterator(chunk_size=CHUNK_SIZE), ROW_GROUP_SIZE):
+        user_ids, work_dates, punched_at, punch_types, notes = zip(*rows)
+        yield pa.record_batch([
+            pa.array(user_ids, pa.int64()),
+            codes.encode(user_ids),
+            pa.array(work_dates, pa.date32()),
+            pa.array(punched_at, _timestamp()),
+            types.encode(punch_types),
+            pa.array(notes, pa.string()),
+        ], schema=schema)
+
+
+# ---- 日次サマリ ----
+
+def summary_schema():
+    return pa.schema([
+        ("user_id", pa.int64()),
+        ("employee_code", _dict_type()),
+        ("department", _dict_type()),
+        ("work_date", pa.date32()),
+        ("work_minutes", pa.int32()),
+        ("break_minutes", pa.int32()),
+        ("overtime_minutes", pa.int32()),
+        ("first_in", _timestamp()),
+        ("last_out", _timestamp()),
+        ("punch_count", pa.int32()),
+    ])
+
+
+def summary_batches(dfrom: date, dto: date, q: Q) -> Iterator:
+    """日次サマリ（社員×日）を ROW_GROUP_SIZE 行ずつのレコードバッチで返す（dirty な日は呼び出し側で再計算しておく）"""
+    schema = summary_schema()
+    codes = _employee_codes()
+    departments = _Dictionary.keyed(list(Department.objects.values_list("id", "name")))
+    qs = (DailyAttendanceSummary.objects
+          .filter(q, work_date__gte=dfrom, work_date__lte=dto)
+          .order_by("work_date", "user_id")
+          .values_list("user_id", "department_id", "work_date", "work_minutes", "break_minutes",
+                       "overtime_minutes", "first_in", "last_out", "punch_count"))
+    for rows in _chunks(qs.iterator(chunk_size=CHUNK_SIZE), ROW_GROUP_SIZE):
+        user_ids, dept_ids, work_dates, work, brk, ot, first_in, last_out, count = zip(*rows)
+        yield pa.record_batch([
+            pa.array(user_ids, pa.int64()),
+            codes.encode(user_ids),
+            departments.encode(dept_ids),
+            pa.array(work_dates, pa.date32()),
+            pa.array(work, pa.int32()),
+            pa.array(brk, pa.int32()),
+            pa.array(ot, pa.int32()),
+            pa.array(first_in, _timestamp()),
+            pa.array(last_out, _timestamp()),
+            pa.array(count, pa.int32()),
+        ], schema=schema)
+
+
+# ---- 書き出し ----
+
+def encode(fmt: str, schema, batches) -> Iterator[bytes]:
+    """
+    レコードバッチを Parquet（1バッチ＝1行グループ）または Arrow IPC ファイル形式に書き、
+    バッチごとに書けた分のバイト列を返すジェネレータ。0件でもスキーマだけのファイルになる。
+    """
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+        write = writer.write_batch
+    elif fmt == "arrow":
+        writer = pa.ipc.new_file(sink, schema)
+        write = writer.write_batch
+    else:
+        raise ValueError(f"unknown format: {fmt}")
+    for batch in batches:
+        write(batch)
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+
+
+def export_scope(user_id: Optional[int] = None, department_id: Optional[int] = None) -> Q:
+    """CSV エクスポートと同じ絞り込み（部署は現在の所属）"""
+    if user_id is not None:
+        return Q(user_id=user_id)
+    if department_id is not None:
+        return Q(user__employee_profile__department_id=department_id)
+    return Q()
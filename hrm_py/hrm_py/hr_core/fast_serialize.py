@@ -0,0 +1,131 @@
+# hr_core/fast_serialize.py
+"""
+読み取り専用の一覧API（/attendance/my・ダッシュボードの当日打刻）の軽量シリアライズ。
+
+ModelSerializer(many=True) は1行ごとにモデルのインスタンスとフィールド処理を通すので、
+打刻が数百行になると本文の生成が支配的になる。ここでは queryset を values_list() のタプルで読み、
+日時の文字列化だけを DRF の DateTimeField と同じ結果になるように自前で行う。
+  - 現在のタイムゾーンが Asia/Tokyo（1952年以降は +09:00 固定）/ UTC なら固定オフセットを足すだけ
+    （astimezone() を呼ばない）。DATETIME_FORMAT が既定の "%Y-%m-%d %H:%M:%S" なら
+    UTC エポック秒からの割り算で組み立て、日付部分は日ごとに1回だけ作る
+  - それ以外のタイムゾーン・書式（%z など）や1952年より前の日時は DRF のフィールドに任せる
+出力は AttendancePunchSerializer と同じキー・同じ順・同じ文字列（応答の JSON はバイト単位で一致）。
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone as dt_tz
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+# AttendancePunchSerializer.Meta.fields と同じ順
+PUNCH_FIELDS = ("id", "punched_at", "punch_type", "note")
+
+DEFAULT_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+_FIXED_OFFSETS = {"Asia/Tokyo": timedelta(hours=9), "Japan": timedelta(hours=9), "UTC": timedelta(0)}
+_FIXED_SINCE = datetime(1952, 1, 1, tzinfo=dt_tz.utc)  # 日本のサマータイム（1948〜1951年）以降
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_tz.utc)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_SECOND = timedelta(seconds=1)
+_TWO_DIGITS = [f"{i:02d}" for i in range(60)]
+
+
+def _fixed_offset() -> Optional[timedelta]:
+    if not settings.USE_TZ:
+        return None
+    tz = timezone.get_current_timezone()
+    return _FIXED_OFFSETS.get(getattr(tz, "key", None) or str(tz))
+
+
+def _offset_suffix(offset: timedelta) -> str:
+    minutes = int(offset.total_seconds()) // 60
+    return f"{'+' if minutes >= 0 else '-'}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+def _default_format(offset: timedelta, slow: Callable) -> Callable[[Optional[datetime]], Optional[str]]:
+    """"%Y-%m-%d %H:%M:%S" を UTC エポック秒から組み立てる（日付の文字列は日ごとに1回だけ作る）"""
+    shift = int(offset.total_seconds())
+    days: Dict[int, str] = {}
+    two = _TWO_DIGITS
+
+    def fmt(dt):
+        if dt is None or dt < _FIXED_SINCE:
+            return slow(dt)
+        day, sec = divmod((dt - _EPOCH) // _SECOND + shift, 86400)  # 秒未満は切り捨て（strftime と同じ）
+        prefix = days.get(day)
+        if prefix is None:
+            prefix = days[day] = date.fromordinal(_EPOCH_ORDINAL + day).isoformat() + " "
+        hour, rest = divmod(sec, 3600)
+        minute, second = divmod(rest, 60)
+        return f"{prefix}{two[hour]}:{two[minute]}:{two[second]}"
+    return fmt
+
+
+def datetime_formatter() -> Callable[[Optional[datetime]], Optional[str]]:
+    """DRF の DateTimeField().to_representation と同じ文字列を返す関数（1リクエストの中で使い回す）"""
+    slow = serializers.DateTimeField().to_representation
+    output = api_settings.DATETIME_FORMAT
+    offset = _fixed_offset()
+    if offset is None or output is None or not isinstance(output, str):
+        return lambda dt: None if dt is None else slow(dt)
+
+    if output.lower() == ISO_8601:
+        suffix = "Z" if not offset else _offset_suffix(offset)
+
+        def iso(dt):
+            if dt is None or dt < _FIXED_SINCE:
+                return None if dt is None else slow(dt)
+            return (dt + offset).replace(tzinfo=None).isoformat() + suffix
+        return iso
+
+    if output == DEFAULT_DATETIME_FORMAT:
+        return _default_format(offset, lambda dt: None if dt is None else slow(dt))
+
+    if "%z" in output or "%Z" in output:
+        return lambda dt: None if dt is None else slow(dt)
+
+    def strf(dt):
+        if dt is None or dt < _FIXED_SINCE:
+            return None if dt is None else slow(dt)
+        return (dt + offset).strftime(output)
+    return strf
+
+
+def iso_formatter() -> Callable[[datetime], str]:
+    """dt.astimezone(現在のタイムゾーン).isoformat() と同じ文字列を返す関数（attendance アプリ用）"""
+    offset = _fixed_offset()
+    if offset is None:
+        return lambda dt: dt.astimezone(timezone.get_current_timezone()).isoformat()
+    suffix = _offset_suffix(offset)
+    tz = timezone.get_current_timezone()
+
+    def iso(dt):
+        if dt < _FIXED_SINCE:
+            return dt.astimezone(tz).isoformat()
+        return (dt + offset).replace(tzinfo=None).isoformat() + suffix
+    return iso
+
+
+def punch_rows(rows: Iterable[tuple]) -> List[Dict[str, Any]]:
+    """PUNCH_FIELDS 順のタプル → AttendancePunchSerializer(many=True).data と同じ形の dict のリスト"""
+    fmt = datetime_formatter()
+    return [
+        {"id": pk, "punched_at": fmt(at), "punch_type": ptype, "note": note}
+        for pk, at, ptype, note in rows
+    ]
+
+
+def punch_list(qs) -> List[Dict[str, Any]]:
+    return punch_rows(qs.values_list(*PUNCH_FIELDS))
+
+
+async def apunch_list(qs) -> List[Dict[str, Any]]:
+    return punch_rows([row async for row in qs.values_list(*PUNCH_FIELDS)])
+
+
+def punch_page(page: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """KeysetPagination で values(*PUNCH_FIELDS) をページ分割した行を変換する（元の行はカーソル用にそのまま残す）"""
+    return punch_rows((r["id"], r["punched_at"], r["punch_type"], r["note"]) for r in page)
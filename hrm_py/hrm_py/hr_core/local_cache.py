@@ -0,0 +1,69 @@
+# hr_core/local_cache.py
+"""
+プロセス内の上限付き（LRU）・有効期限付き（TTL）キャッシュ。社員ディレクトリ（directory.py）と
+ロール（roles.py）が使う。値に None も保持できる（「プロフィール無し」のような否定の結果を覚えるため）。
+
+有効期限は読み込み時刻からの秒数（time.monotonic()）。他プロセスでの変更はこの秒数で反映される。
+読み込みそのものは呼び出し側が行い、ここはロックの下での出し入れだけを受け持つ。
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+_MISSING = object()
+
+
+class LocalCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # キー → (読み込み時刻, 値)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, now: Optional[float] = None, default: Any = None) -> Any:
+        hits, _ = self.lookup([key], now)
+        return hits.get(key, default)
+
+    def lookup(self, keys: Iterable[Hashable], now: Optional[float] = None) -> Tuple[Dict[Hashable, Any], List[Hashable]]:
+        """(有効期限内にあったキー → 値, 読み込みが必要なキーのリスト)。引いたキーは LRU の末尾に回す"""
+        now = time.monotonic() if now is None else now
+        hits: Dict[Hashable, Any] = {}
+        missing: List[Hashable] = []
+        with self._lock:
+            for key in keys:
+                hit = self._entries.get(key, _MISSING)
+                if hit is _MISSING or now - hit[0] > self.ttl:
+                    missing.append(key)
+                    continue
+                self._entries.move_to_end(key)
+                hits[key] = hit[1]
+        return hits, missing
+
+    def put_many(self, values: Mapping[Hashable, Any], now: Optional[float] = None) -> None:
+        """now には読み込みを始めた時刻を渡す（有効期限を読み込み開始から数える）"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (now, value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def put(self, key: Hashable, value: Any, now: Optional[float] = None) -> None:
+        self.put_many({key: value}, now)
+
+    def invalidate(self, keys: Iterable[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
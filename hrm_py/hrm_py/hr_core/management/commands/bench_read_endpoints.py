@@ -0,0 +1,111 @@
+# hr_core/management/commands/bench_read_endpoints.py
+"""
+朝の出勤ラッシュを想定し、ダッシュボードの読み取りAPIを同時に叩いて同期版と async 版を比べる。
+
+    uvicorn hrm_py.asgi:application --port 8000 &
+    python manage.py bench_read_endpoints --base-url http://127.0.0.1:8000 \
+        --username taro --password ****** --concurrency 200 --requests 3000
+
+1回の「ダッシュボード読み込み」は /hr/me・当日の /attendance/my・当月の /attendance/summary の3リクエスト。
+同期版（/api/...）と async 版（/api/async/...）を同じ並列数で交互に流し、
+スループット（req/s）とレイテンシ（p50/p95/p99）を表にする。サーバは別プロセスで起動しておくこと。
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from typing import Dict, List
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _paths(prefix: str, today: date) -> List[str]:
+    month_from = today.replace(day=1)
+    month_to = (month_from.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    return [
+        f"{prefix}/hr/me",
+        f"{prefix}/attendance/my?from={today.isoformat()}&to={today.isoformat()}",
+        f"{prefix}/attendance/summary?from={month_from.isoformat()}&to={month_to.isoformat()}",
+    ]
+
+
+def _pct(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+class Command(BaseCommand):
+    help = "読み取りAPIの同期版と async 版を同時接続の負荷で比較する（起動中のサーバに対して実行）"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+        parser.add_argument("--username", required=True)
+        parser.add_argument("--password", required=True)
+        parser.add_argument("--concurrency", type=int, default=100, help="同時に投げるリクエスト数")
+        parser.add_argument("--requests", type=int, default=1500, help="1ラウンドあたりの総リクエスト数")
+        parser.add_argument("--rounds", type=int, default=2, help="同期版/async 版を交互に何回流すか")
+        parser.add_argument("--date", help="対象日 YYYY-MM-DD（既定は今日）")
+
+    def handle(self, *args, **opts):
+        base = opts["base_url"].rstrip("/")
+        r = requests.post(f"{base}/api/auth/token/",
+                          json={"username": opts["username"], "password": opts["password"]}, timeout=10)
+        if r.status_code != 200:
+            raise CommandError(f"トークン取得に失敗しました: {r.status_code} {r.text[:200]}")
+        headers = {"Authorization": f"Bearer {r.json()['access']}"}
+        today = date.fromisoformat(opts["date"]) if opts["date"] else date.today()
+
+        variants = {"sync": _paths(f"{base}/api", today), "async": _paths(f"{base}/api/async", today)}
+        # 疎通確認と、dirty な日次サマリの再計算を先に済ませる
+        for name, paths in variants.items():
+            for url in paths:
+                resp = requests.get(url, headers=headers, timeout=30)
+                if resp.status_code != 200:
+                    raise CommandError(f"{name} {url} → {resp.status_code} {resp.text[:200]}")
+
+        results: Dict[str, List[dict]] = {name: [] for name in variants}
+        for _ in range(max(opts["rounds"], 1)):
+            for name, paths in variants.items():
+                results[name].append(self._run(paths, headers, opts["concurrency"], opts["requests"]))
+
+        self.stdout.write(
+            f"concurrency={opts['concurrency']} requests/round={opts['requests']} rounds={opts['rounds']}"
+        )
+        self.stdout.write(f"{'':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        for name, runs in results.items():
+            lat = sorted(x for run in runs for x in run["latencies"])
+            rps = statistics.mean(run["rps"] for run in runs)
+            errors = sum(run["errors"] for run in runs)
+            self.stdout.write(
+                f"{name:<6} {rps:>9,.0f} {_pct(lat, .50) * 1000:>9.1f} {_pct(lat, .95) * 1000:>9.1f} "
+                f"{_pct(lat, .99) * 1000:>9.1f} {errors:>7}"
+            )
+
+    @staticmethod
+    def _run(paths: List[str], headers: Dict[str, str], concurrency: int, total: int) -> dict:
+        local = threading.local()  # スレッドごとに keep-alive のセッションを持つ
+
+        def one(i: int):
+            session = getattr(local, "session", None)
+            if session is None:
+                session = local.session = requests.Session()
+                session.headers.update(headers)
+            t0 = time.perf_counter()
+            try:
+                ok = session.get(paths[i % len(paths)], timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - t0, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(one, range(total)))
+        elapsed = time.perf_counter() - started
+        return {
+            "rps": total / elapsed if elapsed else 0.0,
+            "latencies": [dt for dt, ok in outcomes if ok],
+            "errors": sum(1 for _, ok in outcomes if not ok),
+        }
@@ -0,0 +1,146 @@
+# hr_core/management/commands/bench_renderers.py
+"""
+応答のエンコード（レンダラー × 圧縮）の時間と転送バイト数を比べる。
+
+    python manage.py bench_renderers [--repeat 50] [--users 300]
+
+DB は使わず、実際のビューと同じ関数（シリアライザ・user_day_values / department_day_values・
+load_period_summaries と同じ形の行）でメモリ上に作った本文を
+  - JSON（DRF 標準の JSONRenderer / ORJSONRenderer）・MessagePack
+  - 圧縮なし / gzip / zstd（compression.py と同じレベル）
+でエンコードし、中央値の時間と本文のバイト数を表にする。
+対象の本文：
+  my_month     … /api/attendance/my の1か月分（1人・1日4打刻）
+  my_page      … /api/attendance/my のページ（HR_MAX_PAGE_SIZE 件＋next/previous）
+  summary_day  … /api/attendance/summary の1か月分（日次）
+  summary_year … /api/attendance/summary の1年分（日次）
+  summary_team … 部署 --users 人の1年分を月単位（granularity=month）
+  summary_team_day … 部署の1年分を日次（department=）
+"""
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta, timezone as dt_tz
+from typing import Any, Callable, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from hr_core.compression import GZIP_LEVEL, ZSTD_LEVEL, compress, zstandard
+from hr_core.models_attendance import AttendancePunch, DailyAttendanceSummary, PunchType
+from hr_core.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+from hr_core.serializers_attendance import AttendancePunchSerializer
+from hr_core.services_attendance import ROLLUP_FIELDS, period_end, period_start
+from hr_core.views_attendance import department_day_values, user_day_values
+from hr_core.work_calendar import CalendarSnapshot
+
+JST = dt_tz(timedelta(hours=9))
+MONTH = (date(2025, 10, 1), date(2025, 10, 31))
+YEAR = (date(2025, 1, 1), date(2025, 12, 31))
+
+
+def _days(dfrom: date, dto: date):
+    d = dfrom
+    while d <= dto:
+        yield d
+        d += timedelta(days=1)
+
+
+def _punches(dfrom: date, dto: date, rnd: random.Random) -> List[AttendancePunch]:
+    punches, pk = [], 1
+    for d in _days(dfrom, dto):
+        if d.weekday() >= 5:
+            continue
+        base = datetime(d.year, d.month, d.day, 9, tzinfo=JST)
+        for ptype, minutes in ((PunchType.IN, 0), (PunchType.BREAK_START, 180),
+                               (PunchType.BREAK_END, 240), (PunchType.OUT, 540 + rnd.randint(0, 150))):
+            punches.append(AttendancePunch(id=pk, user_id=1, work_date=d, punch_type=ptype, note="",
+                                           punched_at=base + timedelta(minutes=minutes, seconds=rnd.randint(0, 59))))
+            pk += 1
+    return punches
+
+
+def _daily_rows(dfrom: date, dto: date, rnd: random.Random) -> Dict[date, DailyAttendanceSummary]:
+    rows = {}
+    for d in _days(dfrom, dto):
+        if d.weekday() < 5:
+            work = 480 + rnd.randint(0, 150)
+            rows[d] = DailyAttendanceSummary(user_id=1, work_date=d, work_minutes=work, break_minutes=60,
+                                             overtime_minutes=max(work - 480, 0), notes=[])
+    return rows
+
+
+def _payloads(users: int) -> Dict[str, Any]:
+    rnd = random.Random(0)
+    cal = CalendarSnapshot([], getattr(settings, "HR_WEEKLY_HOLIDAYS", (5, 6)))
+    page_size = getattr(settings, "HR_MAX_PAGE_SIZE", 500)
+    year_punches = _punches(*YEAR, rnd)
+    team: List[Dict[str, Any]] = []
+    pstart = YEAR[0]
+    while pstart <= YEAR[1]:
+        pend = period_end("MONTH", pstart)
+        totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+        for _ in range(users):
+            for k in ("work_minutes", "break_minutes", "overtime_minutes"):
+                totals[k] += rnd.randint(0, 12000)
+        team.append({"date": pstart.isoformat(), "period_start": period_start("MONTH", pstart).isoformat(),
+                     "period_end": pend.isoformat(), **totals,
+                     "scheduled_days": cal.scheduled_days(pstart, pend), "holiday_work_minutes": 0})
+        pstart = pend + timedelta(days=1)
+    return {
+        "my_month": AttendancePunchSerializer(_punches(*MONTH, rnd), many=True).data,
+        "my_page": {"next": "http://localhost/api/attendance/my?cursor=" + "x" * 40, "previous": None,
+                    "results": AttendancePunchSerializer(year_punches[:page_size], many=True).data},
+        "summary_day": {"value": user_day_values(_daily_rows(*MONTH, rnd), *MONTH, cal)},
+        "summary_year": {"value": user_day_values(_daily_rows(*YEAR, rnd), *YEAR, cal)},
+        "summary_team": {"value": team, "granularity": "month"},
+        "summary_team_day": {"value": department_day_values(
+            {d: {"work_minutes": rnd.randint(0, 150000), "break_minutes": rnd.randint(0, 20000),
+                 "overtime_minutes": rnd.randint(0, 30000)} for d in _days(*YEAR)}, *YEAR, cal)},
+    }
+
+
+def _median_ms(fn: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    times, result = [], None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times), result
+
+
+class Command(BaseCommand):
+    help = "JSON（標準 / orjson）・MessagePack × 圧縮なし / gzip / zstd のエンコード時間とバイト数を比べる"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="1条件あたりの計測回数（中央値を出す）")
+        parser.add_argument("--users", type=int, default=300, help="summary_team の部署人数")
+
+    def handle(self, *args, **opts):
+        repeat = max(opts["repeat"], 1)
+        renderers = [("json (drf)", JSONRenderer())]
+        if orjson is not None:
+            renderers.append(("json (orjson)", ORJSONRenderer()))
+        if msgpack is not None:
+            renderers.append(("msgpack", MessagePackRenderer()))
+        encodings = ["gzip"] + (["zstd"] if zstandard is not None else [])
+        missing = [name for name, mod in (("orjson", orjson), ("msgpack", msgpack), ("zstandard", zstandard))
+                   if mod is None]
+        if missing:
+            self.stdout.write(f"未インストールのため省略: {', '.join(missing)}")
+        self.stdout.write(f"gzip level {GZIP_LEVEL} / zstd level {ZSTD_LEVEL}、各 {repeat} 回の中央値")
+
+        header = f"{'payload':<18}{'renderer':<15}{'render ms':>10}{'bytes':>10}"
+        for enc in encodings:
+            header += f"{enc + ' ms':>10}{enc + ' bytes':>12}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, data in _payloads(opts["users"]).items():
+            for label, renderer in renderers:
+                ms, body = _median_ms(lambda: renderer.render(data), repeat)
+                line = f"{name:<18}{label:<15}{ms:>10.3f}{len(body):>10,}"
+                for enc in encodings:
+                    cms, packed = _median_ms(lambda: compress(enc, body), repeat)
+                    line += f"{cms:>10.3f}{len(packed):>12,}"
+                self.stdout.write(line)
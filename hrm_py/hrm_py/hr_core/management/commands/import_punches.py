@@ -0,0 +1,192 @@
+# hr_core/management/commands/import_punches.py
+"""
+旧勤怠システムの打刻履歴を CSV/TSV から取り込む。
+
+    python manage.py import_punches punches.csv [--batch-size 2000] [--transaction-size 20000] [--resume]
+
+ファイルはヘッダ付きで、列は employee_code, punched_at, type, note（note は任意）。
+  - punched_at はタイムゾーン無しなら JST として解釈し UTC で保存する（打刻APIと同じ）
+  - 行はジェネレータで1行ずつ読み、bulk_create のチャンク単位で書くのでメモリはファイルサイズに依存しない
+  - --transaction-size 行ごとにコミットし、<file>.checkpoint に処理済み行数を書く。
+    失敗後は --resume でその続きから再開する（直前のチャンクは既存打刻と突き合わせて二重登録を防ぐ）
+  - 取り込んだ (社員, 日) の日次サマリは dirty にする（参照時に再計算）
+  - 履歴の取込なので状態遷移の検証はせず、取り込んだ社員の現在の勤務状態を最終打刻から作り直す
+"""
+import csv
+import json
+import os
+import time
+from datetime import datetime, timezone as dt_tz
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hr_core.models import AttendancePunch, EmployeeProfile, PunchType
+from hr_core.services_attendance import JST, mark_days_dirty, rebuild_attendance_states, to_local_date
+
+REQUIRED_COLUMNS = ("employee_code", "punched_at", "type")
+PUNCH_TYPES = {c[0] for c in PunchType.choices}
+
+
+def _read_rows(path: str, delimiter: str, encoding: str) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """(行番号, 行) を1行ずつ返す。行番号はヘッダを除いた 1 始まり"""
+    with open(path, newline="", encoding=encoding) as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        missing = [c for c in REQUIRED_COLUMNS if c not in (reader.fieldnames or [])]
+        if missing:
+            raise CommandError(f"ヘッダに {', '.join(missing)} がありません: {reader.fieldnames}")
+        for n, row in enumerate(reader, start=1):
+            yield n, row
+
+
+def _parse_punched_at(value: str) -> datetime:
+    dt = datetime.fromisoformat(value.strip().replace("/", "-"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=JST)
+    return dt.astimezone(dt_tz.utc)
+
+
+def _chunks(it, size):
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = "CSV/TSV の打刻履歴をストリーミングで一括登録する"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--delimiter", help="区切り文字（既定は拡張子 .tsv ならタブ、それ以外はカンマ）")
+        parser.add_argument("--encoding", default="utf-8-sig")
+        parser.add_argument("--batch-size", type=int, default=2000, help="bulk_create 1回あたりの行数")
+        parser.add_argument("--transaction-size", type=int, default=20000, help="1トランザクション（＝チェックポイント）あたりの行数")
+        parser.add_argument("--resume", action="store_true", help="チェックポイントの続きから再開する")
+        parser.add_argument("--rejects", help="取り込めなかった行を書き出すCSV")
+        parser.add_argument("--dry-run", action="store_true", help="検証のみ行い、登録しない")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"ファイルがありません: {path}")
+        delimiter = opts["delimiter"] or ("\t" if path.lower().endswith(".tsv") else ",")
+        delimiter = delimiter.encode().decode("unicode_escape")  # "\t" の指定を許す
+        batch_size = max(opts["batch_size"], 1)
+        tx_size = max(opts["transaction_size"], batch_size)
+        checkpoint_path = path + ".checkpoint"
+
+        done = 0
+        if opts["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding="utf-8") as f:
+                done = int(json.load(f)["rows"])
+            self.stdout.write(f"チェックポイントから再開: {done:,} 行目まで処理済み")
+
+        # 社員コード → user_id（社員数に比例、ファイルサイズには依存しない）
+        user_by_code: Dict[str, int] = dict(
+            EmployeeProfile.objects.exclude(employee_code="").values_list("employee_code", "user_id")
+        )
+
+        rejects_file = open(opts["rejects"], "a", newline="", encoding="utf-8") if opts["rejects"] else None
+        rejects = csv.writer(rejects_file) if rejects_file else None
+
+        rows = _read_rows(path, delimiter, opts["encoding"])
+        if done:
+            for _ in islice(rows, done):
+                pass
+
+        stats = {"read": 0, "inserted": 0, "valid": 0, "skipped": 0, "rejected": 0}
+        # --dry-run では登録しないので、登録できる行は「検証OK」として数える
+        counted, label = ("valid", "検証OK") if opts["dry_run"] else ("inserted", "登録")
+        started = time.perf_counter()
+        dedupe_next = bool(done)  # 前回コミット後・チェックポイント前に落ちた分を二重登録しない
+        try:
+            for tx_rows in _chunks(rows, tx_size):
+                objs, keys = self._build(tx_rows, user_by_code, rejects, stats)
+                if not opts["dry_run"]:
+                    with transaction.atomic():
+                        if dedupe_next:
+                            objs = self._drop_existing(objs, stats)
+                        for chunk in _chunks(iter(objs), batch_size):
+                            AttendancePunch.objects.bulk_create(chunk)
+                        mark_days_dirty(keys)
+                        rebuild_attendance_states({uid for uid, _ in keys})
+                    self._write_checkpoint(checkpoint_path, tx_rows[-1][0])
+                stats[counted] += len(objs)
+                dedupe_next = False
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{tx_rows[-1][0]:>12,} 行目  {label} {stats[counted]:,}  除外 {stats['rejected']:,}  "
+                    f"{stats['read'] / elapsed if elapsed else 0:,.0f} rows/sec"
+                )
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        elapsed = time.perf_counter() - started
+        if not opts["dry_run"] and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f"完了: 読込 {stats['read']:,} 行 / {label} {stats[counted]:,} / 既存 {stats['skipped']:,} / "
+            f"除外 {stats['rejected']:,}  {elapsed:.1f}s ({stats['read'] / elapsed if elapsed else 0:,.0f} rows/sec)"
+            + ("（--dry-run のため登録していません）" if opts["dry_run"] else "")
+        ))
+
+    @staticmethod
+    def _build(tx_rows, user_by_code, rejects, stats) -> Tuple[List[AttendancePunch], Set[Tuple[int, object]]]:
+        objs: List[AttendancePunch] = []
+        keys = set()
+        for n, row in tx_rows:
+            stats["read"] += 1
+            error: Optional[str] = None
+            uid = user_by_code.get((row.get("employee_code") or "").strip())
+            ptype = (row.get("type") or "").strip().upper()
+            punched_at = None
+            if uid is None:
+                error = "unknown employee_code"
+            elif ptype not in PUNCH_TYPES:
+                error = "invalid type"
+            else:
+                try:
+                    punched_at = _parse_punched_at(row.get("punched_at") or "")
+                except ValueError:
+                    error = "invalid punched_at"
+            if error:
+                stats["rejected"] += 1
+                if rejects:
+                    rejects.writerow([n, error, *[row.get(c, "") for c in REQUIRED_COLUMNS]])
+                continue
+            work_date = to_local_date(punched_at)
+            objs.append(AttendancePunch(
+                user_id=uid,
+                punched_at=punched_at,
+                punch_type=ptype,
+                note=(row.get("note") or "")[:255],
+                work_date=work_date,  # bulk_create は save() を通らないので明示する
+            ))
+            keys.add((uid, work_date))
+        return objs, keys
+
+    @staticmethod
+    def _drop_existing(objs: List[AttendancePunch], stats) -> List[AttendancePunch]:
+        if not objs:
+            return objs
+        existing = set(
+            AttendancePunch.objects
+            .filter(user_id__in={o.user_id for o in objs}, work_date__in={o.work_date for o in objs})
+            .values_list("user_id", "punched_at", "punch_type")
+        )
+        kept = [o for o in objs if (o.user_id, o.punched_at, o.punch_type) not in existing]
+        stats["skipped"] += len(objs) - len(kept)
+        return kept
+
+    @staticmethod
+    def _write_checkpoint(path: str, rows: int) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"rows": rows}, f)
+        os.replace(tmp, path)
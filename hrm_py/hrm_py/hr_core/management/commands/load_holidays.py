@@ -0,0 +1,71 @@
+# hr_core/management/commands/load_holidays.py
+"""
+国民の祝日を勤務カレンダー（WorkCalendar）に事前登録する（jpholiday を使う）。
+
+    python manage.py load_holidays [--from-year 2025] [--to-year 2027] [--dry-run]
+
+  - 指定年の祝日を NATIONAL_HOLIDAY として追加・名称更新し、jpholiday に無くなった祝日行は消す
+  - 会社休日・振替出勤日（COMPANY_*）の行がある日は上書きしない（会社の設定を優先）
+  - 一括更新なのでシグナルは飛ばない。このプロセスの索引は最後に捨て、他プロセスは TTL で反映される
+"""
+from datetime import date
+from typing import Dict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from hr_core.models import CalendarKind, WorkCalendar
+from hr_core.work_calendar import work_calendar
+
+try:
+    import jpholiday  # type: ignore
+except Exception:
+    jpholiday = None
+
+
+class Command(BaseCommand):
+    help = "国民の祝日を勤務カレンダーに登録する"
+
+    def add_arguments(self, parser):
+        this_year = date.today().year
+        parser.add_argument("--from-year", type=int, default=this_year)
+        parser.add_argument("--to-year", type=int, default=this_year + 1)
+        parser.add_argument("--dry-run", action="store_true", help="件数の表示のみ行い、登録しない")
+
+    def handle(self, *args, **opts):
+        if jpholiday is None:
+            raise CommandError("jpholiday がインストールされていません（pip install jpholiday）")
+        y1, y2 = opts["from_year"], opts["to_year"]
+        if y1 > y2:
+            raise CommandError("--from-year は --to-year 以前を指定してください")
+        dfrom, dto = date(y1, 1, 1), date(y2, 12, 31)
+
+        holidays: Dict[date, str] = {}
+        for year in range(y1, y2 + 1):
+            for d, name in jpholiday.year_holidays(year):
+                holidays[d] = name
+
+        existing = {
+            row.date: row
+            for row in WorkCalendar.objects.filter(date__gte=dfrom, date__lte=dto)
+        }
+        to_create, to_update = [], []
+        for d, name in sorted(holidays.items()):
+            row = existing.get(d)
+            if row is None:
+                to_create.append(WorkCalendar(date=d, kind=CalendarKind.NATIONAL_HOLIDAY, name=name))
+            elif row.kind == CalendarKind.NATIONAL_HOLIDAY and row.name != name:
+                row.name = name
+                to_update.append(row)
+        stale = [row.pk for d, row in existing.items()
+                 if row.kind == CalendarKind.NATIONAL_HOLIDAY and d not in holidays]
+
+        self.stdout.write(f"{y1}〜{y2}年: 追加 {len(to_create)} / 名称更新 {len(to_update)} / 削除 {len(stale)}")
+        if opts["dry_run"]:
+            return
+        with transaction.atomic():
+            WorkCalendar.objects.bulk_create(to_create)
+            WorkCalendar.objects.bulk_update(to_update, ["name"])
+            WorkCalendar.objects.filter(pk__in=stale).delete()
+        work_calendar.clear()
+        self.stdout.write(self.style.SUCCESS("完了"))
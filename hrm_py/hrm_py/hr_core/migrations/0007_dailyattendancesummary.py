@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from zoneinfo import ZoneInfo
+
+
+def backfill_dirty_summaries(apps, schema_editor):
+    """既存の打刻がある (user, JST暦日) に dirty なサマリ行を作る（中身は初回参照時に再計算）"""
+    AttendancePunch = apps.get_model("hr_core", "AttendancePunch")
+    DailyAttendanceSummary = apps.get_model("hr_core", "DailyAttendanceSummary")
+    jst = ZoneInfo("Asia/Tokyo")
+
+    def flush(keys):
+        DailyAttendanceSummary.objects.bulk_create(
+            [DailyAttendanceSummary(user_id=uid, work_date=d, is_dirty=True) for uid, d in keys],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+    # 打刻履歴全体のキーをメモリに持たないよう、1000キーごとに書く（チャンクをまたぐ重複は ignore_conflicts で捨てる）
+    keys = set()
+    rows = AttendancePunch.objects.order_by("user_id", "punched_at").values_list("user_id", "punched_at")
+    for user_id, punched_at in rows.iterator(chunk_size=2000):
+        keys.add((user_id, punched_at.astimezone(jst).date()))
+        if len(keys) >= 1000:
+            flush(keys)
+            keys.clear()
+    if keys:
+        flush(keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0006_alter_department_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_date', models.DateField()),
+                ('work_minutes', models.PositiveIntegerField(default=0)),
+                ('break_minutes', models.PositiveIntegerField(default=0)),
+                ('overtime_minutes', models.PositiveIntegerField(default=0)),
+                ('first_in', models.DateTimeField(blank=True, null=True)),
+                ('last_out', models.DateTimeField(blank=True, null=True)),
+                ('punch_count', models.PositiveIntegerField(default=0)),
+                ('notes', models.JSONField(blank=True, default=list)),
+                ('is_dirty', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_attendance_summaries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['work_date'],
+                'indexes': [models.Index(fields=['work_date', 'user'], name='hr_core_dai_work_da_0f057a_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'work_date'), name='uniq_daily_summary_user_date')],
+            },
+        ),
+        migrations.RunPython(backfill_dirty_summaries, migrations.RunPython.noop),
+    ]
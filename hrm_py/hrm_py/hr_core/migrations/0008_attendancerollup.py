@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:31
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    """既存の日次サマリから部署と週/月ロールアップを作り直す"""
+    DailyAttendanceSummary = apps.get_model("hr_core", "DailyAttendanceSummary")
+    EmployeeProfile = apps.get_model("hr_core", "EmployeeProfile")
+    AttendanceRollup = apps.get_model("hr_core", "AttendanceRollup")
+
+    dept_by_user = dict(EmployeeProfile.objects.values_list("user_id", "department_id"))
+    totals = defaultdict(lambda: [0, 0, 0, 0])
+    for row in DailyAttendanceSummary.objects.iterator():
+        dept_id = dept_by_user.get(row.user_id)
+        if row.department_id != dept_id:
+            row.department_id = dept_id
+            row.save(update_fields=["department"])
+        starts = (("WEEK", row.work_date - timedelta(days=row.work_date.weekday())),
+                  ("MONTH", row.work_date.replace(day=1)))
+        for period, pstart in starts:
+            owners = [("user", row.user_id)] + ([("department", dept_id)] if dept_id else [])
+            for owner in owners:
+                t = totals[(period, pstart) + owner]
+                t[0] += row.work_minutes
+                t[1] += row.break_minutes
+                t[2] += row.overtime_minutes
+                t[3] += 1 if row.work_minutes > 0 else 0
+
+    AttendanceRollup.objects.bulk_create(
+        [
+            AttendanceRollup(
+                period=period, period_start=pstart, **{owner + "_id": owner_id},
+                work_minutes=t[0], break_minutes=t[1], overtime_minutes=t[2], working_days=t[3],
+            )
+            for (period, pstart, owner, owner_id), t in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0007_dailyattendancesummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailyattendancesummary',
+            name='department',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hr_core.department'),
+        ),
+        migrations.CreateModel(
+            name='AttendanceRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('WEEK', '週'), ('MONTH', '月')], max_length=8)),
+                ('period_start', models.DateField()),
+                ('work_minutes', models.IntegerField(default=0)),
+                ('break_minutes', models.IntegerField(default=0)),
+                ('overtime_minutes', models.IntegerField(default=0)),
+                ('working_days', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to='hr_core.department')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period_start'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('user__isnull', False)), fields=('user', 'period', 'period_start'), name='uniq_rollup_user_period'), models.UniqueConstraint(condition=models.Q(('department__isnull', False)), fields=('department', 'period', 'period_start'), name='uniq_rollup_department_period')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
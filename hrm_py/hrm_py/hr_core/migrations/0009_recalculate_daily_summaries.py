@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+from django.db import migrations
+
+
+def mark_summaries_dirty(apps, schema_editor):
+    """計算カーネル変更（休憩分の集計・所定労働時間の反映）に合わせて全サマリを再計算対象にする"""
+    DailyAttendanceSummary = apps.get_model("hr_core", "DailyAttendanceSummary")
+    DailyAttendanceSummary.objects.filter(is_dirty=False).update(is_dirty=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0008_attendancerollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_summaries_dirty, migrations.RunPython.noop),
+    ]
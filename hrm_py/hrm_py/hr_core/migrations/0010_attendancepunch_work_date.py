@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:42
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+from zoneinfo import ZoneInfo
+
+
+def backfill_work_date(apps, schema_editor):
+    """既存打刻の work_date を punched_at の JST 暦日で埋める（同じ日付の行をまとめて UPDATE）"""
+    AttendancePunch = apps.get_model("hr_core", "AttendancePunch")
+    jst = ZoneInfo("Asia/Tokyo")
+
+    ids_by_date = defaultdict(list)
+    for pk, punched_at in (AttendancePunch.objects
+                           .filter(work_date__isnull=True)
+                           .values_list("id", "punched_at")
+                           .iterator()):
+        ids_by_date[punched_at.astimezone(jst).date()].append(pk)
+    for work_date, ids in ids_by_date.items():
+        for i in range(0, len(ids), 500):
+            AttendancePunch.objects.filter(pk__in=ids[i:i + 500]).update(work_date=work_date)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0009_recalculate_daily_summaries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancepunch',
+            name='work_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_work_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='attendancepunch',
+            name='work_date',
+            field=models.DateField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='attendancepunch',
+            index=models.Index(fields=['user', 'work_date'], name='hr_core_att_user_id_4de559_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancepunch',
+            index=models.Index(fields=['work_date', 'user'], name='hr_core_att_work_da_e90f8e_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0010_attendancepunch_work_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendancepunch',
+            name='hr_core_att_user_id_509fcc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendancepunch',
+            index=models.Index(fields=['user', 'punched_at', 'id'], name='hr_core_att_user_id_456673_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['created_at', 'id'], name='hr_core_lea_created_ff7c4c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='hr_core_lea_status_4ca429_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverequest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='hr_core_lea_user_id_4f1ada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtimerequest',
+            index=models.Index(fields=['created_at', 'id'], name='hr_core_ove_created_fcdd55_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtimerequest',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='hr_core_ove_status_9b9016_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='overtimerequest',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='hr_core_ove_user_id_7a36cb_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+_STATE_AFTER = {"IN": "WORKING", "BREAK_START": "ON_BREAK", "BREAK_END": "WORKING", "OUT": "OFF"}
+
+
+def backfill_states(apps, schema_editor):
+    """既存打刻から社員ごとの現在の勤務状態を作る（最終打刻の種別で決まる）"""
+    AttendancePunch = apps.get_model("hr_core", "AttendancePunch")
+    AttendanceState = apps.get_model("hr_core", "AttendanceState")
+
+    last = {}     # user_id → (punch_type, punched_at)
+    last_in = {}  # user_id → 最後の出勤の work_date
+    for uid, ptype, at, work_date in (AttendancePunch.objects
+                                      .order_by("user_id", "punched_at", "id")
+                                      .values_list("user_id", "punch_type", "punched_at", "work_date")
+                                      .iterator(chunk_size=2000)):
+        last[uid] = (ptype, at)
+        if ptype == "IN":
+            last_in[uid] = work_date
+
+    states = []
+    for uid, (ptype, at) in last.items():
+        state = _STATE_AFTER.get(ptype, "OFF")
+        states.append(AttendanceState(
+            user_id=uid, state=state, since=at,
+            open_work_date=last_in.get(uid) if state != "OFF" else None,
+        ))
+    AttendanceState.objects.bulk_create(states, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0011_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='attendance_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('state', models.CharField(choices=[('OFF', '勤務外'), ('WORKING', '勤務中'), ('ON_BREAK', '休憩中')], default='OFF', max_length=16)),
+                ('since', models.DateTimeField(blank=True, null=True)),
+                ('open_work_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['state', 'open_work_date'], name='hr_core_att_state_875b4f_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# 集計キャッシュ（settings.HR_SUMMARY_CACHE）が DatabaseCache のとき、そのテーブルを作る
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # createcachetable は既存のテーブルを作り直さない（DatabaseCache 以外の別名は無視される）
+    call_command("createcachetable", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0013_employeeprofile_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
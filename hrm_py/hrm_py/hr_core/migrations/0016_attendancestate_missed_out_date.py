@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr_core', '0015_workcalendar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancestate',
+            name='missed_out_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
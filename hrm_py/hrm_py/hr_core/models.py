@@ -21,6 +21,20 @@ from .models_requests import (
 )
 
 
+# --- 勤怠(打刻/日次集計)系モデル ---------------------------------------------
+from .models_attendance import (
+    AttendancePunch,
+    AttendanceRollup,
+    AttendanceState,
+    CalendarKind,
+    DailyAttendanceSummary,
+    PunchType,
+    RollupPeriod,
+    WorkCalendar,
+    WorkState,
+)
+
+
 # --- 公開シンボル --------------------------------------------------------------
 __all__ = [
     # HR
@@ -34,6 +48,17 @@ __all__ = [
     "LeaveRequest",
     "RequestStatus",
     "LeaveType",
+
+    # Attendance
+    "AttendancePunch",
+    "AttendanceRollup",
+    "AttendanceState",
+    "CalendarKind",
+    "DailyAttendanceSummary",
+    "PunchType",
+    "RollupPeriod",
+    "WorkCalendar",
+    "WorkState",
 ]
 
 
@@ -1,8 +1,12 @@
 # hr_core/models_attendance.py
+from zoneinfo import ZoneInfo
+
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
 
+JST = ZoneInfo("Asia/Tokyo")
+
 class PunchType(models.TextChoices):
     IN = "IN", "出勤"
     OUT = "OUT", "退勤"
@@ -14,12 +18,144 @@ class AttendancePunch(models.Model):
     punched_at = models.DateTimeField(default=timezone.now, db_index=True)
     punch_type = models.CharField(max_length=16, choices=PunchType.choices)
     note = models.CharField(max_length=255, blank=True, default="")
+    work_date = models.DateField(blank=True)  # 集計用の日付（JST基準）
 
     class Meta:
         indexes = [
-            models.Index(fields=["user", "punched_at"]),
+            models.Index(fields=["user", "punched_at", "id"]),  # /my のキーセットページング用
+            models.Index(fields=["user", "work_date"]),
+            models.Index(fields=["work_date", "user"]),  # 全社・部署横断の日付スキャン用
         ]
         ordering = ["punched_at"]
 
+    def save(self, *args, **kwargs):
+        # work_date が未設定なら、JSTのカレンダー日付で自動設定
+        if not self.work_date:
+            self.work_date = timezone.localtime(self.punched_at, JST).date()
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user_id} {self.punch_type} {self.punched_at.isoformat()}"
+
+
+class DailyAttendanceSummary(models.Model):
+    """
+    ユーザー×JST暦日の事前集計。打刻登録時にその日だけを再計算して更新する。
+    is_dirty=True の行は集計APIの参照時に生打刻から再計算される。
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="daily_attendance_summaries")
+    work_date = models.DateField()
+    # 最終再計算時点の所属部署（部署別ロールアップの加減算先）
+    department = models.ForeignKey("hr_core.Department", on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name="+")
+    work_minutes = models.PositiveIntegerField(default=0)
+    break_minutes = models.PositiveIntegerField(default=0)
+    overtime_minutes = models.PositiveIntegerField(default=0)
+    first_in = models.DateTimeField(null=True, blank=True)
+    last_out = models.DateTimeField(null=True, blank=True)
+    punch_count = models.PositiveIntegerField(default=0)
+    notes = models.JSONField(default=list, blank=True)
+    is_dirty = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "work_date"], name="uniq_daily_summary_user_date"),
+        ]
+        indexes = [
+            models.Index(fields=["work_date", "user"]),
+        ]
+        ordering = ["work_date"]
+
+    def __str__(self):
+        return f"{self.user_id} {self.work_date} work={self.work_minutes}"
+
+
+class RollupPeriod(models.TextChoices):
+    WEEK = "WEEK", "週"
+    MONTH = "MONTH", "月"
+
+
+class AttendanceRollup(models.Model):
+    """
+    週（月曜始まり）/月単位のロールアップ。user 別行と department 別行の2種類を持つ。
+    日次サマリの再計算時に差分（新 - 旧）を加減算して維持する。
+    """
+    period = models.CharField(max_length=8, choices=RollupPeriod.choices)
+    period_start = models.DateField()
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+                             related_name="attendance_rollups")
+    department = models.ForeignKey("hr_core.Department", on_delete=models.CASCADE, null=True, blank=True,
+                                   related_name="attendance_rollups")
+    work_minutes = models.IntegerField(default=0)
+    break_minutes = models.IntegerField(default=0)
+    overtime_minutes = models.IntegerField(default=0)
+    working_days = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "period", "period_start"],
+                                    condition=models.Q(user__isnull=False),
+                                    name="uniq_rollup_user_period"),
+            models.UniqueConstraint(fields=["department", "period", "period_start"],
+                                    condition=models.Q(department__isnull=False),
+                                    name="uniq_rollup_department_period"),
+        ]
+        ordering = ["period_start"]
+
+    def __str__(self):
+        owner = f"user={self.user_id}" if self.user_id else f"dept={self.department_id}"
+        return f"{self.period} {self.period_start} {owner} work={self.work_minutes}"
+
+
+class WorkState(models.TextChoices):
+    OFF = "OFF", "勤務外"
+    WORKING = "WORKING", "勤務中"
+    ON_BREAK = "ON_BREAK", "休憩中"
+
+
+class AttendanceState(models.Model):
+    """
+    社員ごとの現在の勤務状態（1人1行）。打刻と同じトランザクションで select_for_update して更新する。
+    打刻の妥当性チェック（出勤の二重打刻など）・勤務中の人数・退勤漏れの検出は、打刻を遡らずこの行だけで判定する。
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True,
+                                related_name="attendance_state")
+    state = models.CharField(max_length=16, choices=WorkState.choices, default=WorkState.OFF)
+    since = models.DateTimeField(null=True, blank=True)  # 現在の状態になった打刻の時刻（＝最終打刻）
+    open_work_date = models.DateField(null=True, blank=True)  # 勤務中/休憩中のとき、その勤務の出勤日（JST）
+    # 退勤漏れのまま翌日以降に打刻したため勤務外に戻した勤務の出勤日（HR の打刻修正で消える）
+    missed_out_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["state", "open_work_date"]),  # 勤務中の人数・退勤漏れの検出用
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.state} since={self.since.isoformat() if self.since else '-'}"
+
+
+class CalendarKind(models.TextChoices):
+    NATIONAL_HOLIDAY = "NATIONAL_HOLIDAY", "国民の祝日"
+    COMPANY_HOLIDAY = "COMPANY_HOLIDAY", "会社休日"      # 年末年始・夏季休業など
+    COMPANY_WORKDAY = "COMPANY_WORKDAY", "会社出勤日"    # 土日・祝日の振替出勤
+
+
+class WorkCalendar(models.Model):
+    """
+    勤務カレンダーの例外日（1日1行）。ここに無い日は HR_WEEKLY_HOLIDAYS（既定は土日）以外が出勤日。
+    国民の祝日は load_holidays コマンドで事前に取り込む。集計からは work_calendar.py の索引で引く。
+    """
+    date = models.DateField(unique=True)
+    kind = models.CharField(max_length=20, choices=CalendarKind.choices)
+    name = models.CharField(max_length=64, blank=True, default="")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date.isoformat()} {self.kind} {self.name}"
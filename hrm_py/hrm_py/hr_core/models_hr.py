@@ -29,6 +29,7 @@ class EmployeeProfile(models.Model):
     base_hours_per_day = models.FloatField(default=8.0)
     status = models.CharField(max_length=32, default="ACTIVE")
     is_manager = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)  # 集計APIの ETag（conditional.py）に使う
 
     def __str__(self):
         return f"{self.user.username} ({self.employee_code or '-'})"
@@ -23,6 +23,12 @@ class OvertimeRequest(models.Model):
     class Meta:
         db_table = "hr_core_overtime_request"
         ordering = ("-created_at",)
+        # キーセットページング（pagination.RequestPagination）用：(created_at, id) で並べて絞る
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["status", "created_at", "id"]),
+            models.Index(fields=["user", "created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"[{self.get_status_display()}] {self.user} {self.start_datetime:%Y-%m-%d %H:%M}→{self.end_datetime:%H:%M}"
@@ -48,6 +54,12 @@ class LeaveRequest(models.Model):
     class Meta:
         db_table = "hr_core_leave_request"
         ordering = ("-created_at",)
+        # キーセットページング（pagination.RequestPagination）用：(created_at, id) で並べて絞る
+        indexes = [
+            models.Index(fields=["created_at", "id"]),
+            models.Index(fields=["status", "created_at", "id"]),
+            models.Index(fields=["user", "created_at", "id"]),
+        ]
 
     def __str__(self):
         return f"[{self.get_status_display()}] {self.user} {self.date_from:%Y-%m-%d}〜{self.date_to:%Y-%m-%d}"
@@ -0,0 +1,150 @@
+# hr_core/pagination.py
+"""
+キーセット（カーソル）ページネーション。
+
+    GET /api/requests/overtime/?status=PENDING&page_size=50
+    → {"next": "...?cursor=xxx", "previous": null, "results": [...]}
+
+cursor / page_size を付けたときだけ分割する（付けなければ従来どおり全件の配列。is_requested）。
+
+並び順のキー（例: created_at）＋ id の組で「前ページの最後の行より後ろ」を WHERE で絞るので、
+OFFSET のように読み飛ばす行が増えず、COUNT(*) も発行しない。
+テーブルが大きくなっても1ページのコストは page_size 行分で一定（(キー, id) のインデックス前提）。
+DRF 標準の CursorPagination はキーが同値の行を OFFSET で数えるため、同時刻の行が多いと遅くなる。
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    ordering: Sequence[str] = ("-created_at", "-id")  # (キー, タイブレーク)。どちらも同じ向き
+    page_size: int = getattr(settings, "HR_PAGE_SIZE", 50)
+    max_page_size: int = getattr(settings, "HR_MAX_PAGE_SIZE", 500)
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "カーソルが不正です"
+
+    def is_requested(self, params) -> bool:
+        """クエリに cursor か page_size があるか（無ければ呼び出し側は分割せずに全件を返す）"""
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None) -> Optional[List]:
+        """cursor / page_size が無ければ None（ListModelMixin は分割せずに全件を返す）"""
+        if not self.is_requested(request.query_params):
+            return None
+        qs, size, position, reverse = self._page_query(queryset, request)
+        return self._finish(list(qs[:size + 1]), size, position, reverse)
+
+    async def apaginate_queryset(self, queryset, request, view=None) -> List:
+        """paginate_queryset の async 版（async ビュー用）"""
+        qs, size, position, reverse = self._page_query(queryset, request)
+        return self._finish([row async for row in qs[:size + 1]], size, position, reverse)
+
+    def _page_query(self, queryset, request):
+        self.request = request
+        size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        key, tie = (f.lstrip("-") for f in self.ordering)
+        self._key, self._tie = key, tie
+        descending = self.ordering[0].startswith("-")
+        # previous へ戻るときは逆向きに読んでから並べ直す
+        read_desc = descending != reverse
+        sign = "-" if read_desc else ""
+        qs = queryset.order_by(f"{sign}{key}", f"{sign}{tie}")
+        if position is not None:
+            value, pk = position
+            try:
+                # カーソルの値をキーの型に戻す（改ざんされた値でクエリが 500 にならないように）
+                value = queryset.model._meta.get_field(key).to_python(value)
+            except (ValidationError, TypeError, ValueError):
+                raise NotFound(self.invalid_cursor_message)
+            op = "lt" if read_desc else "gt"
+            qs = qs.filter(Q(**{f"{key}__{op}": value}) | Q(**{key: value, f"{tie}__{op}": pk}))
+        return qs, size, position, reverse
+
+    def _finish(self, rows: List, size: int, position, reverse: bool) -> List:
+        # 1件多く読んで次ページの有無を判定（COUNT しない）
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_page_size(self, request) -> int:
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                return max(1, min(int(raw), self.max_page_size))
+            except ValueError:
+                pass
+        return self.page_size
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self._link(self.page[0], reverse=True)
+
+    # ---- カーソルのエンコード ----
+    def _position_of(self, row) -> Tuple[str, int]:
+        get = row.get if isinstance(row, dict) else lambda f: getattr(row, f)
+        value = get(self._key)
+        return (value.isoformat() if hasattr(value, "isoformat") else value), get(self._tie)
+
+    def _link(self, row, reverse: bool) -> str:
+        value, pk = self._position_of(row)
+        raw = json.dumps([value, pk, 1 if reverse else 0], separators=(",", ":"))
+        token = base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request) -> Tuple[Optional[Tuple[str, int]], bool]:
+        """((キーの値, id) or None, 逆向きか) を返す"""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode("utf-8")
+            value, pk, reverse = json.loads(raw)
+            return (value, int(pk)), bool(reverse)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class RequestPagination(KeysetPagination):
+    """残業・休暇申請：新しい順（created_at, id）"""
+    ordering = ("-created_at", "-id")
+
+
+class PunchPagination(KeysetPagination):
+    """打刻：古い順（punched_at, id）"""
+    ordering = ("punched_at", "id")
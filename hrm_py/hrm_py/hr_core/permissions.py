@@ -1,6 +1,8 @@
 # hr_core/permissions.py
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .roles import roles_for_user
+
 class IsHrAdminOrReadOnly(BasePermission):
     """
     GET系は認証ユーザーなら可／書き込みは HR 管理者のみ（is_staff または HR_ADMIN グループ）。
@@ -11,7 +13,7 @@ class IsHrAdminOrReadOnly(BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        return bool(user.is_staff or user.groups.filter(name="HR_ADMIN").exists())
+        return roles_for_user(user).is_hr
 
 class IsHrAdminOrSelf(BasePermission):
     """
@@ -21,7 +23,7 @@ class IsHrAdminOrSelf(BasePermission):
         user = request.user
         if not user or not user.is_authenticated:
             return False
-        if user.is_staff or user.groups.filter(name="HR_ADMIN").exists():
+        if roles_for_user(user).is_hr:
             return True
         if request.method in SAFE_METHODS:
             return obj.user_id == user.id
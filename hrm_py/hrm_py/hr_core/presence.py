@@ -0,0 +1,186 @@
+# hr_core/presence.py
+"""
+在席状況（勤務中／休憩中／勤務外）のスナップショットと、打刻イベントのプロセス内配信。
+
+  - snapshot(): 部署の社員を AttendanceState と突き合わせて状態別に返す（打刻は読まない）
+  - broker: SSE（views_presence.py）の購読者へ打刻による状態変化を配る
+      * 同じプロセスでの打刻は services_attendance からコミット直後に publish される
+      * 他プロセス（別ワーカー）での打刻は、イベントループごとに1つのポーラーが
+        AttendanceState.updated_at を HR_PRESENCE_POLL_SECONDS 間隔で見て拾う
+        （購読者が何人いてもクエリは1ループ1回）。状態行は最新の状態しか持たないため、
+        1周期内に同じ社員が複数回打刻すると最後の状態だけが届く
+    同じ (user, state, since) のイベントは一度しか送らない。
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .directory import directory
+from .models_attendance import JST, AttendanceState, WorkState
+from .models_hr import EmployeeProfile
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # REST_FRAMEWORK["DATETIME_FORMAT"] と揃える
+INACTIVE_STATUSES = ("RETIRED", "INACTIVE")
+
+
+def _fmt_dt(dt: Optional[datetime]) -> Optional[str]:
+    return timezone.localtime(dt, JST).strftime(DATETIME_FORMAT) if dt else None
+
+
+def state_event(user_id: int, department_id: Optional[int], state: str,
+                since: Optional[datetime], open_work_date=None) -> Dict[str, object]:
+    return {
+        "user_id": user_id,
+        "department_id": department_id,
+        "state": state,
+        "since": _fmt_dt(since),
+        "open_work_date": open_work_date.isoformat() if open_work_date else None,
+    }
+
+
+def events_for_states(states: Iterable[AttendanceState]) -> List[Dict[str, object]]:
+    """AttendanceState → 配信用イベント（部署は社員ディレクトリから引く）"""
+    states = list(states)
+    entries = directory.get_many(s.user_id for s in states)
+    return [
+        state_event(s.user_id, entries[s.user_id].department_id if s.user_id in entries else None,
+                    s.state, s.since, s.open_work_date)
+        for s in states
+    ]
+
+
+async def snapshot(department_id: Optional[int]) -> Dict[str, object]:
+    """部署（None なら全社）の在籍社員を状態別に返す。状態行が無い社員は勤務外"""
+    qs = EmployeeProfile.objects.exclude(status__in=INACTIVE_STATUSES)
+    if department_id is not None:
+        qs = qs.filter(department_id=department_id)
+    rows = qs.order_by("employee_code", "user_id").values_list(
+        "user_id", "employee_code", "user__username", "user__last_name", "user__first_name",
+        "department_id", "user__attendance_state__state", "user__attendance_state__since",
+        "user__attendance_state__open_work_date",
+    )
+    members: Dict[str, List[Dict[str, object]]] = {s.value: [] for s in WorkState}
+    async for uid, code, username, last, first, dept_id, state, since, open_date in rows:
+        members[state or WorkState.OFF].append({
+            "user_id": uid,
+            "employee_code": code,
+            "name": f"{last} {first}".strip() or username,
+            "department_id": dept_id,
+            "since": _fmt_dt(since),
+            "open_work_date": open_date.isoformat() if open_date else None,
+        })
+    return {
+        "department": department_id,
+        "counts": {k: len(v) for k, v in members.items()},
+        "members": members,
+        "as_of": _fmt_dt(timezone.now()),
+    }
+
+
+class Subscription:
+    """SSE 接続1本分の受信キュー。department_id=None は全社"""
+
+    def __init__(self, department_id: Optional[int], loop: asyncio.AbstractEventLoop, maxsize: int):
+        self.department_id = department_id
+        self.loop = loop
+        self.queue: "asyncio.Queue[Dict[str, object]]" = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False  # 読み出しが追いつかずイベントを落とした（クライアントに再接続させる）
+
+    def wants(self, event: Dict[str, object]) -> bool:
+        return self.department_id is None or event.get("department_id") == self.department_id
+
+    def _put(self, event: Dict[str, object]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class PresenceBroker:
+    def __init__(self, poll_interval: float = 2.0, queue_size: int = 1000):
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subs: Set[Subscription] = set()
+        self._last_sent: Dict[int, tuple] = {}  # user_id → 最後に送った (state, since)
+        self._pollers: Dict[asyncio.AbstractEventLoop, asyncio.Task] = {}
+
+    def subscribe(self, department_id: Optional[int]) -> Subscription:
+        """実行中のイベントループから呼ぶ。そのループのポーラーが無ければ起動する"""
+        loop = asyncio.get_running_loop()
+        sub = Subscription(department_id, loop, self.queue_size)
+        with self._lock:
+            self._subs.add(sub)
+            task = self._pollers.get(loop)
+            if task is None or task.done():
+                self._pollers[loop] = loop.create_task(self._poll(loop))
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs.discard(sub)
+
+    def publish(self, events: Iterable[Dict[str, object]]) -> int:
+        """
+        どのスレッドからでも呼べる。購読者ごとにそのイベントループへ渡す。
+        既に送った (user, state, since) は捨てる。配った購読者数の延べを返す。
+        """
+        delivered = 0
+        with self._lock:
+            fresh = []
+            for ev in events:
+                key, mark = ev["user_id"], (ev["state"], ev["since"])
+                if self._last_sent.get(key) == mark:
+                    continue
+                self._last_sent[key] = mark
+                fresh.append(ev)
+            subs = list(self._subs)
+        for ev in fresh:
+            for sub in subs:
+                if sub.wants(ev):
+                    sub.loop.call_soon_threadsafe(sub._put, ev)
+                    delivered += 1
+        return delivered
+
+    def publish_states(self, states: Iterable[AttendanceState]) -> int:
+        with self._lock:
+            if not self._subs:
+                return 0  # 購読者がいなければ部署の解決もしない
+        return self.publish(events_for_states(states))
+
+    async def _poll(self, loop: asyncio.AbstractEventLoop) -> None:
+        """他プロセスでの打刻を拾う。このループの購読者がいなくなったら終わる"""
+        watermark = timezone.now()
+        # コミットが遅れた行を取りこぼさないよう少し遡って読む（重複は publish で捨てる）
+        overlap = timedelta(seconds=self.poll_interval * 2)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            with self._lock:
+                if not any(s.loop is loop for s in self._subs):
+                    self._pollers.pop(loop, None)
+                    return
+            try:
+                changed = [s async for s in AttendanceState.objects
+                           .filter(updated_at__gt=watermark - overlap)
+                           .order_by("updated_at")]
+                if changed:
+                    watermark = max(watermark, changed[-1].updated_at)
+                    events = await sync_to_async(events_for_states)(changed)
+                    self.publish(events)
+            except Exception:
+                # DB の一時的な失敗でポーラーを止めない（次の周期で同じ watermark から読み直す）
+                print(traceback.format_exc())
+
+
+broker = PresenceBroker(
+    poll_interval=getattr(settings, "HR_PRESENCE_POLL_SECONDS", 2.0),
+    queue_size=getattr(settings, "HR_PRESENCE_QUEUE_SIZE", 1000),
+)
@@ -0,0 +1,79 @@
+# hr_core/renderers.py
+"""
+DRF のレンダラー（応答本文のエンコード）。Accept ヘッダで選ぶ。
+
+  - ORJSONRenderer：application/json。orjson で書く（float を除き標準の JSONRenderer と同じバイト列）
+      datetime・dataclass は orjson に任せず DRF の JSONEncoder に回すので表記は変わらない
+      （シリアライザの DATETIME_FORMAT 変換もそのまま）。U+2028/U+2029 も DRF と同じくエスケープする
+  - MessagePackRenderer：application/msgpack（?format=msgpack でも可）。JSON と同じ値を MessagePack で書く
+      日時・Decimal などは JSON と同じ文字列／数値にする
+
+orjson・msgpack は任意の依存。orjson が無ければ標準の JSONRenderer と同じ処理になり、
+msgpack が無ければ MessagePackRenderer は選ばれない（HrContentNegotiation が候補から外す）。
+"""
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson  # type: ignore
+except Exception:
+    orjson = None
+
+try:
+    import msgpack  # type: ignore
+except Exception:
+    msgpack = None
+
+_default = JSONEncoder().default  # orjson・msgpack が扱わない型は DRF の JSON と同じ値にする
+
+
+_LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    COMPACT_JSON・UNICODE_JSON が既定（True）のとき、標準の JSONRenderer と同じバイト列を orjson で書く。
+    float だけは orjson の表記になる（NaN/Infinity は ValueError にならず null、1e16 は 1e+16 ではなく 1e16）。
+    勤怠・人事の応答は整数・文字列・日時だけなので差は出ない。
+    インデント指定（; indent=4 やブラウザブルAPI）と設定が既定でないときは標準の処理に回す。
+    """
+    available = True
+
+    if orjson is not None:
+        # 型ごとの変換は DRF の JSONEncoder に合わせる（datetime は ISO 8601・ミリ秒・UTC は Z）
+        OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=_default, option=self.OPTIONS)
+        # DRF と同じく JavaScript の文字列に埋め込めるよう U+2028/U+2029 はエスケープする
+        for raw, escaped in _LINE_SEPARATORS:
+            ret = ret.replace(raw, escaped)
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+    available = msgpack is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
+
+
+class HrContentNegotiation(DefaultContentNegotiation):
+    """依存ライブラリが無いレンダラー（available=False）を候補から外してから選ぶ"""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderers = [r for r in renderers if getattr(r, "available", True)]
+        return super().select_renderer(request, renderers, format_suffix)
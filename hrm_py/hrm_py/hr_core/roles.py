@@ -0,0 +1,116 @@
+# hr_core/roles.py
+"""
+ユーザーのロール（staff / HR_ADMIN / 管理職 / 管理する部署）の解決とキャッシュ。
+
+権限クラスは has_permission と、オブジェクトごとの has_object_permission で
+同じ判定を何度も行うため、次の順で引いて HR_ADMIN グループへの問い合わせを避ける：
+  1. リクエスト内：request.user に結果を持たせる（1リクエスト1回）
+  2. JWT クレーム：HR_ROLES_IN_TOKEN=True のとき access token の "hr_roles"（authentication.py で復元、クエリ0回）
+  3. プロセス内キャッシュ：user_id ごと（local_cache.LocalCache。グループ所属の変更で signals.py から無効化、TTL付き）
+is_staff は認証時に読み込まれた User の値をそのまま使う。
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from django.conf import settings
+
+from .directory import directory
+from .local_cache import LocalCache
+
+HR_ADMIN_GROUP = "HR_ADMIN"
+TOKEN_CLAIM = "hr_roles"
+_REQUEST_ATTR = "_hr_roles"
+
+
+@dataclass(frozen=True)
+class Roles:
+    is_staff: bool = False
+    is_hr_admin: bool = False  # HR_ADMIN グループ所属
+    is_manager: bool = False
+    managed_department_ids: FrozenSet[int] = frozenset()
+
+    @property
+    def is_hr(self) -> bool:
+        """HR管理者：is_staff または HR_ADMIN グループ所属"""
+        return self.is_staff or self.is_hr_admin
+
+    def manages_department(self, department_id: Optional[int]) -> bool:
+        return department_id is not None and int(department_id) in self.managed_department_ids
+
+    def as_claims(self) -> Dict[str, object]:
+        return {
+            "hr_admin": self.is_hr_admin,
+            "manager": self.is_manager,
+            "departments": sorted(self.managed_department_ids),
+        }
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, object], is_staff: bool) -> "Roles":
+        return cls(
+            is_staff=is_staff,
+            is_hr_admin=bool(claims.get("hr_admin")),
+            is_manager=bool(claims.get("manager")),
+            managed_department_ids=frozenset(int(d) for d in claims.get("departments") or ()),
+        )
+
+
+ANONYMOUS = Roles()
+
+
+class RoleResolver:
+    """user_id → Roles（is_staff を除く部分）の上限付きキャッシュ"""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 300.0):
+        self._cache = LocalCache(maxsize, ttl)
+
+    def resolve(self, user) -> Roles:
+        if user is None or not getattr(user, "is_authenticated", False):
+            return ANONYMOUS
+        now = time.monotonic()
+        fields = self._cache.get(user.pk, now)
+        if fields is None:
+            fields = self._load(user)
+            self._cache.put(user.pk, fields, now)
+        return Roles(is_staff=bool(user.is_staff), **fields)
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        self._cache.invalidate(int(uid) for uid in user_ids)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    @staticmethod
+    def _load(user) -> Dict[str, object]:
+        entry = directory.get(user.pk)
+        is_manager = bool(entry and entry.is_manager)
+        managed = frozenset([entry.department_id]) if is_manager and entry.department_id is not None else frozenset()
+        return {
+            "is_hr_admin": user.groups.filter(name=HR_ADMIN_GROUP).exists(),
+            "is_manager": is_manager,
+            "managed_department_ids": managed,
+        }
+
+
+resolver = RoleResolver(
+    maxsize=getattr(settings, "HR_ROLES_CACHE_SIZE", 4096),
+    ttl=getattr(settings, "HR_ROLES_TTL", 300),
+)
+
+
+def attach_roles(user, roles: Roles) -> None:
+    """このリクエストの間は roles を使わせる（JWT クレームからの復元などで使う）"""
+    setattr(user, _REQUEST_ATTR, roles)
+
+
+def roles_for_user(user) -> Roles:
+    """User のロール。同じ User オブジェクト（＝同じリクエスト）では2回目以降は計算しない"""
+    if user is None or not getattr(user, "is_authenticated", False):
+        return ANONYMOUS
+    cached = getattr(user, _REQUEST_ATTR, None)
+    if cached is None:
+        cached = resolver.resolve(user)
+        attach_roles(user, cached)
+    return cached
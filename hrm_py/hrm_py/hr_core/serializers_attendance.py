@@ -1,14 +1,35 @@
 # hr_core/serializers_attendance.py
 from rest_framework import serializers
-from .models_attendance import AttendancePunch, PunchType
+from .models_attendance import AttendancePunch, AttendanceState, PunchType
 
 class AttendancePunchSerializer(serializers.ModelSerializer):
     class Meta:
         model = AttendancePunch
         fields = ["id", "punched_at", "punch_type", "note"]
 
+class AttendanceStateSerializer(serializers.ModelSerializer):
+    state_label = serializers.CharField(source="get_state_display", read_only=True)
+
+    class Meta:
+        model = AttendanceState
+        fields = ["state", "state_label", "since", "open_work_date", "missed_out_date"]
+
 class PunchCreateSerializer(serializers.Serializer):
     type = serializers.ChoiceField(choices=[c[0] for c in PunchType.choices])
     note = serializers.CharField(required=False, allow_blank=True, default="")
     # 任意: クライアントからサーバ時刻ではなく任意時刻を送るとき
     punched_at = serializers.DateTimeField(required=False)
+
+class PunchBatchItemSerializer(PunchCreateSerializer):
+    """
+    打刻端末からの一括登録の1件。打刻時刻は必須。
+    対象者は user_id か employee_code で指定（どちらも無ければ送信者本人）。
+    """
+    punched_at = serializers.DateTimeField()
+    user_id = serializers.IntegerField(required=False, min_value=1)
+    employee_code = serializers.CharField(required=False, max_length=32)
+
+    def validate(self, attrs):
+        if attrs.get("user_id") and attrs.get("employee_code"):
+            raise serializers.ValidationError("user_id と employee_code はどちらか一方を指定してください")
+        return attrs
@@ -25,7 +25,8 @@ class HRMeSerializer(serializers.ModelSerializer):
         ]
 
     def get_user(self, obj):
-        u = obj.user
+        # 社員ディレクトリのエントリを渡す場合は context["user"] に User を入れる
+        u = self.context.get("user") or obj.user
         return {
             "id": u.id,
             "username": u.username,
@@ -0,0 +1,774 @@
+# hr_core/services_attendance.py
+"""
+勤怠集計のサービス層。
+
+打刻の登録経路（API/一括取込など）から呼び出し、日次サマリ
+（DailyAttendanceSummary）を最新に保つ。集計APIはこのサマリを読むだけで済む。
+"""
+from __future__ import annotations
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_tz
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Q, QuerySet, Subquery, Sum
+from django.utils import timezone
+
+from .models_attendance import (
+    AttendancePunch,
+    AttendanceRollup,
+    AttendanceState,
+    DailyAttendanceSummary,
+    PunchType,
+    RollupPeriod,
+    WorkState,
+)
+from .models_hr import EmployeeProfile
+from .directory import DEFAULT_BASE_HOURS, directory
+from .presence import broker
+from .summary_cache import summary_cache
+from .work_calendar import CalendarSnapshot, work_calendar
+from attendance import batch
+from attendance.aggregates import daily_minutes_sql
+from attendance.calc import HR_CORE_POLICY, PunchRecord, compute_day
+
+JST = ZoneInfo("Asia/Tokyo")
+
+
+def to_local_date(dt: datetime) -> date:
+    """打刻の暦日をJSTで判定（aware/naiveどちらでも可）"""
+    if timezone.is_naive(dt):
+        dt = dt.replace(tzinfo=dt_tz.utc)
+    return dt.astimezone(JST).date()
+
+
+def calc_daily_minutes(punches: Iterable, base_minutes: int = 8 * 60) -> Dict[str, int]:
+    """勤務区間ごとに休憩を控除して 勤務分／休憩分／残業分 を返す（計算は attendance.calc の共通カーネル）"""
+    return compute_day(punches, HR_CORE_POLICY.with_base_minutes(base_minutes)).as_dict()
+
+
+# ---- 日次サマリの更新 ----
+
+def _profile_for_user(user_id: int) -> Tuple[Optional[int], int]:
+    """(部署ID, 所定労働分)。プロフィールが無ければ (None, 8h)"""
+    entry = directory.get(user_id)
+    if entry is None:
+        return None, int(DEFAULT_BASE_HOURS * 60)
+    return entry.department_id, entry.base_minutes
+
+
+def refresh_daily_summary(user_id: int, work_date: date) -> Optional[DailyAttendanceSummary]:
+    """
+    (user, work_date) の生打刻から日次サマリを再計算して保存する。
+    打刻が1件も無ければ行を削除して None を返す。
+    週/月ロールアップには旧値との差分だけを反映する。
+    """
+    old = (DailyAttendanceSummary.objects
+           .select_for_update()
+           .filter(user_id=user_id, work_date=work_date)
+           .first())
+
+    rows = list(
+        AttendancePunch.objects
+        .filter(user_id=user_id, work_date=work_date)
+        .order_by("punched_at", "id")
+        .values_list("id", "punch_type", "punched_at", "note")
+    )
+    if not rows:
+        if old is not None:
+            _apply_rollup_delta(user_id, old.department_id, work_date, _contribution(old), sign=-1)
+            old.delete()
+        return None
+
+    department_id, base_minutes = _profile_for_user(user_id)
+    punches = [PunchRecord(ptype, at, pk) for pk, ptype, at, _ in rows]
+    mins = calc_daily_minutes(punches, base_minutes)
+    ins = [p.punched_at for p in punches if p.punch_type == PunchType.IN]
+    outs = [p.punched_at for p in punches if p.punch_type == PunchType.OUT]
+    row, _ = DailyAttendanceSummary.objects.update_or_create(
+        user_id=user_id,
+        work_date=work_date,
+        defaults={
+            **mins,
+            "department_id": department_id,
+            "first_in": ins[0] if ins else None,
+            "last_out": outs[-1] if outs else None,
+            "punch_count": len(rows),
+            "notes": [note for *_, note in rows if note],
+            "is_dirty": False,
+        },
+    )
+
+    if old is not None:
+        _apply_rollup_delta(user_id, old.department_id, work_date, _contribution(old), sign=-1)
+    _apply_rollup_delta(user_id, row.department_id, work_date, _contribution(row), sign=1)
+    return row
+
+
+def mark_days_dirty(keys: Iterable[Tuple[int, date]]) -> int:
+    """
+    (user_id, work_date) の日次サマリを「要再計算」にする。
+    行が無い日は dirty な空行を作る（次回の集計参照時に生打刻から埋まる）。
+    集計キャッシュの該当日もコミット後に外す。
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    summary_cache.invalidate_days(keys)
+    dates_by_user: Dict[int, set] = defaultdict(set)
+    users_by_date: Dict[date, set] = defaultdict(set)
+    for uid, d in keys:
+        dates_by_user[uid].add(d)
+        users_by_date[d].add(uid)
+
+    with transaction.atomic():
+        DailyAttendanceSummary.objects.bulk_create(
+            [DailyAttendanceSummary(user_id=uid, work_date=d, is_dirty=True) for uid, d in keys],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        # UPDATE の回数が少ない方でまとめる（端末の一括打刻は日付、取込は社員が少ない）
+        # updated_at も進める（update() は auto_now を設定しない。ETag の検証値に使う）
+        now = timezone.now()
+        updated = 0
+        if len(users_by_date) <= len(dates_by_user):
+            for d, uids in users_by_date.items():
+                updated += DailyAttendanceSummary.objects.filter(
+                    work_date=d, user_id__in=uids
+                ).update(is_dirty=True, updated_at=now)
+        else:
+            for uid, dates in dates_by_user.items():
+                updated += DailyAttendanceSummary.objects.filter(
+                    user_id=uid, work_date__in=dates
+                ).update(is_dirty=True, updated_at=now)
+    return updated
+
+
+def load_daily_summaries(user_id: int, dfrom: date, dto: date) -> Dict[date, DailyAttendanceSummary]:
+    """期間内の日次サマリを日付→行で返す。dirty な日だけ生打刻から再計算する。"""
+    rows = DailyAttendanceSummary.objects.filter(
+        user_id=user_id, work_date__gte=dfrom, work_date__lte=dto
+    )
+    result: Dict[date, DailyAttendanceSummary] = {}
+    for row in rows:
+        if row.is_dirty:
+            with transaction.atomic():
+                fresh = refresh_daily_summary(row.user_id, row.work_date)
+            if fresh is None:
+                continue
+            row = fresh
+        result[row.work_date] = row
+    return result
+
+
+def _refresh_days(keys: List[Tuple[int, date]]) -> Dict[date, Optional[DailyAttendanceSummary]]:
+    result = {}
+    for uid, d in keys:
+        with transaction.atomic():
+            result[d] = refresh_daily_summary(uid, d)
+    return result
+
+
+async def aload_daily_summaries(user_id: int, dfrom: date, dto: date) -> Dict[date, DailyAttendanceSummary]:
+    """
+    load_daily_summaries の async 版。読み出しは aiterator()、
+    dirty な日の再計算（行ロックを伴う書き込み）だけスレッドで行う。
+    """
+    rows = DailyAttendanceSummary.objects.filter(
+        user_id=user_id, work_date__gte=dfrom, work_date__lte=dto
+    )
+    result: Dict[date, DailyAttendanceSummary] = {}
+    dirty: List[Tuple[int, date]] = []
+    async for row in rows.aiterator():
+        if row.is_dirty:
+            dirty.append((row.user_id, row.work_date))
+        else:
+            result[row.work_date] = row
+    if dirty:
+        for d, fresh in (await sync_to_async(_refresh_days)(dirty)).items():
+            if fresh is not None:
+                result[d] = fresh
+    return result
+
+
+# ---- 週/月ロールアップ ----
+
+ROLLUP_FIELDS = ("work_minutes", "break_minutes", "overtime_minutes", "working_days")
+
+
+def period_start(period: str, d: date) -> date:
+    if period == RollupPeriod.WEEK:
+        return d - timedelta(days=d.weekday())  # 月曜始まり
+    return d.replace(day=1)
+
+
+def period_end(period: str, start: date) -> date:
+    if period == RollupPeriod.WEEK:
+        return start + timedelta(days=6)
+    nxt = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return nxt - timedelta(days=1)
+
+
+def _contribution(row: DailyAttendanceSummary) -> Dict[str, int]:
+    return {
+        "work_minutes": row.work_minutes,
+        "break_minutes": row.break_minutes,
+        "overtime_minutes": row.overtime_minutes,
+        "working_days": 1 if row.work_minutes > 0 else 0,
+    }
+
+
+RollupDeltas = Dict[Tuple[str, date, Tuple[str, int]], Dict[str, int]]
+
+
+def _new_rollup_deltas() -> RollupDeltas:
+    return defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+
+
+def _add_rollup_delta(deltas: RollupDeltas, user_id: int, department_id: Optional[int], work_date: date,
+                      values: Dict[str, int], sign: int) -> None:
+    """日次1行分の値を user/department の週・月ごとの差分に積む（sign=-1 で減算）"""
+    if not any(values.values()):
+        return
+    owners = [("user_id", user_id)]
+    if department_id is not None:
+        owners.append(("department_id", department_id))
+    for period in (RollupPeriod.WEEK, RollupPeriod.MONTH):
+        pstart = period_start(period, work_date)
+        for owner in owners:
+            acc = deltas[(period, pstart, owner)]
+            for k, v in values.items():
+                acc[k] += sign * v
+
+
+def _flush_rollup_deltas(deltas: RollupDeltas) -> None:
+    """積んだ差分を (期間, 期間開始, 集計先) ごとに1回の UPDATE でロールアップへ反映する"""
+    for (period, pstart, (field, owner_id)), values in deltas.items():
+        values = {k: v for k, v in values.items() if v}
+        if not values:
+            continue
+        owner = {field: owner_id}
+        AttendanceRollup.objects.get_or_create(period=period, period_start=pstart, **owner)
+        AttendanceRollup.objects.filter(period=period, period_start=pstart, **owner).update(
+            **{k: F(k) + v for k, v in values.items()}
+        )
+
+
+def _apply_rollup_delta(user_id: int, department_id: Optional[int], work_date: date,
+                        values: Dict[str, int], sign: int) -> None:
+    """日次1行分の値を user/department の週・月ロールアップへ加算（sign=-1 で減算）"""
+    deltas = _new_rollup_deltas()
+    _add_rollup_delta(deltas, user_id, department_id, work_date, values, sign)
+    _flush_rollup_deltas(deltas)
+
+
+def _scope_filter(user_id: Optional[int], department_id: Optional[int]) -> Q:
+    if department_id is not None:
+        return Q(department_id=department_id)
+    return Q(user_id=user_id)
+
+
+# dirty な日がこれより多ければ、1日1トランザクションではなく一括エンジンでまとめて再計算する
+#   "sql"   : ペアリングと休憩控除をDB側で行う（aggregates.daily_minutes_sql）
+#   "numpy" : 打刻を列で取得し NumPy で一括計算（batch.compute_days_batch）
+# エンジンは attendance アプリと同じ settings.ATTENDANCE_BULK_ENGINE で選ぶ
+BULK_REFRESH_THRESHOLD = 20
+
+
+def _bulk_minutes(punches: QuerySet) -> Dict[Tuple[int, date], Tuple[int, int]]:
+    """(user_id, work_date) → 休憩控除後の (勤務分, 休憩分)。HR_CORE_POLICY と同じ結果になる"""
+    engine = getattr(settings, "ATTENDANCE_BULK_ENGINE", "sql")
+    if engine == "numpy" and batch.is_available():
+        rows = (punches
+                .order_by("user_id", "work_date", "punched_at", "id")
+                .values_list("user_id", "work_date", "punched_at", "punch_type", "id"))
+        res = batch.compute_days_batch(*batch.columns_from_rows(rows.iterator()),
+                                       presorted=True, deduct_breaks=True)
+        return {
+            (uid, date.fromordinal(d)): (wm, bm)
+            for (uid, d), (wm, bm, _) in res.as_dict().items()
+        }
+    return {(uid, d): (wm, bm) for uid, d, wm, bm in daily_minutes_sql(punches, deduct_breaks=True)}
+
+
+def refresh_daily_summaries_bulk(keys: Iterable[Tuple[int, date]]) -> int:
+    """
+    複数の (user_id, work_date) を1トランザクションで再計算する（refresh_daily_summary の一括版）。
+    分数は一括エンジン、初回IN/最終OUT/件数は集約クエリ、備考は非空のものだけ取得し、
+    日次サマリは1回の upsert、ロールアップは (期間, 集計先) ごとにまとめた差分で更新する。
+    打刻の無くなった日は行を削除する。戻り値は対象の日数。
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+    user_ids = {uid for uid, _ in keys}
+    dfrom = min(d for _, d in keys)
+    dto = max(d for _, d in keys)
+    punches = AttendancePunch.objects.filter(user_id__in=user_ids, work_date__gte=dfrom, work_date__lte=dto)
+
+    profiles = directory.get_many(user_ids)
+    default_base = int(DEFAULT_BASE_HOURS * 60)
+
+    with transaction.atomic():
+        # 旧値（ロールアップの減算分）は行ロックを取ってから読む
+        old_rows = {
+            (r.user_id, r.work_date): r
+            for r in DailyAttendanceSummary.objects.select_for_update().filter(
+                user_id__in=user_ids, work_date__gte=dfrom, work_date__lte=dto
+            )
+            if (r.user_id, r.work_date) in keys
+        }
+        minutes = _bulk_minutes(punches)
+        stats = {
+            (s["user_id"], s["work_date"]): s
+            for s in punches.order_by().values("user_id", "work_date").annotate(
+                first_in=Min("punched_at", filter=Q(punch_type=PunchType.IN)),
+                last_out=Max("punched_at", filter=Q(punch_type=PunchType.OUT)),
+                punch_count=Count("id"),
+            )
+        }
+        notes: Dict[Tuple[int, date], List[str]] = defaultdict(list)
+        for uid, d, note in (punches.exclude(note="").order_by("punched_at", "id")
+                             .values_list("user_id", "work_date", "note")):
+            notes[(uid, d)].append(note)
+
+        deltas = _new_rollup_deltas()
+        fresh: List[DailyAttendanceSummary] = []
+        empty: List[int] = []
+        for key in sorted(keys):
+            uid, d = key
+            old = old_rows.get(key)
+            if old is not None:
+                _add_rollup_delta(deltas, uid, old.department_id, d, _contribution(old), sign=-1)
+            st = stats.get(key)
+            if st is None:
+                if old is not None:
+                    empty.append(old.pk)
+                continue
+            entry = profiles.get(uid)
+            base_minutes = entry.base_minutes if entry is not None else default_base
+            wm, bm = minutes.get(key, (0, 0))
+            row = DailyAttendanceSummary(
+                user_id=uid,
+                work_date=d,
+                department_id=entry.department_id if entry is not None else None,
+                work_minutes=wm,
+                break_minutes=bm,
+                overtime_minutes=max(wm - base_minutes, 0),
+                first_in=st["first_in"],
+                last_out=st["last_out"],
+                punch_count=st["punch_count"],
+                notes=notes.get(key, []),
+                is_dirty=False,
+            )
+            fresh.append(row)
+            _add_rollup_delta(deltas, uid, row.department_id, d, _contribution(row), sign=1)
+
+        DailyAttendanceSummary.objects.filter(pk__in=empty).delete()
+        DailyAttendanceSummary.objects.bulk_create(
+            fresh,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=["user", "work_date"],
+            update_fields=["department", "work_minutes", "break_minutes", "overtime_minutes", "first_in",
+                           "last_out", "punch_count", "notes", "is_dirty", "updated_at"],
+        )
+        _flush_rollup_deltas(deltas)
+    return len(keys)
+
+
+def refresh_dirty_days(dfrom: date, dto: date, user_id: Optional[int] = None,
+                       department_id: Optional[int] = None) -> int:
+    """
+    スコープ内の dirty な日次サマリを再計算し、ロールアップも最新化する。
+    user_id も department_id も指定しなければ全社が対象。
+    """
+    q = Q(work_date__gte=dfrom, work_date__lte=dto, is_dirty=True)
+    if department_id is not None:
+        # 未計算の行は部署が未確定なので、現在の所属でも拾う
+        q &= Q(department_id=department_id) | Q(user__employee_profile__department_id=department_id)
+    elif user_id is not None:
+        q &= Q(user_id=user_id)
+    keys = list(DailyAttendanceSummary.objects.filter(q).values_list("user_id", "work_date"))
+    if len(keys) > BULK_REFRESH_THRESHOLD:
+        return refresh_daily_summaries_bulk(keys)
+    for uid, d in keys:
+        with transaction.atomic():
+            refresh_daily_summary(uid, d)
+    return len(keys)
+
+
+def load_department_daily_totals(department_id: int, dfrom: date, dto: date) -> Dict[date, Dict[str, int]]:
+    """部署の日別合計（DB側で GROUP BY work_date）"""
+    refresh_dirty_days(dfrom, dto, department_id=department_id)
+    rows = (DailyAttendanceSummary.objects
+            .filter(department_id=department_id, work_date__gte=dfrom, work_date__lte=dto)
+            .values("work_date")
+            .annotate(work_minutes=Sum("work_minutes"),
+                      break_minutes=Sum("break_minutes"),
+                      overtime_minutes=Sum("overtime_minutes")))
+    return {r["work_date"]: r for r in rows}
+
+
+MATRIX_FIELDS = ("work_minutes", "break_minutes", "overtime_minutes")
+
+
+def load_daily_matrix(dfrom: date, dto: date, user_id: Optional[int] = None,
+                      department_id: Optional[int] = None) -> Tuple[List[int], Dict[str, List[int]]]:
+    """
+    社員×日の値を列指向で返す：(user_id の昇順リスト, 項目 → 行優先の平坦な配列)。
+    配列の i * 日数 + j 番目が i 番目の社員の dfrom + j 日の値。
+    行は日次サマリを1回のクエリで読むだけ（社員×日で一意）。部署スコープでは現在の所属者も
+    （勤務が無くても）行に含め、期間中に部署で勤務した異動者の行も残す。
+    """
+    refresh_dirty_days(dfrom, dto, user_id=user_id, department_id=department_id)
+    rows = list(DailyAttendanceSummary.objects
+                .filter(_scope_filter(user_id, department_id), work_date__gte=dfrom, work_date__lte=dto)
+                .order_by()
+                .values_list("user_id", "work_date", *MATRIX_FIELDS))
+    if department_id is not None:
+        members = EmployeeProfile.objects.filter(department_id=department_id).values_list("user_id", flat=True)
+        user_ids = sorted({r[0] for r in rows} | set(members))
+    else:
+        user_ids = [user_id]
+
+    ndays = (dto - dfrom).days + 1
+    index = {uid: i * ndays for i, uid in enumerate(user_ids)}
+    values = {f: [0] * (len(user_ids) * ndays) for f in MATRIX_FIELDS}
+    columns = [values[f] for f in MATRIX_FIELDS]
+    for uid, d, *mins in rows:
+        pos = index[uid] + (d - dfrom).days
+        for col, m in zip(columns, mins):
+            col[pos] = m
+    return user_ids, values
+
+
+def _sum_daily(dfrom: date, dto: date, scope: Q) -> Dict[str, int]:
+    agg = (DailyAttendanceSummary.objects
+           .filter(scope, work_date__gte=dfrom, work_date__lte=dto)
+           .aggregate(work=Sum("work_minutes"),
+                      brk=Sum("break_minutes"),
+                      ot=Sum("overtime_minutes"),
+                      days=Count("id", filter=Q(work_minutes__gt=0))))
+    return {
+        "work_minutes": int(agg["work"] or 0),
+        "break_minutes": int(agg["brk"] or 0),
+        "overtime_minutes": int(agg["ot"] or 0),
+        "working_days": int(agg["days"] or 0),
+    }
+
+
+def _holiday_work(period: str, dfrom: date, dto: date, scope: Q, cal: CalendarSnapshot) -> Dict[date, int]:
+    """期間の開始日 → 出勤日でない日（週休日・休日）の勤務分。非出勤日だけを1回のクエリで日別に合算する"""
+    result: Dict[date, int] = defaultdict(int)
+    days = cal.non_workdays(dfrom, dto)
+    if not days:
+        return result
+    rows = (DailyAttendanceSummary.objects
+            .filter(scope, work_date__in=days, work_minutes__gt=0)
+            .order_by()
+            .values_list("work_date")
+            .annotate(m=Sum("work_minutes")))
+    for d, minutes in rows:
+        result[period_start(period, d)] += int(minutes or 0)
+    return result
+
+
+def load_period_summaries(period: str, dfrom: date, dto: date, user_id: Optional[int] = None,
+                          department_id: Optional[int] = None,
+                          cal: Optional[CalendarSnapshot] = None) -> List[Dict[str, object]]:
+    """
+    期間 [dfrom, dto] を週/月単位で集計して返す。
+    期間に丸ごと含まれる週/月はロールアップ行を、端の欠けた週/月だけ日次サマリを合算する。
+    各行には勤務カレンダーから所定出勤日数（scheduled_days）と休日の勤務分（holiday_work_minutes）を付ける
+    （端の欠けた週/月は [dfrom, dto] に含まれる日だけで数える）。
+    """
+    cal = cal or work_calendar.get()
+    refresh_dirty_days(dfrom, dto, user_id=user_id, department_id=department_id)
+    scope = _scope_filter(user_id, department_id)
+    holiday_work = _holiday_work(period, dfrom, dto, scope, cal)
+
+    rollups = {
+        r.period_start: r
+        for r in AttendanceRollup.objects.filter(
+            scope, period=period,
+            period_start__gte=period_start(period, dfrom), period_start__lte=dto,
+        )
+    }
+
+    value: List[Dict[str, object]] = []
+    pstart = period_start(period, dfrom)
+    while pstart <= dto:
+        pend = period_end(period, pstart)
+        if pstart >= dfrom and pend <= dto:
+            r = rollups.get(pstart)
+            totals = {k: (getattr(r, k) if r else 0) for k in ROLLUP_FIELDS}
+        else:
+            totals = _sum_daily(max(pstart, dfrom), min(pend, dto), scope)
+        value.append({
+            "date": pstart.isoformat(),
+            "period_start": pstart.isoformat(),
+            "period_end": pend.isoformat(),
+            **totals,
+            "scheduled_days": cal.scheduled_days(max(pstart, dfrom), min(pend, dto)),
+            "holiday_work_minutes": holiday_work.get(pstart, 0),
+        })
+        pstart = pend + timedelta(days=1)
+    return value
+
+
+# ---- 現在の勤務状態（AttendanceState） ----
+
+# (現在の状態, 打刻種別) → 次の状態。ここに無い組み合わせ（出勤の二重打刻、休憩開始の無い休憩終了、
+# 休憩中の退勤など）は受け付けない。休憩中の退勤を許すと休憩が閉じずペアリングで控除されないため。
+TRANSITIONS: Dict[Tuple[str, str], str] = {
+    (WorkState.OFF, PunchType.IN): WorkState.WORKING,
+    (WorkState.WORKING, PunchType.BREAK_START): WorkState.ON_BREAK,
+    (WorkState.ON_BREAK, PunchType.BREAK_END): WorkState.WORKING,
+    (WorkState.WORKING, PunchType.OUT): WorkState.OFF,
+}
+
+STATE_FIELDS = ["state", "since", "open_work_date", "missed_out_date", "updated_at"]
+
+# 最終打刻の種別 → その後の状態（打刻履歴からの作り直し用）
+_STATE_AFTER = {
+    PunchType.IN: WorkState.WORKING,
+    PunchType.BREAK_START: WorkState.ON_BREAK,
+    PunchType.BREAK_END: WorkState.WORKING,
+    PunchType.OUT: WorkState.OFF,
+}
+
+
+class PunchTransitionError(Exception):
+    """現在の勤務状態では受け付けられない打刻"""
+
+    def __init__(self, state: str, punch_type: str, message: str):
+        super().__init__(message)
+        self.state = state
+        self.punch_type = punch_type
+        self.message = message
+
+
+def lock_states(user_ids: Iterable[int]) -> Dict[int, AttendanceState]:
+    """
+    user_id → AttendanceState を行ロック付きで返す（トランザクション内で呼ぶこと）。
+    行が無いユーザーは OFF で作成してからロックする。
+    """
+    user_ids = sorted(set(user_ids))  # ロック順を揃えてデッドロックを避ける
+    AttendanceState.objects.bulk_create(
+        [AttendanceState(user_id=uid) for uid in user_ids], batch_size=500, ignore_conflicts=True
+    )
+    return {
+        s.user_id: s
+        for s in AttendanceState.objects.select_for_update().filter(user_id__in=user_ids).order_by("user_id")
+    }
+
+
+def close_stale_shift(state: AttendanceState, work_date: date) -> bool:
+    """
+    出勤日（open_work_date）が work_date より前のまま勤務中/休憩中の state を勤務外に戻す（保存はしない）。
+    退勤を打ち忘れても翌日の出勤を受け付けるため。戻した勤務の出勤日は missed_out_date に残し、
+    退勤時刻は推測で補わない（その日は HR が修正するまで退勤漏れのまま）。戻したら True
+    """
+    if state.state == WorkState.OFF or state.open_work_date is None or state.open_work_date >= work_date:
+        return False
+    state.missed_out_date = state.open_work_date
+    state.state = WorkState.OFF
+    state.open_work_date = None
+    return True
+
+
+def advance_state(state: AttendanceState, punch_type: str, punched_at: datetime, work_date: date) -> AttendanceState:
+    """
+    打刻1件で state を次の状態に進める（保存はしない）。受け付けられなければ PunchTransitionError。
+    前日以前から開いたままの勤務は先に close_stale_shift で閉じる。
+    直前の打刻より前の時刻（遡った修正）は受け付けない。修正は HR の correct_punch で行う。
+    """
+    close_stale_shift(state, work_date)
+    if state.since is not None and punched_at < state.since:
+        raise PunchTransitionError(state.state, punch_type, "直前の打刻より前の時刻では打刻できません")
+    nxt = TRANSITIONS.get((state.state, punch_type))
+    if nxt is None:
+        raise PunchTransitionError(
+            state.state, punch_type,
+            f"{WorkState(state.state).label}のため{PunchType(punch_type).label}は打刻できません",
+        )
+    if punch_type == PunchType.IN:
+        state.open_work_date = work_date
+    elif nxt == WorkState.OFF:
+        state.open_work_date = None
+    state.state = nxt
+    state.since = punched_at
+    return state
+
+
+def apply_punch_state(user_id: int, punch_type: str, punched_at: datetime, work_date: date) -> AttendanceState:
+    """打刻1件分の状態遷移を検証して保存する。打刻の登録と同じトランザクション内で呼ぶ"""
+    state = lock_states([user_id])[user_id]
+    advance_state(state, punch_type, punched_at, work_date)
+    state.save(update_fields=STATE_FIELDS)
+    transaction.on_commit(lambda: broker.publish_states([state]))  # 在席状況の SSE 購読者へ
+    return state
+
+
+def correct_punch(user_id: int, punch_type: str, punched_at: datetime,
+                  note: str = "") -> Tuple[AttendancePunch, AttendanceState]:
+    """
+    HR による打刻の修正登録（退勤漏れ・打刻忘れの後追い）。状態遷移の検証をせずに打刻を追加し、
+    その日の日次サマリを再計算してから AttendanceState を打刻履歴から作り直す。
+    作り直すと missed_out_date は消えるので、修正した日以外の退勤漏れの印だけ戻す。(打刻, 作り直した状態) を返す
+    """
+    work_date = to_local_date(punched_at)
+    with transaction.atomic():
+        missed = lock_states([user_id])[user_id].missed_out_date
+        obj = AttendancePunch.objects.create(
+            user_id=user_id, punch_type=punch_type, punched_at=punched_at, note=note, work_date=work_date,
+        )
+        refresh_daily_summary(user_id, work_date)
+        summary_cache.invalidate_days([(user_id, work_date)])
+        rebuild_attendance_states([user_id])
+        state = AttendanceState.objects.get(user_id=user_id)
+        if missed is not None and missed != work_date:
+            state.missed_out_date = missed
+            state.save(update_fields=["missed_out_date", "updated_at"])
+        transaction.on_commit(lambda: broker.publish_states([state]))
+    return obj, state
+
+
+def rebuild_attendance_states(user_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    各ユーザーの最終打刻から AttendanceState を作り直す（一括取込・データ移行の後始末用）。
+    退勤漏れの印（missed_out_date）は打刻履歴からは決まらないので消す。
+    user_ids 省略時は打刻のある全ユーザー。作り直した件数を返す。
+    """
+    if user_ids is None:
+        user_ids = AttendancePunch.objects.values_list("user_id", flat=True).distinct()
+    user_ids = sorted(set(user_ids))
+    last = AttendancePunch.objects.filter(user_id=OuterRef("pk")).order_by("-punched_at", "-id")
+    count = 0
+    for i in range(0, len(user_ids), 500):
+        rows = (get_user_model().objects
+                .filter(pk__in=user_ids[i:i + 500])
+                .annotate(last_type=Subquery(last.values("punch_type")[:1]),
+                          last_at=Subquery(last.values("punched_at")[:1]),
+                          last_in_date=Subquery(last.filter(punch_type=PunchType.IN).values("work_date")[:1]))
+                .values_list("pk", "last_type", "last_at", "last_in_date"))
+        states = []
+        for uid, ptype, at, in_date in rows:
+            st = _STATE_AFTER.get(ptype, WorkState.OFF)
+            states.append(AttendanceState(
+                user_id=uid, state=st, since=at,
+                open_work_date=in_date if st != WorkState.OFF else None,
+            ))
+        AttendanceState.objects.bulk_create(
+            states, update_conflicts=True, unique_fields=["user"],
+            update_fields=["state", "since", "open_work_date", "missed_out_date", "updated_at"],
+        )
+        count += len(states)
+    return count
+
+
+def count_by_state(department_id: Optional[int] = None) -> Dict[str, int]:
+    """状態ごとの人数（勤務中/休憩中/勤務外）。状態行を数えるだけで打刻は読まない"""
+    qs = AttendanceState.objects.all()
+    if department_id is not None:
+        qs = qs.filter(user__employee_profile__department_id=department_id)
+    counts = {s.value: 0 for s in WorkState}
+    for st, n in qs.values_list("state").annotate(n=Count("pk")).order_by():
+        counts[st] = n
+    return counts
+
+
+def open_shifts(before: date):
+    """before より前の日に出勤したまま退勤していない（退勤漏れの）状態行"""
+    return (AttendanceState.objects
+            .filter(state__in=[WorkState.WORKING, WorkState.ON_BREAK], open_work_date__lt=before)
+            .order_by("open_work_date", "user_id"))
+
+
+# ---- 打刻の一括登録（打刻端末の再送） ----
+
+def bulk_ingest_punches(items: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """
+    検証済みの打刻（user_id, type, punched_at(aware), note）をまとめて登録する。
+    1トランザクションで bulk_create し、影響した (user, 日) の日次サマリを dirty にする。
+    既に同じ (user, punched_at, type) がある打刻・バッチ内の重複は登録せず "duplicate" を返す
+    （端末が同じバッファを再送しても二重にならない）。
+    新しい打刻は社員ごとに時刻順で AttendanceState の遷移を検証し、受け付けられないものは "error" にする。
+    戻り値は items と同じ並びの {"status": "created"|"duplicate"|"error", "id": ...}。
+    """
+    for item in items:
+        item["work_date"] = to_local_date(item["punched_at"])
+
+    user_ids = {item["user_id"] for item in items}
+    dates = {item["work_date"] for item in items}
+    with transaction.atomic():
+        # 先に状態行をロックしてから既存の打刻を読む（2台の端末が同じバッファを同時に再送しても、
+        # 後の方はロック待ちの後に先の登録を見て duplicate になる）
+        states = lock_states(user_ids)
+        existing: Dict[Tuple[int, datetime, str], int] = {
+            (uid, at, ptype): pk
+            for pk, uid, at, ptype in AttendancePunch.objects
+            .filter(user_id__in=user_ids, work_date__in=dates)
+            .values_list("id", "user_id", "punched_at", "punch_type")
+        }
+
+        results: List[Dict[str, object]] = []
+        candidates: List[int] = []  # 新規登録候補の results 上の位置
+        pending: Dict[Tuple[int, datetime, str], int] = {}  # key → results の位置
+        for item in items:
+            key = (item["user_id"], item["punched_at"], item["type"])
+            if key in existing:
+                results.append({"status": "duplicate", "id": existing[key]})
+                continue
+            if key in pending:
+                results.append({"status": "duplicate", "id": None, "_same_as": pending[key]})
+                continue
+            pending[key] = len(results)
+            candidates.append(len(results))
+            results.append({"status": "created", "id": None})
+
+        accepted: List[int] = []
+        # 社員ごとに時刻順で遷移させる（同時刻は送信順）
+        for i in sorted(candidates, key=lambda i: (items[i]["user_id"], items[i]["punched_at"])):
+            item = items[i]
+            try:
+                advance_state(states[item["user_id"]], item["type"], item["punched_at"], item["work_date"])
+            except PunchTransitionError as e:
+                results[i] = {"status": "error", "id": None,
+                              "errors": {"type": [e.message]}, "state": e.state}
+                continue
+            accepted.append(i)
+        accepted.sort()
+
+        new_objs = [AttendancePunch(
+            user_id=items[i]["user_id"],
+            punch_type=items[i]["type"],
+            punched_at=items[i]["punched_at"],
+            note=items[i].get("note") or "",
+            work_date=items[i]["work_date"],  # bulk_create は save() を通らないので明示する
+        ) for i in accepted]
+        created = AttendancePunch.objects.bulk_create(new_objs, batch_size=500)
+        now = timezone.now()
+        touched = [states[uid] for uid in {items[i]["user_id"] for i in candidates}]
+        for st in touched:
+            st.updated_at = now  # bulk_update は auto_now を設定しない
+        AttendanceState.objects.bulk_update(touched, STATE_FIELDS, batch_size=500)
+        mark_days_dirty({(o.user_id, o.work_date) for o in created})
+        moved = [states[uid] for uid in {items[i]["user_id"] for i in accepted}]
+        transaction.on_commit(lambda: broker.publish_states(moved))
+
+    for pos, obj in zip(accepted, created):
+        results[pos]["id"] = obj.pk
+    for r in results:
+        if "_same_as" in r:
+            same = results[r.pop("_same_as")]
+            if same["status"] == "error":
+                r.update(same)
+            else:
+                r["id"] = same["id"]
+    return results
@@ -0,0 +1,102 @@
+# hr_core/signals.py
+"""
+社員ディレクトリ（directory.py）・ロール（roles.py）キャッシュの無効化。
+保存直後とコミット後の2回消す（コミット前に別スレッドが旧値を読み直しても残らないように）。
+集計キャッシュ（summary_cache.py）は所定労働時間・部署・役職が変わったときだけ外す。
+勤務カレンダーの索引（work_calendar.py）は WorkCalendar の保存・削除で捨てる
+（集計キャッシュ・ETag は索引の版をキーに含むので、ここで外す必要はない）。
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .directory import directory
+from .models_attendance import WorkCalendar
+from .models_hr import Department, EmployeeProfile, Position
+from .roles import resolver
+from .summary_cache import summary_cache
+from .work_calendar import work_calendar
+
+# 集計結果に影響するプロフィールの項目
+SUMMARY_FIELDS = ("department_id", "position_id", "base_hours_per_day")
+
+
+def _invalidate_users(user_ids, caches=(directory, resolver)):
+    def run():
+        for cache in caches:
+            cache.invalidate(user_ids)
+    run()
+    transaction.on_commit(run)
+
+
+def _clear(caches=(directory, resolver)):
+    def run():
+        for cache in caches:
+            cache.clear()
+    run()
+    transaction.on_commit(run)
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def employee_profile_changed(sender, instance, **kwargs):
+    _invalidate_users([instance.user_id])
+
+
+@receiver(pre_save, sender=EmployeeProfile)
+def employee_profile_before_save(sender, instance, **kwargs):
+    # 変更前の値を覚えておく（移動元の部署の集計も外すため）
+    instance._summary_before = (
+        EmployeeProfile.objects.filter(pk=instance.pk).values(*SUMMARY_FIELDS).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def employee_profile_summary_changed(sender, instance, created=False, **kwargs):
+    before = getattr(instance, "_summary_before", None)
+    after = {f: getattr(instance, f) for f in SUMMARY_FIELDS}
+    if kwargs["signal"] is post_save and not created and before == after:
+        return
+    departments = {after["department_id"]} | ({before["department_id"]} if before else set())
+    summary_cache.invalidate_scopes([instance.user_id], departments)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+def department_or_position_changed(sender, instance, **kwargs):
+    # 名称変更・削除（SET_NULL）は所属する全員に波及するので丸ごと消す
+    _clear()
+
+
+@receiver(m2m_changed, sender=get_user_model().groups.through)
+def group_membership_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        # user.groups.add/remove/clear：instance はユーザー
+        _invalidate_users([instance.pk], caches=(resolver,))
+    elif pk_set is not None:
+        # group.user_set.add/remove：pk_set はユーザーID
+        _invalidate_users(list(pk_set), caches=(resolver,))
+    else:
+        # group.user_set.clear() は対象ユーザーが分からない
+        _clear(caches=(resolver,))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    # グループ名の変更・削除で HR_ADMIN の所属が変わりうる
+    _clear(caches=(resolver,))
+
+
+@receiver(post_save, sender=WorkCalendar)
+@receiver(post_delete, sender=WorkCalendar)
+def work_calendar_changed(sender, instance, **kwargs):
+    _clear(caches=(work_calendar,))
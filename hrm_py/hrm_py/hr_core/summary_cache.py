@@ -0,0 +1,157 @@
+# hr_core/summary_cache.py
+"""
+/api/attendance/summary の応答本文の共有キャッシュ（Django のキャッシュフレームワーク。
+settings.HR_SUMMARY_CACHE の別名、既定は DatabaseCache なので全ワーカーで共有される）。
+
+無効化は世代キーで行う。エントリのキーには、要求範囲の
+  - 日ごとの世代：u:{user_id}:{日付}（社員スコープ）/ d:{部署ID}:{日付}（部署スコープ）
+  - スコープ全体の世代：u:{user_id} / d:{部署ID}（所定労働時間・所属の変更）
+を埋め込んでおき、書き込み側は該当する世代を新しい値に差し替えるだけにする。
+勤務カレンダーの版は variant としてキーに含める（カレンダーの変更では世代を触らない）。
+打刻が入った (user, work_date) の日だけが外れるので、過去月のチーム集計はほぼ外れない。
+
+  - invalidate_days(keys)   … 打刻の登録（mark_days_dirty・単発打刻API）から
+  - invalidate_scopes(...)  … EmployeeProfile の変更（signals.py）から
+世代の差し替えはコミット後に行う（コミット前に差し替えると、別スレッドが旧データを
+新しい世代のキーで保存しうる）。コミット前に読まれた値は古い世代のキーに入るので二度と引かれない。
+世代キーが追い出された場合は新しい値を振り直すので、古いエントリが復活することはない。
+キャッシュの読み書きに失敗しても集計は続ける（キャッシュなしと同じ動作）。
+"""
+from __future__ import annotations
+
+import hashlib
+import traceback
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .directory import directory
+
+_PREFIX = "hr:sum"
+
+
+def _new_token() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _days(dfrom: date, dto: date) -> Iterable[date]:
+    d = dfrom
+    while d <= dto:
+        yield d
+        d += timedelta(days=1)
+
+
+class SummaryCache:
+    def __init__(self, alias: Optional[str], timeout: Optional[int] = None):
+        self.alias = alias
+        self.timeout = timeout
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.alias)
+
+    @property
+    def _cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def _scope(user_id: Optional[int], department_id: Optional[int]) -> str:
+        return f"d:{department_id}" if department_id is not None else f"u:{user_id}"
+
+    def _generations(self, keys: List[str]) -> Optional[Dict[str, str]]:
+        cache = self._cache
+        gens = cache.get_many(keys)
+        missing = [k for k in keys if k not in gens]
+        if missing:
+            # 初回（または追い出し後）は新しい世代を振る。同時に振られたら先着を使う
+            for k in missing:
+                cache.add(k, _new_token(), timeout=None)
+            gens.update(cache.get_many(missing))
+            if any(k not in gens for k in missing):
+                return None  # 保持できないバックエンド（DummyCache など）
+        return gens
+
+    # ---- 読み出し ----
+
+    def lookup(self, user_id: Optional[int], department_id: Optional[int],
+               dfrom: date, dto: date, granularity: str, variant: str = "") -> Tuple[Optional[str], Any]:
+        """(エントリのキー, キャッシュ済みの本文 or None)。キーが None なら保存しない"""
+        if not self.enabled:
+            return None, None
+        try:
+            scope = self._scope(user_id, department_id)
+            gen_keys = [f"{_PREFIX}:g:{scope}"] + [f"{_PREFIX}:g:{scope}:{d.isoformat()}" for d in _days(dfrom, dto)]
+            gens = self._generations(gen_keys)
+            if gens is None:
+                return None, None
+            h = hashlib.blake2b(digest_size=16)
+            for part in (scope, dfrom.isoformat(), dto.isoformat(), granularity, variant,
+                         *(gens[k] for k in gen_keys)):
+                h.update(part.encode("utf-8"))
+                h.update(b"\x00")
+            key = f"{_PREFIX}:e:{h.hexdigest()}"
+            return key, self._cache.get(key)
+        except Exception:
+            print(traceback.format_exc())
+            return None, None
+
+    def store(self, key: Optional[str], body: Any) -> None:
+        if key is None:
+            return
+        try:
+            self._cache.set(key, body, timeout=self.timeout)
+        except Exception:
+            print(traceback.format_exc())
+
+    async def alookup(self, user_id: Optional[int], department_id: Optional[int],
+                      dfrom: date, dto: date, granularity: str, variant: str = "") -> Tuple[Optional[str], Any]:
+        return await sync_to_async(self.lookup)(user_id, department_id, dfrom, dto, granularity, variant)
+
+    async def astore(self, key: Optional[str], body: Any) -> None:
+        await sync_to_async(self.store)(key, body)
+
+    # ---- 無効化 ----
+
+    def _bump(self, gen_keys: Iterable[str]) -> None:
+        gen_keys = set(gen_keys)
+        if not self.enabled or not gen_keys:
+            return
+
+        def run():
+            try:
+                self._cache.set_many({k: _new_token() for k in gen_keys}, timeout=None)
+            except Exception:
+                print(traceback.format_exc())
+        transaction.on_commit(run)
+
+    def invalidate_days(self, keys: Iterable[Tuple[int, date]]) -> None:
+        """(user_id, work_date) に打刻が入った：その社員と現在の所属部署のその日を外す"""
+        keys = set(keys)
+        if not self.enabled or not keys:
+            return
+        entries = directory.get_many({uid for uid, _ in keys})
+        gen_keys = []
+        for uid, d in keys:
+            gen_keys.append(f"{_PREFIX}:g:u:{uid}:{d.isoformat()}")
+            entry = entries.get(uid)
+            if entry is not None and entry.department_id is not None:
+                gen_keys.append(f"{_PREFIX}:g:d:{entry.department_id}:{d.isoformat()}")
+        self._bump(gen_keys)
+
+    def invalidate_scopes(self, user_ids: Iterable[int] = (), department_ids: Iterable[Optional[int]] = ()) -> None:
+        """社員・部署のスコープ全体（全期間）を外す"""
+        self._bump(
+            [f"{_PREFIX}:g:u:{uid}" for uid in user_ids]
+            + [f"{_PREFIX}:g:d:{dept}" for dept in department_ids if dept is not None]
+        )
+
+
+summary_cache = SummaryCache(
+    getattr(settings, "HR_SUMMARY_CACHE", None),
+    timeout=getattr(settings, "HR_SUMMARY_CACHE_TIMEOUT", 7 * 24 * 3600),
+)
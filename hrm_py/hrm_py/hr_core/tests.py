@@ -1,3 +1,1129 @@
-from django.test import TestCase
+import asyncio
+import base64
+from collections import defaultdict
+import json
+import os
+import tempfile
+from io import StringIO
+from datetime import date, datetime, timedelta
+from unittest import mock, skipUnless
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from attendance import batch
+
+from . import renderers, views_async
+from .compression import CompressionMiddleware
+from .conditional import is_not_modified
+from .directory import directory
+from .fast_serialize import PUNCH_FIELDS, punch_list, punch_page
+from .local_cache import LocalCache
+from .models_attendance import (
+    AttendancePunch,
+    AttendanceRollup,
+    AttendanceState,
+    CalendarKind,
+    DailyAttendanceSummary,
+    PunchType,
+    WorkCalendar,
+    WorkState,
+)
+from .models_hr import Department, EmployeeProfile, Position
+from .models_requests import OvertimeRequest
+from .roles import HR_ADMIN_GROUP, resolver
+from .serializers_attendance import AttendancePunchSerializer, AttendanceStateSerializer
+from .services_attendance import (
+    PunchTransitionError,
+    ROLLUP_FIELDS,
+    advance_state,
+    apply_punch_state,
+    correct_punch,
+    mark_days_dirty,
+    period_start,
+    rebuild_attendance_states,
+    refresh_daily_summary,
+    refresh_dirty_days,
+)
+from .summary_cache import summary_cache
+from .views_presence import presence_stream
+from .work_calendar import CalendarSnapshot, work_calendar
+
+JST = ZoneInfo("Asia/Tokyo")
+DAY = date(2025, 10, 6)
+
+
+def at(d: date, hour: int, minute: int = 0) -> datetime:
+    return datetime(d.year, d.month, d.day, hour, minute, tzinfo=JST)
+
+
+class ApiTestCase(TestCase):
+    """プロセス内キャッシュ（社員名簿・ロール・カレンダー）はテストのロールバックで戻らないので毎回空にする"""
+
+    def setUp(self):
+        directory.clear()
+        resolver.clear()
+        work_calendar.clear()
+
+    def client_for(self, user) -> APIClient:
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+
+class AdvanceStateTests(TestCase):
+    """TRANSITIONS の各遷移と、受け付けない組み合わせ"""
+
+    def state(self, st=WorkState.OFF, since=None, open_work_date=None):
+        return AttendanceState(state=st, since=since, open_work_date=open_work_date)
+
+    def test_accepted_transitions(self):
+        cases = [
+            (WorkState.OFF, PunchType.IN, WorkState.WORKING),
+            (WorkState.WORKING, PunchType.BREAK_START, WorkState.ON_BREAK),
+            (WorkState.ON_BREAK, PunchType.BREAK_END, WorkState.WORKING),
+            (WorkState.WORKING, PunchType.OUT, WorkState.OFF),
+        ]
+        for current, ptype, expected in cases:
+            with self.subTest(state=current, punch=ptype):
+                open_date = DAY if current != WorkState.OFF else None
+                st = advance_state(self.state(current, at(DAY, 9), open_date), ptype, at(DAY, 12), DAY)
+                self.assertEqual(st.state, expected)
+                self.assertEqual(st.since, at(DAY, 12))
+                self.assertEqual(st.open_work_date, None if expected == WorkState.OFF else DAY)
+
+    def test_rejected_transitions(self):
+        cases = [
+            (WorkState.OFF, PunchType.OUT),
+            (WorkState.OFF, PunchType.BREAK_START),
+            (WorkState.OFF, PunchType.BREAK_END),
+            (WorkState.WORKING, PunchType.IN),
+            (WorkState.WORKING, PunchType.BREAK_END),
+            (WorkState.ON_BREAK, PunchType.IN),
+            (WorkState.ON_BREAK, PunchType.BREAK_START),
+            (WorkState.ON_BREAK, PunchType.OUT),
+        ]
+        for current, ptype in cases:
+            with self.subTest(state=current, punch=ptype):
+                open_date = DAY if current != WorkState.OFF else None
+                st = self.state(current, at(DAY, 9), open_date)
+                with self.assertRaises(PunchTransitionError) as ctx:
+                    advance_state(st, ptype, at(DAY, 12), DAY)
+                self.assertEqual(ctx.exception.state, current)
+                self.assertEqual(st.state, current)
+
+    def test_rejects_punch_before_last_punch(self):
+        st = self.state(WorkState.WORKING, at(DAY, 9), DAY)
+        with self.assertRaises(PunchTransitionError):
+            advance_state(st, PunchType.OUT, at(DAY, 8), DAY)
+
+    def test_open_shift_from_earlier_day_is_closed(self):
+        for current in (WorkState.WORKING, WorkState.ON_BREAK):
+            with self.subTest(state=current):
+                st = self.state(current, at(DAY, 9), DAY)
+                nxt = DAY + timedelta(days=1)
+                advance_state(st, PunchType.IN, at(nxt, 9), nxt)
+                self.assertEqual(st.state, WorkState.WORKING)
+                self.assertEqual(st.open_work_date, nxt)
+                self.assertEqual(st.missed_out_date, DAY)
+
+    def test_out_on_later_day_is_rejected(self):
+        st = self.state(WorkState.WORKING, at(DAY, 9), DAY)
+        nxt = DAY + timedelta(days=1)
+        with self.assertRaises(PunchTransitionError) as ctx:
+            advance_state(st, PunchType.OUT, at(nxt, 9), nxt)
+        self.assertEqual(ctx.exception.state, WorkState.OFF)
+
+
+class PunchApiTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.user = User.objects.create_user("emp", password="x")
+        self.hr = User.objects.create_user("hr", password="x", is_staff=True)
+        self.client = self.client_for(self.user)
+
+    def punch(self, ptype, when):
+        return self.client.post("/api/attendance/punch", {"type": ptype, "punched_at": when.isoformat()},
+                                format="json")
+
+    def test_double_in_is_409(self):
+        self.assertEqual(self.punch(PunchType.IN, at(DAY, 9)).status_code, 201)
+        res = self.punch(PunchType.IN, at(DAY, 10))
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.json()["state"], WorkState.WORKING)
+
+    def test_forgotten_out_does_not_block_next_day(self):
+        self.assertEqual(self.punch(PunchType.IN, at(DAY, 9)).status_code, 201)
+        nxt = DAY + timedelta(days=1)
+        self.assertEqual(self.punch(PunchType.IN, at(nxt, 9)).status_code, 201)
+        state = AttendanceState.objects.get(user=self.user)
+        self.assertEqual((state.state, state.open_work_date, state.missed_out_date),
+                         (WorkState.WORKING, nxt, DAY))
+
+    def test_correction_requires_hr(self):
+        res = self.client.post("/api/attendance/punches/correct",
+                               {"type": PunchType.OUT, "punched_at": at(DAY, 18).isoformat(), "user_id": self.user.pk},
+                               format="json")
+        self.assertEqual(res.status_code, 403)
+
+    def test_hr_correction_closes_missed_day(self):
+        self.punch(PunchType.IN, at(DAY, 9))
+        nxt = DAY + timedelta(days=1)
+        self.punch(PunchType.IN, at(nxt, 9))
+
+        res = self.client_for(self.hr).post(
+            "/api/attendance/punches/correct",
+            {"type": PunchType.OUT, "punched_at": at(DAY, 18).isoformat(), "user_id": self.user.pk}, format="json",
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["state"]["state"], WorkState.WORKING)
+        self.assertIsNone(res.json()["state"]["missed_out_date"])
+        self.assertEqual(DailyAttendanceSummary.objects.get(user=self.user, work_date=DAY).work_minutes, 9 * 60)
+        # 修正後も当日の勤務は続いている
+        self.assertEqual(self.punch(PunchType.OUT, at(nxt, 18)).status_code, 201)
+
+    def test_correct_punch_rebuilds_state_from_history(self):
+        self.punch(PunchType.IN, at(DAY, 9))
+        self.punch(PunchType.OUT, at(DAY, 18))
+        # 遡った休憩の追加：状態は最終打刻（退勤）のまま
+        correct_punch(self.user.pk, PunchType.BREAK_START, at(DAY, 12))
+        correct_punch(self.user.pk, PunchType.BREAK_END, at(DAY, 13))
+        state = AttendanceState.objects.get(user=self.user)
+        self.assertEqual(state.state, WorkState.OFF)
+        self.assertEqual(AttendancePunch.objects.filter(user=self.user, work_date=DAY).count(), 4)
+        self.assertEqual(DailyAttendanceSummary.objects.get(user=self.user, work_date=DAY).work_minutes, 8 * 60)
+
+    def test_rebuild_clears_missed_out_but_correction_keeps_other_days(self):
+        nxt = DAY + timedelta(days=1)
+        self.punch(PunchType.IN, at(DAY, 9))
+        self.punch(PunchType.IN, at(nxt, 9))
+        # 別の日の修正では DAY の退勤漏れは残る
+        _, state = correct_punch(self.user.pk, PunchType.BREAK_START, at(nxt, 12))
+        self.assertEqual(state.missed_out_date, DAY)
+        self.assertEqual(AttendanceState.objects.get(user=self.user).missed_out_date, DAY)
+        # 取込後などの作り直しでは消える
+        rebuild_attendance_states([self.user.pk])
+        state = AttendanceState.objects.get(user=self.user)
+        self.assertEqual((state.state, state.missed_out_date), (WorkState.ON_BREAK, None))
+
+
+class MatrixApiTests(ApiTestCase):
+    URL = "/api/attendance/matrix?from=2025-10-01&to=2025-10-07"
+
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.sales = Department.objects.create(name="営業")
+        self.dev = Department.objects.create(name="開発")
+        self.manager = User.objects.create_user("mgr")
+        self.member = User.objects.create_user("member")
+        EmployeeProfile.objects.create(user=self.manager, employee_code="E1", department=self.sales, is_manager=True)
+        EmployeeProfile.objects.create(user=self.member, employee_code="E2", department=self.sales)
+
+    def test_manager_gets_own_department(self):
+        res = self.client_for(self.manager).get(f"{self.URL}&department={self.sales.pk}")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(sorted(res.json()["employee_codes"]), ["E1", "E2"])
+        self.assertEqual(len(res.json()["work_minutes"]), 2 * 7)
+
+    def test_manager_of_other_department_is_403(self):
+        res = self.client_for(self.manager).get(f"{self.URL}&department={self.dev.pk}")
+        self.assertEqual(res.status_code, 403)
+
+    def test_non_manager_department_is_403(self):
+        res = self.client_for(self.member).get(f"{self.URL}&department={self.sales.pk}")
+        self.assertEqual(res.status_code, 403)
+
+    def test_non_numeric_department_is_400(self):
+        res = self.client_for(self.manager).get(f"{self.URL}&department=sales")
+        self.assertEqual(res.status_code, 400)
+
+    def test_without_department_returns_own_row(self):
+        res = self.client_for(self.member).get(self.URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["user_ids"], [self.member.pk])
+
+
+class PunchBatchTests(ApiTestCase):
+    URL = "/api/attendance/punches/batch"
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("terminal")
+        self.client = self.client_for(self.user)
+        self.batch = {"punches": [
+            {"type": PunchType.IN, "punched_at": at(DAY, 9).isoformat()},
+            {"type": PunchType.BREAK_START, "punched_at": at(DAY, 12).isoformat()},
+            {"type": PunchType.BREAK_END, "punched_at": at(DAY, 13).isoformat()},
+            {"type": PunchType.OUT, "punched_at": at(DAY, 18).isoformat()},
+        ]}
+
+    def test_replayed_batch_is_duplicate(self):
+        first = self.client.post(self.URL, self.batch, format="json").json()
+        self.assertEqual((first["created"], first["duplicate"], first["error"]), (4, 0, 0))
+
+        again = self.client.post(self.URL, self.batch, format="json").json()
+        self.assertEqual((again["created"], again["duplicate"], again["error"]), (0, 4, 0))
+        self.assertEqual([r["id"] for r in again["results"]], [r["id"] for r in first["results"]])
+        self.assertEqual(AttendancePunch.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(AttendanceState.objects.get(user=self.user).state, WorkState.OFF)
+
+    def test_duplicate_within_batch(self):
+        punches = self.batch["punches"]
+        res = self.client.post(self.URL, {"punches": punches[:1] + punches[:1] + punches[1:]}, format="json").json()
+        self.assertEqual((res["created"], res["duplicate"], res["error"]), (4, 1, 0))
+        self.assertEqual(res["results"][0]["id"], res["results"][1]["id"])
+        self.assertEqual(AttendancePunch.objects.filter(user=self.user).count(), 4)
+
+    def test_partial_replay_appends_only_new_punches(self):
+        punches = self.batch["punches"]
+        self.client.post(self.URL, {"punches": punches[:2]}, format="json")
+        res = self.client.post(self.URL, self.batch, format="json").json()
+        self.assertEqual((res["created"], res["duplicate"], res["error"]), (2, 2, 0))
+        self.assertEqual(AttendancePunch.objects.filter(user=self.user).count(), 4)
+
+
+def cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+class RequestPaginationTests(ApiTestCase):
+    URL = "/api/requests/overtime/"
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("req", is_staff=True)
+        self.client = self.client_for(self.user)
+        start = at(DAY, 18)
+        self.ids = [OvertimeRequest.objects.create(user=self.user, start_datetime=start,
+                                                   end_datetime=start + timedelta(hours=1)).pk
+                    for _ in range(7)]
+        # 同じ created_at を並べて (created_at, id) のタイブレークを確かめる
+        OvertimeRequest.objects.filter(pk__in=self.ids[:5]).update(created_at=at(DAY, 12))
+        OvertimeRequest.objects.filter(pk__in=self.ids[5:]).update(created_at=at(DAY, 13))
+        self.expected = self.ids[5:][::-1] + self.ids[:5][::-1]  # 新しい順、同時刻は id の降順
+
+    def test_without_cursor_returns_bare_list(self):
+        res = self.client.get(self.URL)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([r["id"] for r in res.json()], self.expected)
+
+    def test_pages_cover_ties_once_in_order(self):
+        seen, url, pages = [], f"{self.URL}?page_size=2", []
+        while url:
+            body = self.client.get(url).json()
+            pages.append(body)
+            seen += [r["id"] for r in body["results"]]
+            url = body["next"]
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 4)
+
+        back = self.client.get(pages[2]["previous"]).json()
+        self.assertEqual([r["id"] for r in back["results"]], [r["id"] for r in pages[1]["results"]])
+
+    def test_tampered_cursor_is_404(self):
+        for token in ("%%%", "not-base64!", cursor({"a": 1}), cursor(["yesterday", 1, 0]),
+                      cursor([[1], 1, 0]), cursor(["2025-10-06T12:00:00+09:00", "x", 0])):
+            with self.subTest(token=token):
+                res = self.client.get(self.URL, {"cursor": token})
+                self.assertEqual(res.status_code, 404)
+
+    def test_punch_cursor_with_bad_timestamp_is_404(self):
+        res = self.client.get("/api/attendance/my",
+                              {"from": "2025-10-01", "to": "2025-10-31", "cursor": cursor(["noon", 1, 0])})
+        self.assertEqual(res.status_code, 404)
+
+
+class ExportScopeTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.hr = get_user_model().objects.create_user("hr-export", is_staff=True)
+        self.client = self.client_for(self.hr)
+
+    def test_non_numeric_scope_is_400(self):
+        for url in ("/api/attendance/export.csv", "/api/attendance/summary.csv"):
+            for params in ({"user_id": "abc"}, {"department": "sales"}, {"user_id": "-1"}):
+                with self.subTest(url=url, params=params):
+                    res = self.client.get(url, {"from": "2025-10-01", "to": "2025-10-31", **params})
+                    self.assertEqual(res.status_code, 400)
+
+    def test_numeric_scope_streams_csv(self):
+        res = self.client.get("/api/attendance/export.csv",
+                              {"from": "2025-10-01", "to": "2025-10-31", "user_id": str(self.hr.pk)})
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(b"".join(res.streaming_content).decode("utf-8-sig").startswith("employee_code,"))
+
+
+class ImportPunchesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_user("imported")
+        EmployeeProfile.objects.create(user=user, employee_code="E100")
+        self.user = user
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("employee_code,punched_at,type,note\n"
+                    "E100,2025-10-06 09:00:00,IN,\n"
+                    "E100,2025-10-06 18:00:00,OUT,\n"
+                    "E999,2025-10-06 09:00:00,IN,\n")
+        self.addCleanup(os.remove, self.path)
+
+    def run_import(self, *args) -> str:
+        out = StringIO()
+        call_command("import_punches", self.path, *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_reports_validated_rows_without_inserting(self):
+        out = self.run_import("--dry-run")
+        self.assertIn("検証OK 2", out)
+        self.assertNotIn("登録 2", out)
+        self.assertFalse(AttendancePunch.objects.filter(user=self.user).exists())
+
+    def test_import_inserts_rows(self):
+        out = self.run_import()
+        self.assertIn("登録 2", out)
+        self.assertIn("除外 1", out)
+        self.assertEqual(AttendancePunch.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(AttendanceState.objects.get(user=self.user).state, WorkState.OFF)
+
+
+class SummaryScopeTests(ApiTestCase):
+    """/summary の user_id / department の検証（同期版・async 版とも）"""
+
+    URLS = ("/api/attendance/summary", "/api/async/attendance/summary")
+
+    def setUp(self):
+        super().setUp()
+        self.hr = get_user_model().objects.create_user("hr-summary", is_staff=True)
+        self.client.force_login(self.hr)
+
+    def get(self, url, **params):
+        return self.client.get(url, {"from": "2025-10-01", "to": "2025-10-31", **params})
+
+    def test_malformed_ids_are_400(self):
+        for url in self.URLS:
+            for params in ({"user_id": "abc"}, {"department": "x"}, {"user_id": "0"}):
+                with self.subTest(url=url, params=params):
+                    self.assertEqual(self.get(url, **params).status_code, 400)
+
+    def test_unknown_user_is_404(self):
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url, user_id="999999").status_code, 404)
+
+    def test_known_user_and_department(self):
+        dept = Department.objects.create(name="総務")
+        for url in self.URLS:
+            with self.subTest(url=url):
+                self.assertEqual(self.get(url, user_id=str(self.hr.pk)).status_code, 200)
+                self.assertEqual(self.get(url, department=str(dept.pk)).status_code, 200)
+
+
+class RollupMaintenanceTests(ApiTestCase):
+    """refresh_daily_summary の差分更新が、日次サマリから作り直したロールアップと一致する"""
+
+    def setUp(self):
+        super().setUp()
+        self.dept_a = Department.objects.create(name="A")
+        self.dept_b = Department.objects.create(name="B")
+        self.user = get_user_model().objects.create_user("rollup")
+        self.profile = EmployeeProfile.objects.create(user=self.user, employee_code="R1", department=self.dept_a)
+
+    def add_day(self, d: date, start: int, end: int, break_minutes: int = 60):
+        punches = [(PunchType.IN, at(d, start)), (PunchType.OUT, at(d, end))]
+        if break_minutes:
+            punches += [(PunchType.BREAK_START, at(d, 12)), (PunchType.BREAK_END, at(d, 12) + timedelta(minutes=break_minutes))]
+        for ptype, when in punches:
+            AttendancePunch.objects.create(user=self.user, punch_type=ptype, punched_at=when, work_date=d)
+        self.refresh(d)
+
+    def refresh(self, d: date):
+        with transaction.atomic():
+            refresh_daily_summary(self.user.pk, d)
+
+    def assertRollupsMatchDaily(self):
+        expected = defaultdict(lambda: dict.fromkeys(ROLLUP_FIELDS, 0))
+        for row in DailyAttendanceSummary.objects.filter(is_dirty=False):
+            values = {"work_minutes": row.work_minutes, "break_minutes": row.break_minutes,
+                      "overtime_minutes": row.overtime_minutes, "working_days": 1 if row.work_minutes else 0}
+            for period in ("WEEK", "MONTH"):
+                pstart = period_start(period, row.work_date)
+                owners = [(row.user_id, None)] + ([(None, row.department_id)] if row.department_id else [])
+                for owner in owners:
+                    for k, v in values.items():
+                        expected[(period, pstart, *owner)][k] += v
+        actual = {
+            (r.period, r.period_start, r.user_id, r.department_id): {k: getattr(r, k) for k in ROLLUP_FIELDS}
+            for r in AttendanceRollup.objects.all()
+        }
+        expected = {k: v for k, v in expected.items() if any(v.values())}
+        actual = {k: v for k, v in actual.items() if any(v.values())}
+        self.assertEqual(actual, expected)
+
+    def test_rollups_follow_inserts_and_edits(self):
+        # 月・週の境界をまたぐ日
+        for d in (date(2025, 9, 29), date(2025, 9, 30), date(2025, 10, 1), date(2025, 10, 6)):
+            self.add_day(d, 9, 19)
+        self.assertRollupsMatchDaily()
+        # 既存の日を直す（退勤を早める → 減算と加算）
+        AttendancePunch.objects.filter(user=self.user, work_date=date(2025, 9, 30), punch_type=PunchType.OUT) \
+            .update(punched_at=at(date(2025, 9, 30), 15))
+        self.refresh(date(2025, 9, 30))
+        self.assertRollupsMatchDaily()
+        # 打刻を全部消す（行ごと減算）
+        AttendancePunch.objects.filter(user=self.user, work_date=date(2025, 10, 1)).delete()
+        self.refresh(date(2025, 10, 1))
+        self.assertFalse(DailyAttendanceSummary.objects.filter(user=self.user, work_date=date(2025, 10, 1)).exists())
+        self.assertRollupsMatchDaily()
+
+    def test_department_change_moves_contribution(self):
+        d = date(2025, 10, 7)
+        self.add_day(d, 9, 18)
+        self.profile.department = self.dept_b
+        self.profile.save()  # signals で社員名簿のキャッシュが外れる
+        self.refresh(d)
+        self.assertEqual(DailyAttendanceSummary.objects.get(user=self.user, work_date=d).department_id, self.dept_b.pk)
+        a_week = AttendanceRollup.objects.get(department=self.dept_a, period="WEEK", period_start=period_start("WEEK", d))
+        self.assertEqual((a_week.work_minutes, a_week.working_days), (0, 0))
+        self.assertRollupsMatchDaily()
+
+    def summaries(self):
+        return {
+            r.work_date: (r.department_id, r.work_minutes, r.break_minutes, r.overtime_minutes, r.first_in,
+                          r.last_out, r.punch_count, r.notes, r.is_dirty)
+            for r in DailyAttendanceSummary.objects.filter(user=self.user)
+        }
+
+    def check_bulk_refresh(self):
+        days = [date(2025, 9, 1) + timedelta(days=i) for i in range(30)]
+        for i, d in enumerate(days):
+            self.add_day(d, 9, 18 + i % 3, break_minutes=(0, 45, 60)[i % 3])
+        # 打刻を消す日・二重IN・勤務の外へはみ出す休憩・備考を作り、部署も移してから全日を dirty にする
+        AttendancePunch.objects.filter(user=self.user, work_date=days[0]).delete()
+        AttendancePunch.objects.create(user=self.user, punch_type=PunchType.IN, punched_at=at(days[1], 10),
+                                       work_date=days[1])
+        AttendancePunch.objects.create(user=self.user, punch_type=PunchType.BREAK_START, punched_at=at(days[2], 19),
+                                       work_date=days[2])
+        AttendancePunch.objects.create(user=self.user, punch_type=PunchType.BREAK_END, punched_at=at(days[2], 21),
+                                       work_date=days[2], note="残業後に休憩")
+        self.profile.department = self.dept_b
+        self.profile.save()
+        mark_days_dirty((self.user.pk, d) for d in days)
+
+        # 閾値を超えるので1日ずつの経路は通らない
+        with mock.patch("hr_core.services_attendance.refresh_daily_summary", side_effect=AssertionError):
+            self.assertEqual(refresh_dirty_days(days[0], days[-1]), len(days))
+        bulk = self.summaries()
+        self.assertNotIn(days[0], bulk)
+        self.assertEqual(bulk[days[2]][7], ["残業後に休憩"])
+        self.assertRollupsMatchDaily()
+
+        # 1日ずつ再計算しても値は変わらない
+        for d in days:
+            self.refresh(d)
+        self.assertEqual(self.summaries(), bulk)
+        self.assertRollupsMatchDaily()
+
+    @override_settings(ATTENDANCE_BULK_ENGINE="sql")
+    def test_bulk_refresh_sql_matches_per_day(self):
+        self.check_bulk_refresh()
+
+    @skipUnless(batch.is_available(), "numpy is not installed")
+    @override_settings(ATTENDANCE_BULK_ENGINE="numpy")
+    def test_bulk_refresh_numpy_matches_per_day(self):
+        self.check_bulk_refresh()
+
+
+class RenderingTests(ApiTestCase):
+    """応答本文のエンコード（ORJSONRenderer）と圧縮（CompressionMiddleware）"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("render")
+        notes = ["", "直行\u2028客先", "段落\u2029終わり", "quote \" & </script>"]
+        for i in range(40):
+            AttendancePunch.objects.create(user=self.user, punch_type=PunchType.IN, work_date=DAY,
+                                           punched_at=at(DAY, 9) + timedelta(minutes=i, microseconds=i * 1001),
+                                           note=notes[i % len(notes)])
+        AttendanceState.objects.create(user=self.user, state=WorkState.WORKING, since=at(DAY, 9), open_work_date=DAY)
+
+    @skipUnless(renderers.orjson is not None, "orjson is not installed")
+    def test_orjson_matches_drf_json_renderer(self):
+        payload = {
+            "results": AttendancePunchSerializer(AttendancePunch.objects.filter(user=self.user), many=True).data,
+            "state": AttendanceStateSerializer(AttendanceState.objects.get(user=self.user)).data,
+            "count": 40,
+            "empty": [],
+            "nothing": None,
+        }
+        for media_type in (None, "application/json", "application/json; indent=4"):
+            with self.subTest(media_type=media_type):
+                fast = renderers.ORJSONRenderer().render(payload, media_type)
+                self.assertEqual(fast, JSONRenderer().render(payload, media_type))
+        self.assertIn(b"\\u2028", fast)
+        self.assertNotIn("\u2028".encode(), fast)
+
+    def test_compress_min_bytes_is_read_per_request(self):
+        client = self.client_for(self.user)
+        params = {"from": "2025-10-01", "to": "2025-10-31"}
+        with override_settings(HR_COMPRESS_MIN_BYTES=10 ** 6):
+            res = client.get("/api/attendance/my", params, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(res.has_header("Content-Encoding"))
+        with override_settings(HR_COMPRESS_MIN_BYTES=16):
+            res = client.get("/api/attendance/my", params, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+
+    def test_fast_serialize_matches_serializer_bytes(self):
+        # 秒ちょうど（マイクロ秒 0）と秒未満あり、サマータイム期間（1948〜1951年）の日時を混ぜる
+        AttendancePunch.objects.create(user=self.user, punch_type=PunchType.OUT, work_date=date(1950, 7, 1),
+                                       punched_at=datetime(1950, 7, 1, 18, 0, 0, 123456, tzinfo=JST))
+        qs = AttendancePunch.objects.filter(user=self.user).order_by("punched_at", "id")
+        self.assertEqual({p.punched_at.microsecond == 0 for p in qs}, {True, False})
+        for fmt in ("%Y-%m-%d %H:%M:%S", "iso-8601", "%Y/%m/%d %H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S%z"):
+            for tz in ("Asia/Tokyo", "UTC", "America/New_York"):
+                drf = {**settings.REST_FRAMEWORK, "DATETIME_FORMAT": fmt}
+                with self.subTest(fmt=fmt, tz=tz), override_settings(REST_FRAMEWORK=drf), timezone.override(tz):
+                    expected = JSONRenderer().render(AttendancePunchSerializer(qs, many=True).data)
+                    self.assertEqual(JSONRenderer().render(punch_list(qs)), expected)
+                    self.assertEqual(JSONRenderer().render(punch_page(qs.values(*PUNCH_FIELDS))), expected)
+
+
+class SummaryCacheTests(ApiTestCase):
+    """集計キャッシュの世代キー：打刻・修正・所属変更で該当スコープだけが外れる"""
+    OCT = (date(2025, 10, 1), date(2025, 10, 31))
+    SEP = (date(2025, 9, 1), date(2025, 9, 30))
+
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.dept_a = Department.objects.create(name="A")
+        self.dept_b = Department.objects.create(name="B")
+        self.a = User.objects.create_user("cache_a")
+        self.b = User.objects.create_user("cache_b")
+        self.profile_a = EmployeeProfile.objects.create(user=self.a, employee_code="CA", department=self.dept_a)
+        EmployeeProfile.objects.create(user=self.b, employee_code="CB", department=self.dept_b)
+        self.hr = self.client_for(User.objects.create_user("cache_hr", is_staff=True))
+        self.scopes = {
+            "user_a": ({"user_id": self.a.pk}, self.OCT),
+            "user_a_sep": ({"user_id": self.a.pk}, self.SEP),
+            "user_b": ({"user_id": self.b.pk}, self.OCT),
+            "dept_a": ({"department": self.dept_a.pk}, self.OCT),
+            "dept_b": ({"department": self.dept_b.pk}, self.OCT),
+        }
+        for params, (dfrom, dto) in self.scopes.values():
+            res = self.hr.get("/api/attendance/summary", {"from": dfrom.isoformat(), "to": dto.isoformat(), **params})
+            self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.cached(), set(self.scopes))
+
+    def cached(self):
+        """キャッシュに本文が残っているスコープ名"""
+        version = work_calendar.get().version
+        names = set()
+        for name, (params, (dfrom, dto)) in self.scopes.items():
+            _, body = summary_cache.lookup(params.get("user_id"), params.get("department"), dfrom, dto, "day",
+                                           variant=version)
+            if body is not None:
+                names.add(name)
+        return names
+
+    def test_punch_invalidates_user_and_department_days(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client_for(self.a).post("/api/attendance/punch",
+                                               {"type": PunchType.IN, "punched_at": at(DAY, 9).isoformat()},
+                                               format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.cached(), {"user_a_sep", "user_b", "dept_b"})
+
+    def test_correction_invalidates_only_that_scope(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.hr.post("/api/attendance/punches/correct",
+                               {"type": PunchType.OUT, "punched_at": at(DAY, 18).isoformat(), "user_id": self.b.pk},
+                               format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(self.cached(), {"user_a", "user_a_sep", "dept_a"})
+
+    def test_department_change_invalidates_both_departments(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile_a.department = self.dept_b
+            self.profile_a.save()
+        self.assertEqual(self.cached(), {"user_b"})
+
+    def test_unrelated_profile_edit_keeps_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile_a.employee_code = "CA2"
+            self.profile_a.save()
+        self.assertEqual(self.cached(), set(self.scopes))
+
+
+class ConditionalGetTests(ApiTestCase):
+    """/my・/summary の ETag と If-None-Match（304）"""
+    MY = "/api/attendance/my"
+    SUMMARY = "/api/attendance/summary"
+    PARAMS = {"from": "2025-10-01", "to": "2025-10-31"}
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("etag")
+        EmployeeProfile.objects.create(user=self.user, employee_code="ET1")
+        self.client = self.client_for(self.user)
+        self.punch(PunchType.IN, at(DAY, 9))
+        self.punch(PunchType.OUT, at(DAY, 18))
+
+    def punch(self, ptype, when):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post("/api/attendance/punch", {"type": ptype, "punched_at": when.isoformat()},
+                                   format="json")
+        self.assertEqual(res.status_code, 201)
+
+    def get(self, url, etag=None, **extra):
+        if etag is not None:
+            extra["HTTP_IF_NONE_MATCH"] = etag
+        return self.client.get(url, self.PARAMS, **extra)
+
+    def test_repeat_request_is_304(self):
+        for url in (self.MY, self.SUMMARY):
+            with self.subTest(url=url):
+                res = self.get(url)
+                self.assertEqual(res.status_code, 200)
+                etag = res["ETag"]
+                res = self.get(url, etag)
+                self.assertEqual(res.status_code, 304)
+                self.assertEqual(res["ETag"], etag)
+                # 強い形（W/ なし）で送っても弱い比較で一致する
+                self.assertEqual(self.get(url, etag[2:]).status_code, 304)
+
+    def test_new_punch_changes_etag(self):
+        etags = {url: self.get(url)["ETag"] for url in (self.MY, self.SUMMARY)}
+        self.punch(PunchType.IN, at(DAY + timedelta(days=1), 9))
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                res = self.get(url, etag)
+                self.assertEqual(res.status_code, 200)
+                self.assertNotEqual(res["ETag"], etag)
+
+    def test_dirty_day_refresh_changes_summary_etag(self):
+        etag = self.get(self.SUMMARY)["ETag"]
+        # 取込と同じく打刻を直接書き換えて dirty にする
+        AttendancePunch.objects.filter(user=self.user, punch_type=PunchType.OUT).update(punched_at=at(DAY, 20))
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_days_dirty([(self.user.pk, DAY)])
+        res = self.get(self.SUMMARY, etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+        row = DailyAttendanceSummary.objects.get(user=self.user, work_date=DAY)
+        self.assertEqual((row.is_dirty, row.work_minutes), (False, 11 * 60))
+        # 再計算後に付け直した ETag はそのまま使える
+        self.assertEqual(self.get(self.SUMMARY, res["ETag"]).status_code, 304)
+
+    def test_calendar_change_changes_summary_etag(self):
+        etag = self.get(self.SUMMARY)["ETag"]
+        WorkCalendar.objects.create(date=DAY, kind=CalendarKind.COMPANY_HOLIDAY, name="創立記念日")
+        res = self.get(self.SUMMARY, etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(self.get(self.SUMMARY, res["ETag"]).status_code, 304)
+
+    @override_settings(HR_COMPRESS_MIN_BYTES=16)
+    def test_weak_etag_matches_after_compression(self):
+        for i in range(30):
+            AttendancePunch.objects.create(user=self.user, punch_type=PunchType.BREAK_START, work_date=DAY,
+                                           punched_at=at(DAY, 10, i), note="打刻端末から")
+        res = self.get(self.MY, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        etag = res["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        res = self.get(self.MY, etag, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res.status_code, 304)
+        # 圧縮しない応答とも同じ検証子になる
+        self.assertEqual(self.get(self.MY, etag).status_code, 304)
+
+    def test_strong_etag_weakened_by_compression_still_matches(self):
+        factory = RequestFactory()
+        strong = '"abc123"'
+        middleware = CompressionMiddleware(lambda request: HttpResponse(b"x" * 4096, headers={"ETag": strong}))
+        res = middleware(factory.get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertEqual(res["ETag"], "W/" + strong)
+        # クライアントが弱い ETag を返してきても、元の強い ETag と弱い比較で一致する
+        self.assertTrue(is_not_modified(factory.get("/", HTTP_IF_NONE_MATCH=res["ETag"]), strong))
+
+
+class AsyncParityTests(ApiTestCase):
+    """
+    async 版（views_async）が同期版と同じ応答を返す。HR_ASYNC_READ_VIEWS=True で本来のパスに載せたときと同じく、
+    ETag（パスを含む）も比べられるよう、同じパスの要求で async 版のビューを直接呼ぶ
+    """
+    ASYNC_VIEWS = {
+        "/api/attendance/my": views_async.attendance_my,
+        "/api/attendance/summary": views_async.attendance_summary,
+        "/api/hr/me": views_async.hr_me,
+    }
+    RANGE = {"from": "2025-10-01", "to": "2025-10-31"}
+
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.dept = Department.objects.create(name="開発")
+        self.emp = User.objects.create_user("parity", first_name="太郎", last_name="勤怠")
+        EmployeeProfile.objects.create(user=self.emp, employee_code="P1", department=self.dept)
+        self.hr = User.objects.create_user("parity-hr", is_staff=True)
+        self.nobody = User.objects.create_user("parity-noprofile")
+        for d in (DAY, DAY + timedelta(days=1), DAY + timedelta(days=7)):
+            for ptype, when in ((PunchType.IN, at(d, 9)), (PunchType.BREAK_START, at(d, 12)),
+                                (PunchType.BREAK_END, at(d, 13)), (PunchType.OUT, at(d, 18, 30))):
+                AttendancePunch.objects.create(user=self.emp, punch_type=ptype, punched_at=when, work_date=d)
+            with transaction.atomic():
+                refresh_daily_summary(self.emp.pk, d)
+
+    @staticmethod
+    async def _anonymous():
+        return AnonymousUser()
+
+    def assertSameResponse(self, path, user=None, params=None, **headers):
+        if user is not None:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {AccessToken.for_user(user)}"
+        expected = self.client.get(path, params or {}, **headers)
+        # 同期版が載せた本文を引かずに async 版でも集計させる
+        caches[summary_cache.alias].clear()
+        request = RequestFactory().get(path, params or {}, **headers)
+        request.auser = self._anonymous
+        got = async_to_sync(self.ASYNC_VIEWS[path])(request)
+        self.assertEqual(got.status_code, expected.status_code)
+        self.assertEqual(got.content, expected.content)
+        for header in ("Content-Type", "ETag", "Cache-Control"):
+            self.assertEqual(got.get(header), expected.get(header), header)
+        return expected
+
+    def test_my(self):
+        for params in (self.RANGE, {**self.RANGE, "page_size": "3"}, {"from": "2025-10-07", "to": "2025-10-06"},
+                       {"from": "yesterday"}):
+            with self.subTest(params=params):
+                self.assertSameResponse("/api/attendance/my", self.emp, params)
+        etag = self.assertSameResponse("/api/attendance/my", self.emp, self.RANGE)["ETag"]
+        res = self.assertSameResponse("/api/attendance/my", self.emp, self.RANGE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_summary(self):
+        cases = [
+            (self.emp, self.RANGE),
+            (self.emp, {**self.RANGE, "granularity": "week"}),
+            (self.emp, {**self.RANGE, "granularity": "month"}),
+            (self.emp, {**self.RANGE, "user_id": str(self.hr.pk)}),  # 一般社員の指定は無視される
+            (self.hr, {**self.RANGE, "user_id": str(self.emp.pk)}),
+            (self.hr, {**self.RANGE, "department": str(self.dept.pk), "granularity": "week"}),
+            (self.hr, {**self.RANGE, "department": str(self.dept.pk)}),
+            (self.hr, {**self.RANGE, "user_id": "abc"}),
+            (self.hr, {**self.RANGE, "user_id": "999999"}),
+            (self.emp, {**self.RANGE, "granularity": "year"}),
+        ]
+        for user, params in cases:
+            with self.subTest(user=user.username, params=params):
+                self.assertSameResponse("/api/attendance/summary", user, params)
+
+        # dirty な日はどちらも再計算してから返す（更新時刻が変わるので ETag ではなく本文を比べる）
+        token = f"Bearer {AccessToken.for_user(self.emp)}"
+        mark_days_dirty([(self.emp.pk, DAY)])
+        expected = self.client.get("/api/attendance/summary", self.RANGE, HTTP_AUTHORIZATION=token)
+        mark_days_dirty([(self.emp.pk, DAY)])
+        caches[summary_cache.alias].clear()
+        request = RequestFactory().get("/api/attendance/summary", self.RANGE, HTTP_AUTHORIZATION=token)
+        got = async_to_sync(views_async.attendance_summary)(request)
+        self.assertEqual(got.content, expected.content)
+        self.assertFalse(DailyAttendanceSummary.objects.get(user=self.emp, work_date=DAY).is_dirty)
+
+        etag = self.assertSameResponse("/api/attendance/summary", self.emp, self.RANGE)["ETag"]
+        res = self.assertSameResponse("/api/attendance/summary", self.emp, self.RANGE, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+    def test_hr_me(self):
+        for user in (self.emp, self.hr, self.nobody):
+            with self.subTest(user=user.username):
+                self.assertSameResponse("/api/hr/me", user)
+
+    def test_permission_denied(self):
+        for path in self.ASYNC_VIEWS:
+            with self.subTest(path=path, auth="none"):
+                self.assertEqual(self.assertSameResponse(path, params=self.RANGE).status_code, 403)
+            with self.subTest(path=path, auth="bad token"):
+                res = self.assertSameResponse(path, params=self.RANGE, HTTP_AUTHORIZATION="Bearer not-a-token")
+                self.assertEqual(res.status_code, 403)
+
+
+class LocalCacheTests(SimpleTestCase):
+    def test_lru_ttl_and_none_values(self):
+        cache = LocalCache(maxsize=2, ttl=10)
+        cache.put_many({1: "a", 2: None}, now=0)
+        self.assertEqual(cache.lookup([2, 1, 3], now=5), ({1: "a", 2: None}, [3]))
+        cache.put(3, "c", now=5)  # 最も長く引かれていない 2 が追い出される
+        self.assertEqual(cache.lookup([1, 2, 3], now=6), ({1: "a", 3: "c"}, [2]))
+        self.assertEqual(cache.lookup([1, 3], now=11), ({3: "c"}, [1]))  # 1 は読み込みから10秒超
+        cache.invalidate([3])
+        self.assertIsNone(cache.get(3, now=11))
+
+
+class RoleCacheTests(ApiTestCase):
+    """HR_ADMIN グループの所属変更で、キャッシュ済みのロールが外れる（signals.group_membership_changed）"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user("role")
+        self.group = Group.objects.create(name=HR_ADMIN_GROUP)
+
+    def is_hr(self) -> bool:
+        return resolver.resolve(get_user_model().objects.get(pk=self.user.pk)).is_hr
+
+    def test_group_membership_invalidates_cached_role(self):
+        self.assertFalse(self.is_hr())
+        user = get_user_model().objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(resolver.resolve(user).is_hr)  # キャッシュから
+
+        changes = [
+            (lambda: self.user.groups.add(self.group), True),
+            (lambda: self.user.groups.remove(self.group), False),
+            (lambda: self.group.user_set.add(self.user), True),
+            (lambda: self.group.user_set.remove(self.user), False),
+            (lambda: self.user.groups.add(self.group), True),
+            (lambda: self.group.user_set.clear(), False),
+        ]
+        for change, expected in changes:
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertEqual(self.is_hr(), expected)
+
+
+class DirectoryInvalidationTests(ApiTestCase):
+    """プロフィール・部署・役職の変更で、社員ディレクトリが新しい値を返す（signals.py）"""
+
+    def setUp(self):
+        super().setUp()
+        self.dept = Department.objects.create(name="営業")
+        self.pos = Position.objects.create(name="主任")
+        self.user = get_user_model().objects.create_user("dir")
+        self.profile = EmployeeProfile.objects.create(user=self.user, employee_code="D1", department=self.dept,
+                                                      position=self.pos)
+        self.assertEqual(directory.get(self.user.pk).department.name, "営業")
+        with self.assertNumQueries(0):
+            directory.get(self.user.pk)  # キャッシュに載っている
+
+    def test_profile_change(self):
+        other = Department.objects.create(name="総務")
+        directory.get(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.department = other
+            self.profile.base_hours_per_day = 6
+            self.profile.save()
+        entry = directory.get(self.user.pk)
+        self.assertEqual((entry.department_id, entry.base_minutes), (other.pk, 360))
+
+    def test_department_and_position_rename(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dept.name = "営業一課"
+            self.dept.save()
+        self.assertEqual(directory.get(self.user.pk).department.name, "営業一課")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pos.name = "係長"
+            self.pos.save()
+        self.assertEqual(directory.get(self.user.pk).position.name, "係長")
+
+    def test_profile_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.delete()
+        self.assertIsNone(directory.get(self.user.pk))
+
+
+class PresenceTests(ApiTestCase):
+    """在席状況API（views_presence.py）。async ビューなのでセッション認証で叩く"""
+
+    def setUp(self):
+        super().setUp()
+        User = get_user_model()
+        self.dept = Department.objects.create(name="開発")
+        self.other_dept = Department.objects.create(name="経理")
+        self.manager = User.objects.create_user("boss")
+        EmployeeProfile.objects.create(user=self.manager, employee_code="M1", department=self.dept, is_manager=True)
+        self.worker = User.objects.create_user("worker")
+        EmployeeProfile.objects.create(user=self.worker, employee_code="E1", department=self.dept)
+        self.resting = User.objects.create_user("resting")
+        EmployeeProfile.objects.create(user=self.resting, employee_code="E2", department=self.dept)
+        self.retired = User.objects.create_user("retired")
+        EmployeeProfile.objects.create(user=self.retired, employee_code="E3", department=self.dept, status="RETIRED")
+        self.outsider = User.objects.create_user("outsider")
+        EmployeeProfile.objects.create(user=self.outsider, employee_code="X1", department=self.other_dept)
+        self.hr = User.objects.create_user("presence-hr", is_staff=True)
+        with transaction.atomic():
+            apply_punch_state(self.worker.pk, PunchType.IN, at(DAY, 9), DAY)
+            apply_punch_state(self.resting.pk, PunchType.IN, at(DAY, 9), DAY)
+            apply_punch_state(self.resting.pk, PunchType.BREAK_START, at(DAY, 12), DAY)
+            apply_punch_state(self.outsider.pk, PunchType.IN, at(DAY, 8), DAY)
+
+    def get(self, user, path="/api/attendance/presence", **params):
+        self.client.force_login(user)
+        return self.client.get(path, params)
+
+    def test_counts(self):
+        res = self.get(self.hr, department=self.dept.pk)
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual(body["department"], self.dept.pk)
+        # 退職者は数えず、状態行の無い社員は勤務外
+        self.assertEqual(body["counts"], {WorkState.OFF: 1, WorkState.WORKING: 1, WorkState.ON_BREAK: 1})
+        self.assertEqual([m["user_id"] for m in body["members"][WorkState.ON_BREAK]], [self.resting.pk])
+        self.assertEqual(body["members"][WorkState.ON_BREAK][0]["since"], "2025-10-06 12:00:00")
+        self.assertEqual(body["members"][WorkState.WORKING][0]["open_work_date"], DAY.isoformat())
+
+        # HR が部署を省略すると全社
+        body = self.get(self.hr).json()
+        self.assertIsNone(body["department"])
+        self.assertEqual(body["counts"], {WorkState.OFF: 1, WorkState.WORKING: 2, WorkState.ON_BREAK: 1})
+
+        # 管理職は省略時に自部署、他部署は見られない
+        self.assertEqual(self.get(self.manager).json()["department"], self.dept.pk)
+        self.assertEqual(self.get(self.manager, department=self.other_dept.pk).status_code, 403)
+        self.assertEqual(self.get(self.worker).status_code, 403)
+        self.assertEqual(self.get(self.hr, department="abc").status_code, 400)
+
+    def _punch(self, user, ptype, when):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                apply_punch_state(user.pk, ptype, when, DAY)
+
+    @override_settings(HR_PRESENCE_HEARTBEAT_SECONDS=0.2)
+    def test_stream_sends_one_event_per_punch(self):
+        self.client.force_login(self.manager)
+        response = self.client.get("/api/attendance/presence/stream")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream; charset=utf-8")
+        # テストクライアントは本文を読まないので、同じ条件でビューを直接呼び、1つのループで読み進める
+        request = RequestFactory().get("/api/attendance/presence/stream")
+        request.auser = lambda: self._user(self.manager)
+
+        async def read():
+            stream = (await presence_stream(request)).streaming_content
+            chunks = []
+
+            async def nxt():
+                chunks.append((await asyncio.wait_for(stream.__anext__(), timeout=5)).decode())
+                return chunks[-1]
+
+            try:
+                self.assertEqual(await nxt(), "retry: 3000\n\n")
+                self.assertTrue((await nxt()).startswith("event: snapshot\n"))
+                # 他部署の打刻は届かず、自部署の打刻は1回だけ届く（以降は heartbeat のみ）
+                await sync_to_async(self._punch)(self.outsider, PunchType.OUT, at(DAY, 17))
+                await sync_to_async(self._punch)(self.worker, PunchType.BREAK_START, at(DAY, 12, 30))
+                punch = await nxt()
+                self.assertEqual(await nxt(), ": ping\n\n")
+                self.assertEqual(await nxt(), ": ping\n\n")
+            finally:
+                await stream.aclose()
+            return punch
+
+        punch = async_to_sync(read)()
+        event, data = punch.rstrip("\n").split("\n")
+        self.assertEqual(event, "event: punch")
+        self.assertEqual(json.loads(data[len("data: "):]), {
+            "user_id": self.worker.pk, "department_id": self.dept.pk, "state": WorkState.ON_BREAK,
+            "since": "2025-10-06 12:30:00", "open_work_date": DAY.isoformat(),
+        })
+
+    @staticmethod
+    async def _user(user):
+        return user
+
+
+class CalendarSnapshotTests(SimpleTestCase):
+    """所定日数（scheduled_days）は週休日の掛け算とカレンダー行の補正で出す。1日ずつ数えた結果と一致する"""
+    SATURDAY = DAY + timedelta(days=5)
+
+    def snapshot(self, rows=()):
+        return CalendarSnapshot(rows, (5, 6))
+
+    def brute(self, snap, dfrom, dto):
+        return sum(snap.is_workday(dfrom + timedelta(days=i)) for i in range((dto - dfrom).days + 1))
+
+    def assertScheduled(self, snap, dfrom, dto, expected):
+        self.assertEqual(snap.scheduled_days(dfrom, dto), expected)
+        self.assertEqual(self.brute(snap, dfrom, dto), expected)
+
+    def test_company_workday_on_weekend(self):
+        snap = self.snapshot([(self.SATURDAY, CalendarKind.COMPANY_WORKDAY, "振替出勤")])
+        self.assertEqual(snap.day(self.SATURDAY).as_dict(),
+                         {"is_holiday": False, "holiday_name": "", "is_workday": True})
+        self.assertScheduled(snap, DAY, DAY + timedelta(days=6), 6)
+        self.assertScheduled(snap, self.SATURDAY, self.SATURDAY, 1)
+        self.assertScheduled(snap, DAY + timedelta(days=6), DAY + timedelta(days=20), 10)  # 範囲外
+
+    def test_company_holiday_on_weekday(self):
+        snap = self.snapshot([(DAY, CalendarKind.COMPANY_HOLIDAY, "創立記念日")])
+        self.assertEqual(snap.day(DAY).as_dict(),
+                         {"is_holiday": True, "holiday_name": "創立記念日", "is_workday": False})
+        self.assertScheduled(snap, DAY, DAY + timedelta(days=6), 4)
+        self.assertScheduled(snap, DAY, DAY, 0)
+        # 週休日に重なった休日は所定日数を減らさない
+        snap = self.snapshot([(self.SATURDAY, CalendarKind.COMPANY_HOLIDAY, "臨時休業")])
+        self.assertTrue(snap.day(self.SATURDAY).is_holiday)
+        self.assertScheduled(snap, DAY, DAY + timedelta(days=6), 5)
+
+    def test_mixed_ranges_match_day_by_day(self):
+        snap = self.snapshot([
+            (DAY, CalendarKind.COMPANY_HOLIDAY, "創立記念日"),
+            (DAY + timedelta(days=7), CalendarKind.NATIONAL_HOLIDAY, "スポーツの日"),
+            (self.SATURDAY, CalendarKind.COMPANY_WORKDAY, "振替出勤"),
+            (self.SATURDAY + timedelta(days=8), CalendarKind.COMPANY_WORKDAY, "棚卸"),
+        ])
+        start = DAY - timedelta(days=10)
+        for offset in range(0, 12):
+            for length in range(0, 30, 3):
+                dfrom = start + timedelta(days=offset)
+                dto = dfrom + timedelta(days=length)
+                with self.subTest(dfrom=dfrom, dto=dto):
+                    self.assertEqual(snap.scheduled_days(dfrom, dto), self.brute(snap, dfrom, dto))
+        self.assertEqual(snap.scheduled_days(DAY, DAY - timedelta(days=1)), 0)
+
+    def test_version_follows_content(self):
+        rows = [(DAY, CalendarKind.COMPANY_HOLIDAY, "創立記念日")]
+        self.assertEqual(self.snapshot(rows).version, self.snapshot(list(rows)).version)
+        self.assertNotEqual(self.snapshot(rows).version, self.snapshot().version)
+        self.assertNotEqual(self.snapshot(rows).version,
+                            self.snapshot([(DAY, CalendarKind.COMPANY_HOLIDAY, "休業日")]).version)
+        self.assertNotEqual(self.snapshot().version, CalendarSnapshot([], (6,)).version)
+
+
+class WorkCalendarIndexTests(ApiTestCase):
+    """WorkCalendar の保存・削除で索引が捨てられ、次の get() で version が変わる（signals.py）"""
+
+    def test_version_changes_on_save(self):
+        before = work_calendar.get()
+        with self.assertNumQueries(0):
+            self.assertIs(work_calendar.get(), before)
+        with self.captureOnCommitCallbacks(execute=True):
+            row = WorkCalendar.objects.create(date=DAY, kind=CalendarKind.COMPANY_HOLIDAY, name="創立記念日")
+        added = work_calendar.get()
+        self.assertNotEqual(added.version, before.version)
+        self.assertFalse(added.is_workday(DAY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            row.kind = CalendarKind.COMPANY_WORKDAY
+            row.save()
+        changed = work_calendar.get()
+        self.assertNotIn(changed.version, (before.version, added.version))
+        self.assertTrue(changed.is_workday(DAY))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+        self.assertEqual(work_calendar.get().version, before.version)
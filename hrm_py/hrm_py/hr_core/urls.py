@@ -1,4 +1,5 @@
 # hr_core/urls.py
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views_hr import HRMeView 
@@ -7,7 +8,27 @@ from .views_hr import HRMeView
 from .views_requests import OvertimeRequestViewSet, LeaveRequestViewSet
 
 # --- 勤怠関連（今回追加した本実装） ---
-from .views_attendance import AttendancePunchAPI, AttendanceMyAPI, AttendanceSummaryAPI
+from .views_attendance import (
+    AttendanceMyAPI,
+    AttendancePunchAPI,
+    AttendancePunchBatchAPI,
+    AttendancePunchCorrectionAPI,
+    AttendanceStateAPI,
+    AttendanceSummaryAPI,
+)
+from .views_dashboard import DashboardAPI
+from .views_export import (
+    AttendancePunchArrowExportAPI,
+    AttendancePunchExportAPI,
+    AttendanceSummaryArrowExportAPI,
+    AttendanceSummaryExportAPI,
+)
+from .views_matrix import AttendanceMatrixAPI
+from .views_presence import presence, presence_stream
+from . import views_async
+
+# HR_ASYNC_READ_VIEWS=True（ASGI で運用）なら読み取り系の本来のパスも async 版にする
+ASYNC_READ = getattr(settings, "HR_ASYNC_READ_VIEWS", False)
 
 # --- ルーター設定 ---
 router = DefaultRouter()
@@ -21,8 +42,35 @@ urlpatterns = [
 
     # 勤怠API（個別APIView）
     path("attendance/punch", AttendancePunchAPI.as_view(), name="attendance-punch"),
-    path("attendance/my", AttendanceMyAPI.as_view(), name="attendance-my"),
-    path("attendance/summary", AttendanceSummaryAPI.as_view(), name="attendance-summary"),
-    path("hr/me", HRMeView.as_view(), name="hr-me"), 
+    path("attendance/punches/batch", AttendancePunchBatchAPI.as_view(), name="attendance-punch-batch"),
+    path("attendance/punches/correct", AttendancePunchCorrectionAPI.as_view(), name="attendance-punch-correct"),
+    path("attendance/state", AttendanceStateAPI.as_view(), name="attendance-state"),
+    path("attendance/presence", presence, name="attendance-presence"),
+    path("attendance/presence/stream", presence_stream, name="attendance-presence-stream"),
+    path("attendance/my", views_async.attendance_my if ASYNC_READ else AttendanceMyAPI.as_view(),
+         name="attendance-my"),
+    path("attendance/summary", views_async.attendance_summary if ASYNC_READ else AttendanceSummaryAPI.as_view(),
+         name="attendance-summary"),
+    path("attendance/matrix", AttendanceMatrixAPI.as_view(), name="attendance-matrix"),
+    path("attendance/export.csv", AttendancePunchExportAPI.as_view(), name="attendance-export-csv"),
+    path("attendance/summary.csv", AttendanceSummaryExportAPI.as_view(), name="attendance-summary-csv"),
+    # 分析用（型付き列。pyarrow が必要）
+    path("attendance/export.parquet", AttendancePunchArrowExportAPI.as_view(), {"fmt": "parquet"},
+         name="attendance-export-parquet"),
+    path("attendance/export.arrow", AttendancePunchArrowExportAPI.as_view(), {"fmt": "arrow"},
+         name="attendance-export-arrow"),
+    path("attendance/summary.parquet", AttendanceSummaryArrowExportAPI.as_view(), {"fmt": "parquet"},
+         name="attendance-summary-parquet"),
+    path("attendance/summary.arrow", AttendanceSummaryArrowExportAPI.as_view(), {"fmt": "arrow"},
+         name="attendance-summary-arrow"),
+    path("hr/me", views_async.hr_me if ASYNC_READ else HRMeView.as_view(), name="hr-me"),
+
+    # Streamlit のトップページ用まとめ取得（hr/me・KPI・当日・週/月・申請一覧を1回で）
+    path("dashboard", DashboardAPI.as_view(), name="dashboard"),
+
+    # 読み取り系の async 版（同期版との比較・段階移行用に常に公開）
+    path("async/attendance/my", views_async.attendance_my, name="async-attendance-my"),
+    path("async/attendance/summary", views_async.attendance_summary, name="async-attendance-summary"),
+    path("async/hr/me", views_async.hr_me, name="async-hr-me"),
 ]
 
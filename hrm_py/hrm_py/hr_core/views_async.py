@@ -0,0 +1,181 @@
+# hr_core/views_async.py
+"""
+読み取り系APIの async 版。ASGI（hrm_py/asgi.py）で動かすと、DB の応答待ちの間に
+ワーカースレッドを占有しない（同期ビューは ASGI 上では1本のスレッドに直列化される）。
+
+    GET /api/async/attendance/my       … AttendanceMyAPI と同じ応答
+    GET /api/async/attendance/summary  … AttendanceSummaryAPI と同じ応答
+    GET /api/async/hr/me               … HRMeView と同じ応答
+
+settings.HR_ASYNC_READ_VIEWS=True にすると /api/attendance/my などの本来のパスもこちらを使う。
+認証は JWT（HrJWTAuthentication.aauthenticate）→ セッション（request.auser()）の順。
+読み出しは aget()/aiterator()。dirty な日次サマリの再計算・週/月や部署の集計のように
+行ロックや集計を伴う処理は、同期版のサービス関数をスレッドで呼ぶ。
+/my・/summary は同期版と同じ ETag を付け、If-None-Match が一致すれば 304（conditional.py）。
+"""
+from __future__ import annotations
+
+import traceback
+from typing import Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .authentication import HrJWTAuthentication
+from .conditional import apunch_list_etag, asummary_etag, is_not_modified, set_validator
+from .directory import directory
+from .models_attendance import AttendancePunch
+from .fast_serialize import PUNCH_FIELDS, apunch_list, punch_page
+from .pagination import PunchPagination
+from .renderers import ORJSONRenderer
+from .serializers_hr import HRMeSerializer
+from .services_attendance import aload_daily_summaries, load_department_daily_totals, load_period_summaries
+from .summary_cache import summary_cache
+from .work_calendar import work_calendar
+from .views_attendance import (
+    GRANULARITIES,
+    _parse_date,
+    department_day_values,
+    parse_summary_params,
+    parse_summary_scope,
+    user_day_values,
+)
+
+
+def _json(data, status: int = 200) -> HttpResponse:
+    """DRF の Response と同じバイト列（JSON のレンダラー＝renderers.ORJSONRenderer）で返す"""
+    return HttpResponse(ORJSONRenderer().render(data), content_type="application/json", status=status)
+
+
+def _not_modified(etag: str) -> HttpResponse:
+    response = HttpResponse(status=304)
+    del response["Content-Type"]  # 本文の無い DRF の Response と同じく Content-Type を付けない
+    return set_validator(response, etag)
+
+
+async def authenticate(request) -> Tuple[Optional[object], Optional[HttpResponse]]:
+    """
+    (user, エラー応答)。DEFAULT_AUTHENTICATION_CLASSES の先頭が SessionAuthentication
+    （WWW-Authenticate を返さない）なので、同期版と同じく認証失敗はすべて 403
+    """
+    try:
+        result = await HrJWTAuthentication().aauthenticate(request)
+    except (AuthenticationFailed, InvalidToken) as e:
+        return None, _json(e.detail if isinstance(e.detail, dict) else {"detail": e.detail}, status=403)
+    if result is not None:
+        return result[0], None
+    user = await request.auser()
+    if user is None or not user.is_authenticated:
+        return None, _json({"detail": NotAuthenticated.default_detail}, status=403)
+    return user, None
+
+
+async def attendance_my(request):
+    """GET /api/async/attendance/my"""
+    if request.method != "GET":
+        return _json({"detail": "Method not allowed"}, status=405)
+    user, error = await authenticate(request)
+    if error is not None:
+        return error
+    try:
+        dfrom = _parse_date(request.GET.get("from"))
+        dto   = _parse_date(request.GET.get("to"))
+        if not dfrom or not dto or dfrom > dto:
+            return _json({"detail": "from/to を YYYY-MM-DD で指定してください"}, status=400)
+
+        etag = await apunch_list_etag(request, user.id, dfrom, dto)
+        if is_not_modified(request, etag):
+            return _not_modified(etag)
+
+        qs = AttendancePunch.objects.filter(
+            user_id=user.id,
+            work_date__gte=dfrom,
+            work_date__lte=dto,
+        ).order_by("punched_at", "id")
+
+        paginator = PunchPagination()
+        if paginator.is_requested(request.GET):
+            try:
+                page = await paginator.apaginate_queryset(qs.values(*PUNCH_FIELDS), Request(request))
+            except NotFound as e:
+                return _json({"detail": e.detail}, status=404)
+            return set_validator(_json(paginator.get_paginated_response(punch_page(page)).data), etag)
+
+        return set_validator(_json(await apunch_list(qs)), etag)
+    except Exception:
+        print(traceback.format_exc())
+        return _json({"detail": "server_error"}, status=500)
+
+
+async def attendance_summary(request):
+    """GET /api/async/attendance/summary"""
+    if request.method != "GET":
+        return _json({"detail": "Method not allowed"}, status=405)
+    user, error = await authenticate(request)
+    if error is not None:
+        return error
+    try:
+        dfrom, dto, granularity, message = parse_summary_params(request.GET)
+        if message:
+            return _json({"detail": message}, status=400)
+
+        user_id, department_id, message = parse_summary_scope(request.GET, user.is_staff)
+        if message:
+            return _json({"detail": message}, status=400)
+        target_user_id = user.id
+        if user_id is not None:
+            if not await get_user_model().objects.filter(pk=user_id).aexists():
+                return _json({"detail": "該当するユーザーがいません"}, status=404)
+            target_user_id = user_id
+
+        scope_user_id = None if department_id is not None else target_user_id
+        cal = await work_calendar.aget()
+        etag, dirty = await asummary_etag(request, user.id, dfrom, dto, scope_user_id, department_id,
+                                          calendar_version=cal.version)
+        if not dirty and is_not_modified(request, etag):
+            return _not_modified(etag)
+
+        cache_key, body = await summary_cache.alookup(scope_user_id, department_id, dfrom, dto, granularity,
+                                                      variant=cal.version)
+        if body is None:
+            period = GRANULARITIES[granularity]
+            if period is not None:
+                value = await sync_to_async(load_period_summaries)(
+                    period, dfrom, dto,
+                    user_id=scope_user_id,
+                    department_id=department_id,
+                    cal=cal,
+                )
+                body = {"value": value, "granularity": granularity}
+            elif department_id is not None:
+                totals = await sync_to_async(load_department_daily_totals)(department_id, dfrom, dto)
+                body = {"value": department_day_values(totals, dfrom, dto, cal)}
+            else:
+                rows = await aload_daily_summaries(target_user_id, dfrom, dto)
+                body = {"value": user_day_values(rows, dfrom, dto, cal)}
+            await summary_cache.astore(cache_key, body)
+
+        if dirty:
+            etag, _ = await asummary_etag(request, user.id, dfrom, dto, scope_user_id, department_id,
+                                          calendar_version=cal.version)
+        return set_validator(_json(body), etag)
+    except Exception:
+        print(traceback.format_exc())
+        return _json({"detail": "server_error"}, status=500)
+
+
+async def hr_me(request):
+    """GET /api/async/hr/me"""
+    if request.method != "GET":
+        return _json({"detail": "Method not allowed"}, status=405)
+    user, error = await authenticate(request)
+    if error is not None:
+        return error
+    entry = await directory.aget(user.id)
+    if entry is None:
+        return _json({})
+    return _json(HRMeSerializer(entry, context={"user": user}).data)
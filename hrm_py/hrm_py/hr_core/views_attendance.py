@@ -1,16 +1,44 @@
 # hr_core/views_attendance.py
 from __future__ import annotations
-from datetime import datetime, timedelta, timezone as dt_tz
-from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta, timezone as dt_tz
+from typing import List, Dict, Any, Optional, Tuple
 from zoneinfo import ZoneInfo
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
 
-from .models_attendance import AttendancePunch, PunchType
-from .serializers_attendance import AttendancePunchSerializer, PunchCreateSerializer
+from .models_attendance import AttendancePunch, AttendanceState, RollupPeriod
+from .serializers_attendance import (
+    AttendancePunchSerializer,
+    AttendanceStateSerializer,
+    PunchBatchItemSerializer,
+    PunchCreateSerializer,
+)
+from .conditional import is_not_modified, punch_list_etag, set_validator, summary_etag
+from .fast_serialize import PUNCH_FIELDS, punch_list, punch_page
+from .models_hr import EmployeeProfile
+from .pagination import PunchPagination
+from .roles import roles_for_user
+from .services_attendance import (
+    PunchTransitionError,
+    apply_punch_state,
+    bulk_ingest_punches,
+    correct_punch,
+    load_daily_summaries,
+    load_department_daily_totals,
+    load_period_summaries,
+    refresh_daily_summary,
+)
+from .summary_cache import summary_cache
+from .work_calendar import CalendarSnapshot, work_calendar
+
+GRANULARITIES = {"day": None, "week": RollupPeriod.WEEK, "month": RollupPeriod.MONTH}
 
 # ---- タイムゾーン定義（zoneinfoで厳密に） ----
 JST = ZoneInfo("Asia/Tokyo")
@@ -30,37 +58,14 @@ def _parse_date(param: Optional[str]) -> Optional[datetime.date]:
     except Exception:
         return None
 
-def _calc_daily_minutes(punches: List[AttendancePunch]) -> Dict[str, int]:
-    punches = sorted(punches, key=lambda x: x.punched_at)
-    work_min = 0
-    break_min = 0
-    current_in: Optional[datetime] = None
-    break_start: Optional[datetime] = None
-
-    for p in punches:
-        t = p.punched_at
-        if timezone.is_naive(t):
-            t = t.replace(tzinfo=dt_tz.utc)
-
-        if p.punch_type == PunchType.IN:
-            current_in = t
-            break_start = None
-        elif p.punch_type == PunchType.BREAK_START and current_in is not None and break_start is None:
-            break_start = t
-        elif p.punch_type == PunchType.BREAK_END and current_in is not None and break_start is not None:
-            if t > break_start:
-                break_min += int((t - break_start).total_seconds() // 60)
-            break_start = None
-        elif p.punch_type == PunchType.OUT and current_in is not None:
-            duration = int((t - current_in).total_seconds() // 60)
-            work_min += max(0, duration - break_min)
-            current_in = None
-            break_start = None
-            break_min = 0
-
-    overtime_min = max(0, work_min - 8 * 60)
-    return {"work_minutes": work_min, "break_minutes": break_min, "overtime_minutes": overtime_min}
-
+def _parse_id(param: Optional[str]) -> Optional[int]:
+    """空なら None。数値でなければ ValueError"""
+    if not param:
+        return None
+    value = int(param)
+    if value < 1:
+        raise ValueError(param)
+    return value
 
 # ------------- API -------------
 import traceback
@@ -82,13 +87,163 @@ class AttendancePunchAPI(APIView):
             if timezone.is_naive(punched_at):
                 punched_at = punched_at.replace(tzinfo=JST).astimezone(dt_tz.utc)
 
-            obj = AttendancePunch.objects.create(
-                user=request.user,
-                punch_type=pt,
-                note=note,
-                punched_at=punched_at,
-            )
+            work_date = _to_date_local(punched_at)
+            with transaction.atomic():
+                # 現在の勤務状態を行ロックして遷移を検証（二重出勤・休憩開始の無い休憩終了などを弾く）
+                apply_punch_state(request.user.id, pt, punched_at, work_date)
+                obj = AttendancePunch.objects.create(
+                    user=request.user,
+                    punch_type=pt,
+                    note=note,
+                    punched_at=punched_at,
+                    work_date=work_date,
+                )
+                # 打刻と同じトランザクションで当日の日次サマリを更新
+                refresh_daily_summary(request.user.id, work_date)
+                summary_cache.invalidate_days([(request.user.id, work_date)])
             return Response(AttendancePunchSerializer(obj).data, status=status.HTTP_201_CREATED)
+        except PunchTransitionError as e:
+            return Response({"detail": e.message, "state": e.state}, status=status.HTTP_409_CONFLICT)
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
+
+
+class AttendancePunchBatchAPI(APIView):
+    """
+    POST /api/attendance/punches/batch
+    Body: {"punches": [{"type": "IN", "punched_at": "...", "user_id": 1 | "employee_code": "E0001", "note": ""}, ...]}
+    打刻端末がネットワーク断の間にためた打刻をまとめて送る。1件ずつ検証し、
+    正しいものを1トランザクションで登録して、各件の結果を同じ並びで返す。
+    他人の打刻（user_id / employee_code 指定）は HR 管理者のみ。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        try:
+            items = (request.data or {}).get("punches") if isinstance(request.data, dict) else request.data
+            max_items = getattr(settings, "ATTENDANCE_PUNCH_BATCH_MAX", 500)
+            if not isinstance(items, list) or not items:
+                return Response({"detail": "punches に打刻の配列を指定してください"}, status=400)
+            if len(items) > max_items:
+                return Response({"detail": f"一度に送れる打刻は {max_items} 件までです"}, status=400)
+
+            is_hr = roles_for_user(request.user).is_hr
+            results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+            valid: List[tuple] = []  # (位置, validated_data)
+            for i, raw in enumerate(items):
+                s = PunchBatchItemSerializer(data=raw)
+                if not s.is_valid():
+                    results[i] = {"index": i, "status": "error", "errors": s.errors}
+                    continue
+                data = dict(s.validated_data)
+                if (data.get("user_id") or data.get("employee_code")) and not is_hr:
+                    results[i] = {"index": i, "status": "error",
+                                  "errors": {"detail": "他の社員の打刻は登録できません"}}
+                    continue
+                if timezone.is_naive(data["punched_at"]):
+                    data["punched_at"] = data["punched_at"].replace(tzinfo=JST).astimezone(dt_tz.utc)
+                valid.append((i, data))
+
+            # employee_code → user_id をまとめて解決
+            codes = {d["employee_code"] for _, d in valid if d.get("employee_code")}
+            by_code = dict(EmployeeProfile.objects
+                           .filter(employee_code__in=codes)
+                           .values_list("employee_code", "user_id")) if codes else {}
+            user_ids = {d["user_id"] for _, d in valid if d.get("user_id")}
+            known_users = set(get_user_model().objects
+                              .filter(pk__in=user_ids)
+                              .values_list("pk", flat=True)) if user_ids else set()
+
+            ready: List[tuple] = []
+            for i, data in valid:
+                if data.get("employee_code"):
+                    uid = by_code.get(data["employee_code"])
+                    if uid is None:
+                        results[i] = {"index": i, "status": "error",
+                                      "errors": {"employee_code": ["該当する社員がいません"]}}
+                        continue
+                elif data.get("user_id"):
+                    uid = data["user_id"]
+                    if uid not in known_users:
+                        results[i] = {"index": i, "status": "error",
+                                      "errors": {"user_id": ["該当するユーザーがいません"]}}
+                        continue
+                else:
+                    uid = request.user.id
+                data["user_id"] = uid
+                ready.append((i, data))
+
+            if ready:
+                outcomes = bulk_ingest_punches([data for _, data in ready])
+                for (i, _), outcome in zip(ready, outcomes):
+                    results[i] = {"index": i, **outcome}
+
+            counts = {"created": 0, "duplicate": 0, "error": 0}
+            for r in results:
+                counts[r["status"]] += 1
+            return Response({**counts, "results": results}, status=status.HTTP_200_OK)
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
+
+
+class AttendancePunchCorrectionAPI(APIView):
+    """
+    POST /api/attendance/punches/correct
+    Body: {"type": "OUT", "punched_at": "...", "user_id": 1 | "employee_code": "E0001", "note": ""}
+    HR 管理者による打刻の修正登録（退勤漏れ・遡った打刻）。状態遷移の検証をせずに登録し、
+    勤務状態は打刻履歴から作り直す（services_attendance.correct_punch）。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        try:
+            if not roles_for_user(request.user).is_hr:
+                return Response({"detail": "打刻の修正は HR 管理者のみ行えます"}, status=status.HTTP_403_FORBIDDEN)
+            s = PunchBatchItemSerializer(data=request.data)
+            s.is_valid(raise_exception=True)
+            data = s.validated_data
+            punched_at = data["punched_at"]
+            if timezone.is_naive(punched_at):
+                punched_at = punched_at.replace(tzinfo=JST).astimezone(dt_tz.utc)
+
+            if data.get("employee_code"):
+                uid = (EmployeeProfile.objects
+                       .filter(employee_code=data["employee_code"])
+                       .values_list("user_id", flat=True).first())
+                if uid is None:
+                    return Response({"employee_code": ["該当する社員がいません"]}, status=400)
+            elif data.get("user_id"):
+                uid = data["user_id"]
+                if not get_user_model().objects.filter(pk=uid).exists():
+                    return Response({"user_id": ["該当するユーザーがいません"]}, status=400)
+            else:
+                uid = request.user.id
+
+            obj, state = correct_punch(uid, data["type"], punched_at, data.get("note", ""))
+            return Response({**AttendancePunchSerializer(obj).data, "state": AttendanceStateSerializer(state).data},
+                            status=status.HTTP_201_CREATED)
+        except ValidationError:
+            raise
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
+
+
+class AttendanceStateAPI(APIView):
+    """
+    GET /api/attendance/state
+    自分の現在の勤務状態（OFF / WORKING / ON_BREAK）。打刻は読まず状態行1件だけを引く。
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            obj = AttendanceState.objects.filter(user_id=request.user.id).first()
+            if obj is None:
+                obj = AttendanceState(user_id=request.user.id)  # 打刻したことが無ければ勤務外
+            return Response(AttendanceStateSerializer(obj).data)
         except Exception:
             print(traceback.format_exc())
             return Response({"detail": "server_error"}, status=500)
@@ -96,7 +251,10 @@ class AttendancePunchAPI(APIView):
 
 class AttendanceMyAPI(APIView):
     """
-    GET /api/attendance/my?from=YYYY-MM-DD&to=YYYY-MM-DD
+    GET /api/attendance/my?from=YYYY-MM-DD&to=YYYY-MM-DD[&page_size=N][&cursor=...]
+    page_size か cursor を付けたときだけ {"next", "previous", "results"} 形式でページ分割する
+    （付けなければ従来どおり期間全体の配列）。
+    行はモデルを作らず values で読んで変換する（fast_serialize.py。AttendancePunchSerializer と同じ JSON）。
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -107,73 +265,159 @@ class AttendanceMyAPI(APIView):
             if not dfrom or not dto or dfrom > dto:
                 return Response({"detail": "from/to を YYYY-MM-DD で指定してください"}, status=400)
 
-            # JSTの一日範囲 → UTCへ
-            start_dt = datetime.combine(dfrom, datetime.min.time(), tzinfo=JST).astimezone(dt_tz.utc)
-            end_dt   = datetime.combine(dto + timedelta(days=1), datetime.min.time(), tzinfo=JST).astimezone(dt_tz.utc)
+            # 打刻の件数・最大IDだけで検証し、変わっていなければ一覧を作らずに 304
+            etag = punch_list_etag(request, request.user.id, dfrom, dto)
+            if is_not_modified(request, etag):
+                return set_validator(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
 
+            # work_date（JST暦日）で絞り込む：(user, work_date) インデックスを使う
             qs = AttendancePunch.objects.filter(
                 user=request.user,
-                punched_at__gte=start_dt,
-                punched_at__lt=end_dt,
-            ).order_by("punched_at")
+                work_date__gte=dfrom,
+                work_date__lte=dto,
+            ).order_by("punched_at", "id")
 
-            data = AttendancePunchSerializer(qs, many=True).data
-            return Response(data)
+            paginator = PunchPagination()
+            if paginator.is_requested(request.query_params):
+                page = paginator.paginate_queryset(qs.values(*PUNCH_FIELDS), request, view=self)
+                return set_validator(paginator.get_paginated_response(punch_page(page)), etag)
+
+            return set_validator(Response(punch_list(qs)), etag)
+        except NotFound:
+            raise
         except Exception:
             print(traceback.format_exc())
             return Response({"detail": "server_error"}, status=500)
 
 
+def parse_summary_params(params) -> Tuple[Optional[date], Optional[date], str, Optional[str]]:
+    """/summary のクエリ (from, to, granularity, エラーメッセージ)"""
+    dfrom = _parse_date(params.get("from"))
+    dto   = _parse_date(params.get("to"))
+    if not dfrom or not dto or dfrom > dto:
+        return dfrom, dto, "", "from/to を YYYY-MM-DD で指定してください"
+    granularity = params.get("granularity") or "day"
+    if granularity not in GRANULARITIES:
+        return dfrom, dto, granularity, "granularity は day/week/month のいずれかです"
+    return dfrom, dto, granularity, None
+
+
+def parse_summary_scope(params, is_staff: bool) -> Tuple[Optional[int], Optional[int], Optional[str]]:
+    """
+    /summary の (user_id, department, エラーメッセージ)。指定は is_staff のみ有効（それ以外は (None, None)）。
+    両方あれば user_id を優先する。ユーザーの存在確認は呼び出し側で行う
+    """
+    if not is_staff:
+        return None, None, None
+    try:
+        user_id = _parse_id(params.get("user_id"))
+        department_id = _parse_id(params.get("department"))
+    except ValueError:
+        return None, None, "user_id / department は数値のIDで指定してください"
+    if user_id is not None:
+        return user_id, None, None
+    return None, department_id, None
+
+
+def department_day_values(totals: Dict[date, Dict[str, Any]], dfrom: date, dto: date,
+                          cal: Optional[CalendarSnapshot] = None) -> List[Dict[str, Any]]:
+    cal = cal or work_calendar.get()
+    value = []
+    cur = dfrom
+    while cur <= dto:
+        t = totals.get(cur) or {}
+        value.append({
+            "date": cur.isoformat(),
+            "work_minutes": int(t.get("work_minutes") or 0),
+            "break_minutes": int(t.get("break_minutes") or 0),
+            "overtime_minutes": int(t.get("overtime_minutes") or 0),
+            "notes": [],
+            **cal.day(cur).as_dict(),  # is_holiday / holiday_name / is_workday
+        })
+        cur += timedelta(days=1)
+    return value
+
+
+def user_day_values(rows: Dict[date, Any], dfrom: date, dto: date,
+                    cal: Optional[CalendarSnapshot] = None) -> List[Dict[str, Any]]:
+    cal = cal or work_calendar.get()
+    value: List[Dict[str, Any]] = []
+    cur = dfrom
+    while cur <= dto:
+        row = rows.get(cur)
+        value.append({
+            "date": cur.isoformat(),
+            "work_minutes": row.work_minutes if row else 0,
+            "break_minutes": row.break_minutes if row else 0,
+            "overtime_minutes": row.overtime_minutes if row else 0,
+            "notes": list(row.notes) if row else [],
+            **cal.day(cur).as_dict(),
+        })
+        cur += timedelta(days=1)
+    return value
+
+
 class AttendanceSummaryAPI(APIView):
     """
-    GET /api/attendance/summary?from=YYYY-MM-DD&to=YYYY-MM-DD[&user_id=...]
+    GET /api/attendance/summary?from=YYYY-MM-DD&to=YYYY-MM-DD[&user_id=...][&department=...][&granularity=day|week|month]
+    日次サマリ（DailyAttendanceSummary）を参照して返す。
+    granularity=week/month は週（月曜始まり）/月のロールアップを1期間1行で返す。
+    日次の行には勤務カレンダー（is_holiday / holiday_name / is_workday）、期間の行には
+    所定出勤日数（scheduled_days）と休日の勤務分（holiday_work_minutes）を付ける。
+    user_id / department の指定は is_staff のみ有効。
+    応答本文は共有キャッシュ（summary_cache.py）に載せる。async 版は views_async.attendance_summary。
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
         try:
-            dfrom = _parse_date(request.query_params.get("from"))
-            dto   = _parse_date(request.query_params.get("to"))
-            if not dfrom or not dto or dfrom > dto:
-                return Response({"detail": "from/to を YYYY-MM-DD で指定してください"}, status=400)
+            dfrom, dto, granularity, error = parse_summary_params(request.query_params)
+            if error:
+                return Response({"detail": error}, status=400)
 
-            target_user = request.user
-            user_id_param = request.query_params.get("user_id")
-            if user_id_param and request.user.is_staff:
-                from django.contrib.auth import get_user_model
-                User = get_user_model()
-                target_user = User.objects.get(pk=int(user_id_param))
+            user_id, department_id, error = parse_summary_scope(request.query_params, request.user.is_staff)
+            if error:
+                return Response({"detail": error}, status=400)
+            target_user_id = request.user.id
+            if user_id is not None:
+                if not get_user_model().objects.filter(pk=user_id).exists():
+                    return Response({"detail": "該当するユーザーがいません"}, status=404)
+                target_user_id = user_id
 
-            start_dt = datetime.combine(dfrom, datetime.min.time(), tzinfo=JST).astimezone(dt_tz.utc)
-            end_dt   = datetime.combine(dto + timedelta(days=1), datetime.min.time(), tzinfo=JST).astimezone(dt_tz.utc)
+            scope_user_id = None if department_id is not None else target_user_id
+            cal = work_calendar.get()
+            # 集計せずに検証値だけ引く。dirty な日があれば再計算が要るので 304 にしない
+            etag, dirty = summary_etag(request, request.user.id, dfrom, dto, scope_user_id, department_id,
+                                       calendar_version=cal.version)
+            if not dirty and is_not_modified(request, etag):
+                return set_validator(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
 
-            qs = AttendancePunch.objects.filter(
-                user=target_user,
-                punched_at__gte=start_dt,
-                punched_at__lt=end_dt,
-            )
-
-            punches_by_day: Dict[str, List[AttendancePunch]] = {}
-            for p in qs:
-                key = _to_date_local(p.punched_at).isoformat()
-                punches_by_day.setdefault(key, []).append(p)
-
-            value: List[Dict[str, Any]] = []
-            cur = dfrom
-            while cur <= dto:
-                key = cur.isoformat()
-                day_punches = punches_by_day.get(key, [])
-                mins = _calc_daily_minutes(day_punches) if day_punches else {
-                    "work_minutes": 0, "break_minutes": 0, "overtime_minutes": 0
-                }
-                value.append({
-                    "date": key,
-                    **mins,
-                    "notes": [p.note for p in day_punches if p.note],
-                })
-                cur += timedelta(days=1)
-
-            return Response({"value": value})
+            # 共有キャッシュ（打刻が入った日・プロフィール変更の分だけ外れる）
+            cache_key, body = summary_cache.lookup(scope_user_id, department_id, dfrom, dto, granularity,
+                                                   variant=cal.version)
+            if body is None:
+                period = GRANULARITIES[granularity]
+                if period is not None:
+                    value = load_period_summaries(
+                        period, dfrom, dto,
+                        user_id=scope_user_id,
+                        department_id=department_id,
+                        cal=cal,
+                    )
+                    body = {"value": value, "granularity": granularity}
+                elif department_id is not None:
+                    totals = load_department_daily_totals(department_id, dfrom, dto)
+                    body = {"value": department_day_values(totals, dfrom, dto, cal)}
+                else:
+                    # 事前集計済みの日次サマリを読む（dirty な日のみ生打刻から再計算）
+                    rows = load_daily_summaries(target_user_id, dfrom, dto)
+                    body = {"value": user_day_values(rows, dfrom, dto, cal)}
+                summary_cache.store(cache_key, body)
+
+            if dirty:
+                etag, _ = summary_etag(request, request.user.id, dfrom, dto, scope_user_id, department_id,
+                                       calendar_version=cal.version)
+            return set_validator(Response(body), etag)
         except Exception:
             print(traceback.format_exc())
             return Response({"detail": "server_error"}, status=500)
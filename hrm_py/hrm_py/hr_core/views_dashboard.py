@@ -0,0 +1,138 @@
+# hr_core/views_dashboard.py
+"""
+Streamlit のトップページ用のまとめ取得API。
+
+    GET /api/dashboard[?date=YYYY-MM-DD][&sections=kpi,today,...]   （date 省略時は今日（JST））
+
+これまで1回の再描画で個別に呼んでいた
+  /api/hr/me・当月の /summary?granularity=month（KPI）・当日の /my と /summary・
+  当週と当月の /summary・自分の申請一覧（残業/休暇）・承認待ち一覧（残業/休暇、is_staff のみ）
+を1回の応答で返す。日次の値は当週∪当月の範囲の日次サマリを1回だけ読んで切り出す
+（dirty な日はそこで再計算）。KPI もロールアップではなく同じ行から合計する。
+日次の値の勤務カレンダー注記、KPI の所定出勤日数・休日の勤務分も /summary と同じ（work_calendar.py）。
+各項目の形は個別APIと同じ（申請一覧は1ページ目の results 相当）。
+sections を指定すると、その項目だけを計算して返す（Streamlit の各ページが自分の表示分だけ取る）。
+"""
+import traceback
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .directory import directory
+from .fast_serialize import punch_list
+from .models import LeaveRequest, OvertimeRequest, RequestStatus
+from .models_attendance import AttendancePunch, RollupPeriod
+from .serializers import LeaveRequestSerializer, OvertimeRequestSerializer
+from .serializers_hr import HRMeSerializer
+from .services_attendance import (
+    ROLLUP_FIELDS,
+    load_daily_summaries,
+    period_end,
+    period_start,
+    to_local_date,
+)
+from .views_attendance import _parse_date, user_day_values
+from .work_calendar import CalendarSnapshot, work_calendar
+
+SECTIONS = ("me", "kpi", "today", "week", "month", "requests", "approvals")
+_SUMMARY_SECTIONS = {"kpi", "today", "week", "month"}  # 日次サマリを読む項目
+
+
+def _period_totals(period: str, d: date, days: Iterable[Dict[str, Any]], cal: CalendarSnapshot) -> Dict[str, Any]:
+    """日次の値から load_period_summaries の1行と同じ形の合計を作る"""
+    start = period_start(period, d)
+    end = period_end(period, start)
+    totals = dict.fromkeys(ROLLUP_FIELDS, 0)
+    holiday_work = 0
+    for v in days:
+        totals["work_minutes"] += v["work_minutes"]
+        totals["break_minutes"] += v["break_minutes"]
+        totals["overtime_minutes"] += v["overtime_minutes"]
+        totals["working_days"] += 1 if v["work_minutes"] > 0 else 0
+        holiday_work += 0 if v["is_workday"] else v["work_minutes"]
+    return {
+        "date": start.isoformat(),
+        "period_start": start.isoformat(),
+        "period_end": end.isoformat(),
+        **totals,
+        "scheduled_days": cal.scheduled_days(start, end),
+        "holiday_work_minutes": holiday_work,
+    }
+
+
+def _requests(model, serializer_class, limit: int, **filters) -> List[Dict[str, Any]]:
+    qs = (model.objects.select_related("user", "approver")
+          .filter(**filters)
+          .order_by("-created_at", "-id")[:limit])
+    return serializer_class(qs, many=True).data
+
+
+class DashboardAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            param = request.query_params.get("date")
+            d: Optional[date] = _parse_date(param) if param else to_local_date(timezone.now())
+            if d is None:
+                return Response({"detail": "date を YYYY-MM-DD で指定してください"}, status=400)
+            param = request.query_params.get("sections")
+            sections = set(filter(None, param.split(","))) if param else set(SECTIONS)
+            unknown = sections - set(SECTIONS)
+            if unknown:
+                return Response({"detail": f"sections は {','.join(SECTIONS)} から選んでください"}, status=400)
+            user = request.user
+            limit = getattr(settings, "HR_PAGE_SIZE", 50)
+            body: Dict[str, Any] = {"date": d.isoformat()}
+
+            if "me" in sections:
+                entry = directory.get(user.id)
+                body["me"] = HRMeSerializer(entry, context={"user": user}).data if entry else {}
+
+            if sections & _SUMMARY_SECTIONS:
+                week_from = period_start(RollupPeriod.WEEK, d)
+                week_to = period_end(RollupPeriod.WEEK, week_from)
+                month_from = period_start(RollupPeriod.MONTH, d)
+                month_to = period_end(RollupPeriod.MONTH, month_from)
+                # 週は月をまたぐことがあるので両方を含む範囲をまとめて読む
+                rows = load_daily_summaries(user.id, min(week_from, month_from), max(week_to, month_to))
+                cal = work_calendar.get()
+                month = user_day_values(rows, month_from, month_to, cal)
+                if "kpi" in sections:
+                    body["kpi"] = _period_totals(RollupPeriod.MONTH, d, month, cal)
+                if "today" in sections:
+                    punches = (AttendancePunch.objects
+                               .filter(user_id=user.id, work_date=d)
+                               .order_by("punched_at", "id"))
+                    body["today"] = {
+                        "punches": punch_list(punches),
+                        "summary": user_day_values(rows, d, d, cal)[0],
+                    }
+                if "week" in sections:
+                    body["week"] = {"from": week_from.isoformat(), "to": week_to.isoformat(),
+                                    "value": user_day_values(rows, week_from, week_to, cal)}
+                if "month" in sections:
+                    body["month"] = {"from": month_from.isoformat(), "to": month_to.isoformat(), "value": month}
+
+            if "requests" in sections:
+                body["requests"] = {
+                    "overtime": _requests(OvertimeRequest, OvertimeRequestSerializer, limit, user_id=user.id),
+                    "leave": _requests(LeaveRequest, LeaveRequestSerializer, limit, user_id=user.id),
+                }
+            if "approvals" in sections:
+                # 承認APIは is_staff のみなので、それ以外には null を返す
+                body["approvals"] = {
+                    "overtime": _requests(OvertimeRequest, OvertimeRequestSerializer, limit,
+                                          status=RequestStatus.PENDING),
+                    "leave": _requests(LeaveRequest, LeaveRequestSerializer, limit,
+                                       status=RequestStatus.PENDING),
+                } if user.is_staff else None
+            return Response(body)
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
@@ -0,0 +1,211 @@
+# hr_core/views_export.py
+"""
+勤怠データのCSVエクスポート（サーバ側でストリーミング生成）。
+
+    GET /api/attendance/export.csv?from=YYYY-MM-DD&to=YYYY-MM-DD   … 生打刻
+    GET /api/attendance/summary.csv?from=YYYY-MM-DD&to=YYYY-MM-DD  … 社員×日の日次サマリ
+      追加（HR管理者のみ）: &user_id=123 / &department=1（指定なしなら全社）
+
+分析用に同じ内容を型付きの Parquet / Arrow でも返す（export_arrow.py。pyarrow が必要）。
+
+    GET /api/attendance/export.parquet・export.arrow・summary.parquet・summary.arrow
+
+queryset を values_list().iterator() で少しずつ読み、一定行ごとに書き出すので
+期間・人数に関係なくサーバ側のメモリは一定。Excel で開けるよう UTF-8（BOM付き）で返す。
+"""
+from __future__ import annotations
+
+import csv
+import io
+import traceback
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+from django.db.models import Q, QuerySet
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .export_arrow import (
+    ARROW_AVAILABLE,
+    CONTENT_TYPES,
+    encode,
+    export_scope,
+    punch_batches,
+    punch_schema,
+    summary_batches,
+    summary_schema,
+)
+from .models_attendance import AttendancePunch, DailyAttendanceSummary
+from .roles import roles_for_user
+from .services_attendance import JST, refresh_dirty_days
+from .views_attendance import _parse_date, _parse_id
+
+CHUNK_SIZE = 2000  # iterator() の1回の取得件数
+FLUSH_ROWS = 500   # この行数ごとにレスポンスへ書き出す
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _fmt_dt(dt: Optional[datetime]) -> str:
+    if dt is None:
+        return ""
+    return timezone.localtime(dt, JST).strftime(DATETIME_FORMAT)
+
+
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence], convert: Callable[[Sequence], Sequence]) -> Iterator[str]:
+    """ヘッダ＋各行を FLUSH_ROWS 行ずつまとめて文字列で返すジェネレータ"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    buf.write("\ufeff")  # BOM
+    writer.writerow(header)
+    n = 0
+    for row in rows:
+        writer.writerow(convert(row))
+        n += 1
+        if n % FLUSH_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    yield buf.getvalue()
+
+
+def _csv_response(chunks: Iterator[str], filename: str) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(chunks, content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+class _ExportBase(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def scope(self, request):
+        """
+        (from, to, 絞り込みの Q, refresh_dirty_days の引数) を返す。エラー時は Response を返す。
+        一般ユーザーは自分のみ。HR管理者は user_id / department で絞り込み（無指定なら全社）。
+        """
+        dfrom = _parse_date(request.query_params.get("from"))
+        dto = _parse_date(request.query_params.get("to"))
+        if not dfrom or not dto or dfrom > dto:
+            return Response({"detail": "from/to を YYYY-MM-DD で指定してください"}, status=400)
+
+        if not roles_for_user(request.user).is_hr:
+            return dfrom, dto, Q(user_id=request.user.id), {"user_id": request.user.id}
+        try:
+            user_id = _parse_id(request.query_params.get("user_id"))
+            dept = _parse_id(request.query_params.get("department"))
+        except ValueError:
+            return Response({"detail": "user_id / department は数値のIDで指定してください"}, status=400)
+        if user_id:
+            return dfrom, dto, export_scope(user_id=user_id), {"user_id": user_id}
+        if dept:
+            return dfrom, dto, export_scope(department_id=dept), {"department_id": dept}
+        return dfrom, dto, export_scope(), {}
+
+
+class AttendancePunchExportAPI(_ExportBase):
+    """GET /api/attendance/export.csv"""
+
+    HEADER = ["employee_code", "username", "work_date", "punched_at", "punch_type", "note"]
+
+    def get(self, request):
+        try:
+            scope = self.scope(request)
+            if isinstance(scope, Response):
+                return scope
+            dfrom, dto, q, _ = scope
+            # (work_date, user) インデックスに沿って読む
+            qs: QuerySet = (
+                AttendancePunch.objects
+                .filter(q, work_date__gte=dfrom, work_date__lte=dto)
+                .order_by("work_date", "user_id", "punched_at", "id")
+                .values_list("user__employee_profile__employee_code", "user__username",
+                             "work_date", "punched_at", "punch_type", "note")
+            )
+            chunks = stream_csv(
+                self.HEADER,
+                qs.iterator(chunk_size=CHUNK_SIZE),
+                lambda r: (r[0] or "", r[1], r[2].isoformat(), _fmt_dt(r[3]), r[4], r[5]),
+            )
+            return _csv_response(chunks, f"punches_{dfrom:%Y%m%d}_{dto:%Y%m%d}.csv")
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
+
+
+class AttendanceSummaryExportAPI(_ExportBase):
+    """GET /api/attendance/summary.csv"""
+
+    HEADER = ["employee_code", "username", "department", "work_date", "work_minutes", "break_minutes",
+              "overtime_minutes", "first_in", "last_out", "punch_count"]
+
+    def get(self, request):
+        try:
+            scope = self.scope(request)
+            if isinstance(scope, Response):
+                return scope
+            dfrom, dto, q, refresh_scope = scope
+            # dirty な日だけ先に再計算してから流す
+            refresh_dirty_days(dfrom, dto, **refresh_scope)
+            qs: QuerySet = (
+                DailyAttendanceSummary.objects
+                .filter(q, work_date__gte=dfrom, work_date__lte=dto)
+                .order_by("work_date", "user_id")
+                .values_list("user__employee_profile__employee_code", "user__username", "department__name",
+                             "work_date", "work_minutes", "break_minutes", "overtime_minutes",
+                             "first_in", "last_out", "punch_count")
+            )
+            chunks = stream_csv(
+                self.HEADER,
+                qs.iterator(chunk_size=CHUNK_SIZE),
+                lambda r: (r[0] or "", r[1], r[2] or "", r[3].isoformat(), r[4], r[5], r[6],
+                           _fmt_dt(r[7]), _fmt_dt(r[8]), r[9]),
+            )
+            return _csv_response(chunks, f"attendance_summary_{dfrom:%Y%m%d}_{dto:%Y%m%d}.csv")
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
+
+class _ArrowExportBase(_ExportBase):
+    """fmt（"parquet" / "arrow"）は urls.py で渡す"""
+
+    name = ""
+
+    def batches(self, dfrom, dto, q, refresh_scope):
+        raise NotImplementedError
+
+    def get(self, request, fmt: str):
+        try:
+            if not ARROW_AVAILABLE:
+                return Response({"detail": "pyarrow がインストールされていません"}, status=501)
+            scope = self.scope(request)
+            if isinstance(scope, Response):
+                return scope
+            dfrom, dto, q, refresh_scope = scope
+            schema, batches = self.batches(dfrom, dto, q, refresh_scope)
+            response = StreamingHttpResponse(encode(fmt, schema, batches), content_type=CONTENT_TYPES[fmt])
+            response["Content-Disposition"] = f'attachment; filename="{self.name}_{dfrom:%Y%m%d}_{dto:%Y%m%d}.{fmt}"'
+            return response
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
+
+
+class AttendancePunchArrowExportAPI(_ArrowExportBase):
+    """GET /api/attendance/export.parquet・export.arrow"""
+
+    name = "punches"
+
+    def batches(self, dfrom, dto, q, refresh_scope):
+        return punch_schema(), punch_batches(dfrom, dto, q)
+
+
+class AttendanceSummaryArrowExportAPI(_ArrowExportBase):
+    """GET /api/attendance/summary.parquet・summary.arrow"""
+
+    name = "attendance_summary"
+
+    def batches(self, dfrom, dto, q, refresh_scope):
+        refresh_dirty_days(dfrom, dto, **refresh_scope)
+        return summary_schema(), summary_batches(dfrom, dto, q)
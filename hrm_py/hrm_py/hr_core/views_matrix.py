@@ -0,0 +1,86 @@
+# hr_core/views_matrix.py
+"""
+社員×日の勤怠マトリクス（列指向JSON）。
+
+    GET /api/attendance/matrix?from=YYYY-MM-DD&to=YYYY-MM-DD[&department=...]
+
+/summary は対象者を日ごとに合算するので、誰がどれだけ働いたかを見るには社員ごとに呼ぶ必要があった。
+ここでは社員×日の値を1回で返す。1セル1オブジェクトにせず、
+  - dates / user_ids / employee_codes：軸
+  - work_minutes / break_minutes / overtime_minutes：行優先の平坦な整数配列
+    （i 番目の社員の j 日目は [i * len(dates) + j]）
+の列指向にするので、300人×31日でもキー名の繰り返しが無く、本文は行ごとの JSON より大幅に小さい。
+値は日次サマリを1回のクエリで読んで詰める（dirty な日は先に再計算）。
+department の指定は HR 管理者とその部署の管理職のみ（それ以外は 403。省略時は自分の1行）。
+ETag は /summary と同じ検証値で付ける。
+"""
+import traceback
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .conditional import is_not_modified, set_validator, summary_etag
+from .directory import directory
+from .roles import roles_for_user
+from .services_attendance import load_daily_matrix
+from .views_attendance import _parse_date
+from .work_calendar import work_calendar
+
+
+class AttendanceMatrixAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            dfrom = _parse_date(request.query_params.get("from"))
+            dto = _parse_date(request.query_params.get("to"))
+            if not dfrom or not dto or dfrom > dto:
+                return Response({"detail": "from/to を YYYY-MM-DD で指定してください"}, status=400)
+
+            department_id: Optional[int] = None
+            dept_param = request.query_params.get("department")
+            if dept_param:
+                try:
+                    department_id = int(dept_param)
+                except ValueError:
+                    return Response({"detail": "department は部署IDで指定してください"}, status=400)
+                roles = roles_for_user(request.user)
+                if not (roles.is_hr or roles.manages_department(department_id)):
+                    return Response({"detail": "この部署の勤怠を見る権限がありません"},
+                                    status=status.HTTP_403_FORBIDDEN)
+            user_id = None if department_id is not None else request.user.id
+
+            cal = work_calendar.get()
+            etag, dirty = summary_etag(request, request.user.id, dfrom, dto, user_id, department_id,
+                                       calendar_version=cal.version)
+            if not dirty and is_not_modified(request, etag):
+                return set_validator(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+            user_ids, values = load_daily_matrix(dfrom, dto, user_id=user_id, department_id=department_id)
+            entries = directory.get_many(user_ids)
+            dates = []
+            is_workday = []
+            for n in range((dto - dfrom).days + 1):
+                d = dfrom + timedelta(days=n)
+                dates.append(d.isoformat())
+                is_workday.append(cal.is_workday(d))
+            body: Dict[str, Any] = {
+                "from": dfrom.isoformat(),
+                "to": dto.isoformat(),
+                "dates": dates,
+                "is_workday": is_workday,
+                "user_ids": user_ids,
+                "employee_codes": [entries[uid].employee_code if uid in entries else "" for uid in user_ids],
+                **values,
+            }
+
+            if dirty:
+                etag, _ = summary_etag(request, request.user.id, dfrom, dto, user_id, department_id,
+                                       calendar_version=cal.version)
+            return set_validator(Response(body), etag)
+        except Exception:
+            print(traceback.format_exc())
+            return Response({"detail": "server_error"}, status=500)
@@ -0,0 +1,111 @@
+# hr_core/views_presence.py
+"""
+在席状況API（async ビュー。ASGI で動かすと1ワーカーで多数の待機接続を持てる）。
+
+    GET /api/attendance/presence[?department=ID]          … 部署の 勤務中／休憩中／勤務外 の一覧
+    GET /api/attendance/presence/stream[?department=ID]   … Server-Sent Events
+        接続直後に event: snapshot（上と同じ内容）、以降は打刻のたびに event: punch
+        （{"user_id", "department_id", "state", "since", "open_work_date"}）を送る。
+        無通信が続くとプロキシに切られるため HR_PRESENCE_HEARTBEAT_SECONDS ごとにコメント行を送る。
+
+閲覧範囲：HR管理者は任意の部署（省略時は全社）、管理職は自分が管理する部署のみ（省略時は自部署）。
+
+SSE は ASGI サーバで動かすこと（例: uvicorn hrm_py.asgi:application）。
+WSGI（runserver 含む）では接続ごとにスレッドを占有する。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import traceback
+from typing import Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from .directory import directory
+from .presence import broker, snapshot
+from .roles import roles_for_user
+from .views_async import authenticate
+
+
+def _resolve_department(request, user) -> Tuple[Optional[int], Optional[HttpResponse]]:
+    """(対象部署ID or None=全社, エラー時の Response)"""
+    roles = roles_for_user(user)
+    param = request.GET.get("department")
+    try:
+        department_id = int(param) if param else None
+    except ValueError:
+        return None, JsonResponse({"detail": "department は部署IDで指定してください"}, status=400)
+    if roles.is_hr:
+        return department_id, None
+    if department_id is None:
+        entry = directory.get(user.pk)
+        department_id = entry.department_id if entry else None
+    if not roles.manages_department(department_id):
+        return None, JsonResponse({"detail": "この部署の在席状況を見る権限がありません"}, status=403)
+    return department_id, None
+
+
+async def _scope(request):
+    user, error = await authenticate(request)
+    if error is not None:
+        return None, None, error
+    # ロール・所属の解決はキャッシュ外れで DB を引くのでスレッドで
+    department_id, error = await sync_to_async(_resolve_department)(request, user)
+    return user, department_id, error
+
+
+async def presence(request):
+    """GET /api/attendance/presence"""
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    try:
+        _, department_id, error = await _scope(request)
+        if error is not None:
+            return error
+        return JsonResponse(await snapshot(department_id), json_dumps_params={"ensure_ascii": False})
+    except Exception:
+        print(traceback.format_exc())
+        return JsonResponse({"detail": "server_error"}, status=500)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def presence_stream(request):
+    """GET /api/attendance/presence/stream"""
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+    try:
+        _, department_id, error = await _scope(request)
+        if error is not None:
+            return error
+    except Exception:
+        print(traceback.format_exc())
+        return JsonResponse({"detail": "server_error"}, status=500)
+
+    heartbeat = getattr(settings, "HR_PRESENCE_HEARTBEAT_SECONDS", 15)
+
+    async def events():
+        # スナップショットより前に購読し、その間の打刻を取りこぼさない
+        sub = broker.subscribe(department_id)
+        try:
+            yield "retry: 3000\n\n"
+            yield _sse("snapshot", await snapshot(department_id))
+            while not sub.overflowed:
+                try:
+                    ev = await asyncio.wait_for(sub.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield _sse("punch", ev)
+        finally:
+            broker.unsubscribe(sub)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream; charset=utf-8")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # nginx のバッファリングを止める
+    return response
@@ -3,6 +3,7 @@
 from rest_framework import viewsets, permissions, decorators, response, status
 from django.utils import timezone
 from .models import OvertimeRequest, LeaveRequest, RequestStatus
+from .pagination import RequestPagination
 from .serializers import OvertimeRequestSerializer, LeaveRequestSerializer
 
 class IsAdminOrOwner(permissions.BasePermission):
@@ -15,6 +16,7 @@ class OvertimeRequestViewSet(viewsets.ModelViewSet):
     queryset = OvertimeRequest.objects.select_related("user", "approver").order_by("-created_at")
     serializer_class = OvertimeRequestSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrOwner]
+    pagination_class = RequestPagination  # 新しい順に (created_at, id) のキーセットで分割
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -62,6 +64,7 @@ class LeaveRequestViewSet(viewsets.ModelViewSet):
     queryset = LeaveRequest.objects.select_related("user", "approver").order_by("-created_at")
     serializer_class = LeaveRequestSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminOrOwner]
+    pagination_class = RequestPagination  # 新しい順に (created_at, id) のキーセットで分割
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
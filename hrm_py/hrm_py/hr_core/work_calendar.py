@@ -0,0 +1,140 @@
+# hr_core/work_calendar.py
+"""
+勤務カレンダー（WorkCalendar）のプロセス内索引。
+
+全行（祝日・会社休日・振替出勤日。年に数十行）を読み込み、
+  - 日付 → (区分, 名称) の dict：1日の判定は O(1)
+  - 日付の昇順リスト：期間内の例外日を bisect で切り出す（所定日数の計算）
+を持つ不変のスナップショットとして返す。WorkCalendar の保存・削除で signals.py から捨てられ、
+他プロセスでの更新は TTL（HR_CALENDAR_TTL 秒）経過で反映される。
+version は内容から作るので、どのプロセスでも同じ内容なら同じ値になる（ETag・集計キャッシュのキーに使う）。
+
+async ビューでは await work_calendar.aget() で取ってから使う（読み込みを async ORM で行う）。
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from .models_attendance import CalendarKind, WorkCalendar
+
+
+@dataclass(frozen=True)
+class DayInfo:
+    is_holiday: bool      # 国民の祝日・会社休日
+    holiday_name: str
+    is_workday: bool      # 所定の出勤日（週休日・休日でない。振替出勤日は出勤日）
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"is_holiday": self.is_holiday, "holiday_name": self.holiday_name, "is_workday": self.is_workday}
+
+
+class CalendarSnapshot:
+    def __init__(self, rows: Iterable[Tuple[date, str, str]], weekly_holidays: Iterable[int]):
+        self.weekly_holidays = frozenset(weekly_holidays)
+        self._days: Dict[date, Tuple[str, str]] = {d: (kind, name) for d, kind, name in rows}
+        self._dates: List[date] = sorted(self._days)
+        h = hashlib.blake2b(digest_size=8)
+        h.update(repr(sorted(self.weekly_holidays)).encode("utf-8"))
+        for d in self._dates:
+            h.update(repr((d.isoformat(), *self._days[d])).encode("utf-8"))
+        self.version = h.hexdigest()
+
+    def day(self, d: date) -> DayInfo:
+        hit = self._days.get(d)
+        if hit is None:
+            return DayInfo(False, "", d.weekday() not in self.weekly_holidays)
+        kind, name = hit
+        if kind == CalendarKind.COMPANY_WORKDAY:
+            return DayInfo(False, "", True)
+        return DayInfo(True, name, False)
+
+    def is_workday(self, d: date) -> bool:
+        return self.day(d).is_workday
+
+    def exceptions(self, dfrom: date, dto: date) -> List[date]:
+        """期間内にカレンダー行がある日（昇順）"""
+        return self._dates[bisect_left(self._dates, dfrom):bisect_right(self._dates, dto)]
+
+    def _weekly_workdays(self, dfrom: date, dto: date) -> int:
+        """週休日だけを除いた日数（週単位は掛け算、端数の7日未満だけ数える）"""
+        total = (dto - dfrom).days + 1
+        if total <= 0:
+            return 0
+        weeks, rest = divmod(total, 7)
+        count = weeks * (7 - len(self.weekly_holidays))
+        for i in range(rest):
+            if (dfrom + timedelta(days=weeks * 7 + i)).weekday() not in self.weekly_holidays:
+                count += 1
+        return count
+
+    def scheduled_days(self, dfrom: date, dto: date) -> int:
+        """期間内の所定出勤日数"""
+        count = self._weekly_workdays(dfrom, dto)
+        for d in self.exceptions(dfrom, dto):
+            weekly_off = d.weekday() in self.weekly_holidays
+            if self._days[d][0] == CalendarKind.COMPANY_WORKDAY:
+                count += 1 if weekly_off else 0
+            elif not weekly_off:
+                count -= 1
+        return count
+
+    def non_workdays(self, dfrom: date, dto: date) -> List[date]:
+        """期間内の出勤日でない日（週休日・休日。振替出勤日は除く）"""
+        result = []
+        d = dfrom
+        while d <= dto:
+            if not self.is_workday(d):
+                result.append(d)
+            d += timedelta(days=1)
+        return result
+
+
+class WorkCalendarIndex:
+    def __init__(self, ttl: float = 300.0, weekly_holidays: Iterable[int] = (5, 6)):
+        self.ttl = ttl
+        self.weekly_holidays = tuple(weekly_holidays)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CalendarSnapshot] = None
+        self._loaded_at = 0.0
+
+    def _fresh(self, now: float) -> Optional[CalendarSnapshot]:
+        with self._lock:
+            if self._snapshot is not None and now - self._loaded_at <= self.ttl:
+                return self._snapshot
+        return None
+
+    def _set(self, rows, now: float) -> CalendarSnapshot:
+        snap = CalendarSnapshot(rows, self.weekly_holidays)
+        with self._lock:
+            self._snapshot, self._loaded_at = snap, now
+        return snap
+
+    @staticmethod
+    def _rows():
+        return WorkCalendar.objects.order_by("date").values_list("date", "kind", "name")
+
+    def get(self) -> CalendarSnapshot:
+        now = time.monotonic()
+        return self._fresh(now) or self._set(list(self._rows()), now)
+
+    async def aget(self) -> CalendarSnapshot:
+        now = time.monotonic()
+        return self._fresh(now) or self._set([row async for row in self._rows()], now)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+
+work_calendar = WorkCalendarIndex(
+    ttl=getattr(settings, "HR_CALENDAR_TTL", 300),
+    weekly_holidays=getattr(settings, "HR_WEEKLY_HOLIDAYS", (5, 6)),
+)
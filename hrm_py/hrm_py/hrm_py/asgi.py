@@ -3,6 +3,9 @@ ASGI config for hrm_py project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+在席状況の SSE（/api/attendance/presence/stream）は async ビューなので ASGI で動かす:
+    uvicorn hrm_py.asgi:application --host 0.0.0.0 --port 8000 --workers 2
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -33,6 +33,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "hr_core.compression.CompressionMiddleware",  # Accept-Encoding で zstd / gzip（本文を書き換える他より外側）
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -101,14 +102,24 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",  # ← ブラウザログイン用
-        "rest_framework_simplejwt.authentication.JWTAuthentication",  # ← API用（併用可）
+        "hr_core.authentication.HrJWTAuthentication",  # ← API用（併用可）。SimpleJWT＋ロールクレーム
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DATETIME_FORMAT": "%Y-%m-%d %H:%M:%S",
+    # Accept で選ぶ：JSON（orjson）/ MessagePack（application/msgpack）。hr_core/renderers.py
+    "DEFAULT_RENDERER_CLASSES": [
+        "hr_core.renderers.ORJSONRenderer",
+        "hr_core.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_CONTENT_NEGOTIATION_CLASS": "hr_core.renderers.HrContentNegotiation",
 }
 
+# 応答圧縮（hr_core/compression.py）：これ未満のバイト数の本文は圧縮しない
+HR_COMPRESS_MIN_BYTES = 1024
+
 # ==============================
 # JWT 設定（必要なら）
 # ==============================
@@ -116,8 +127,68 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_OBTAIN_SERIALIZER": "hr_core.authentication.HrTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "hr_core.authentication.HrTokenRefreshSerializer",
 }
 
+# ロール（HR_ADMIN/管理職/管理部署）を access token に載せ、権限判定でDBを引かない
+# （ロール変更の反映は最長で ACCESS_TOKEN_LIFETIME 遅れる）
+HR_ROLES_IN_TOKEN = False
+# ロール解決のプロセス内キャッシュ：最大件数と有効期限（秒）
+HR_ROLES_CACHE_SIZE = 4096
+HR_ROLES_TTL = 300
+
+# ==============================
+# 勤怠集計
+# ==============================
+# dirty な日次サマリを一括再計算するエンジン（"sql" または "numpy"）
+ATTENDANCE_BULK_ENGINE = "sql"
+
+# 打刻の一括登録（POST /api/attendance/punches/batch）で1回に受け付ける最大件数
+ATTENDANCE_PUNCH_BATCH_MAX = 500
+
+# 社員ディレクトリ（hr_core/directory.py）のプロセス内キャッシュ：最大件数と有効期限（秒）
+HR_DIRECTORY_CACHE_SIZE = 4096
+HR_DIRECTORY_TTL = 300
+
+# /api/attendance/summary の応答本文の共有キャッシュ（hr_core/summary_cache.py）。CACHES の別名、None で無効。
+# 既定は DatabaseCache（全ワーカー・全ホストで共有。テーブルはマイグレーション 0014 で作成）
+HR_SUMMARY_CACHE = "hr_summary"
+HR_SUMMARY_CACHE_TIMEOUT = 7 * 24 * 3600
+
+# 勤務カレンダー（hr_core/work_calendar.py）。索引の保持秒数（他プロセスでの変更はこの秒数で反映）と
+# 週休日（weekday(): 月=0 … 日=6）。祝日は python manage.py load_holidays で登録する
+HR_CALENDAR_TTL = 300
+HR_WEEKLY_HOLIDAYS = (5, 6)
+
+# Parquet / Arrow エクスポート（hr_core/export_arrow.py）の1行グループ（レコードバッチ）あたりの行数
+HR_EXPORT_ROW_GROUP_SIZE = 65536
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "hr_summary": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "hr_summary_cache",
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+}
+
+# 申請一覧・打刻一覧のキーセットページング（hr_core/pagination.py）：既定件数と ?page_size の上限
+HR_PAGE_SIZE = 50
+HR_MAX_PAGE_SIZE = 500
+
+# 在席状況（/api/attendance/presence/stream の SSE）
+# 他ワーカーでの打刻を拾う間隔（秒）・無通信時のハートビート間隔（秒）・接続ごとの未送信イベント上限
+HR_PRESENCE_POLL_SECONDS = 2
+HR_PRESENCE_HEARTBEAT_SECONDS = 15
+HR_PRESENCE_QUEUE_SIZE = 1000
+
+# /api/attendance/my・/api/attendance/summary・/api/hr/me を async ビュー（hr_core/views_async.py）で返す。
+# ASGI（uvicorn hrm_py.asgi:application）で運用するときに True にする。/api/async/... は常に async 版
+HR_ASYNC_READ_VIEWS = False
+
 # ==============================
 # ログイン・リダイレクト設定
 # ==============================
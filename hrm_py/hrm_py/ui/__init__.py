@@ -0,0 +1,2 @@
+# ui/__init__.py
+"""Streamlit フロント（app.py）のページとヘルパー"""
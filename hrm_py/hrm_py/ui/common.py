@@ -0,0 +1,293 @@
+# ui/common.py
+"""
+Streamlit フロントの各ページ（ui/page_*.py）で共有するヘルパー：API 呼び出し・整形・グラフ・ヘッダー描画。
+"""
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple, Dict, Any, List
+from dateutil.relativedelta import relativedelta
+import pandas as pd
+import streamlit as st
+import altair as alt
+
+import api_client as client  # 接続プール・並行取得・GET キャッシュ
+
+# 祝日
+try:
+    import jpholiday  # type: ignore
+except Exception:
+    jpholiday = None
+
+# ========= ログイン状態・メッセージ =========
+def auth() -> Tuple[str, str]:
+    """(APIベースURL, access token)。ページは app.py がログインを確認してから呼ばれる"""
+    return st.session_state["API_BASE"], st.session_state["access"]
+
+def flash(kind: str, message: str) -> None:
+    """st.rerun() のあとに表示するメッセージ（kind は success/error/info など）"""
+    st.session_state["_flash"] = (kind, message)
+
+def show_flash() -> None:
+    item = st.session_state.pop("_flash", None)
+    if item:
+        getattr(st, item[0])(item[1])
+
+# ========= 小ヘルパー =========
+def to_iso(d: date) -> str:
+    return d.isoformat()
+
+def today_local() -> date:
+    return datetime.now().date()
+
+def get_week_range(d: date) -> Tuple[date, date]:
+    start = d - timedelta(days=d.weekday())  # 月曜始まり
+    end = start + timedelta(days=6)
+    return start, end
+
+def get_month_range(d: date) -> Tuple[date, date]:
+    first = d.replace(day=1)
+    last = (first + relativedelta(months=1)) - timedelta(days=1)
+    return first, last
+
+def safe_get(dct: Any, *keys: Any, **kwargs: Any) -> Any:
+    default = kwargs.get("default", None)
+    cur = dct
+    for k in keys:
+        if not isinstance(cur, dict):
+            return default
+        cur = cur.get(k)
+    return cur if cur is not None else default
+
+def is_jp_holiday(d: date) -> Tuple[bool, Optional[str]]:
+    if jpholiday is None:
+        return (False, None)
+    try:
+        name = jpholiday.is_holiday_name(d)  # type: ignore
+        return (name is not None), name  # type: ignore
+    except Exception:
+        return (False, None)
+
+def is_manager_user(me: Dict[str, Any]) -> bool:
+    # /api/hr/me の is_manager を使用（無ければ False）
+    return bool(me.get("is_manager"))
+
+# ========= 接続チェック（🟢/🔴 バッジ用） =========
+def ping_api(base_url: str) -> bool:
+    # /api/health が無い環境でも /api/ でOKとする（結果は10秒キャッシュ）
+    return client.ping(base_url)
+
+# ========= API呼び出し =========
+def api_login(base_url: str, username: str, password: str) -> Dict[str, Any]:
+    """
+    SimpleJWT のトークン取得エンドポイントで access/refresh を取得
+    POST /api/auth/token/  {username, password}
+    """
+    return client.login(base_url, username, password)  # {"access": "...", "refresh": "..."}
+
+def api_get(base_url: str, token: str, path: str, params: Optional[Dict[str, Any]] = None,
+            cache: bool = True) -> Any:
+    # 読み取りは TTL キャッシュ＋ETag 再検証（api_client.py）
+    return client.get(base_url, token, path, params=params, cache=cache)
+
+def api_post(base_url: str, token: str, path: str, payload: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    # 成功すると GET キャッシュが無効化される
+    res = client.post(base_url, token, path, payload)
+    return res if isinstance(res, dict) else {}
+
+def get_me(base_url: str, token: str) -> Dict[str, Any]:
+    res = api_get(base_url, token, "/api/hr/me")
+    return res if isinstance(res, dict) else {}
+
+def punch(base_url: str, token: str, ptype: str, note: str = "") -> Dict[str, Any]:
+    return api_post(base_url, token, "/api/attendance/punch", {"type": ptype, "note": note})
+
+def get_my(base_url: str, token: str, dfrom: date, dto: date) -> Any:
+    params = {"from": to_iso(dfrom), "to": to_iso(dto)}
+    return api_get(base_url, token, "/api/attendance/my", params=params)
+
+def get_summary(base_url: str, token: str, dfrom: date, dto: date, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"from": to_iso(dfrom), "to": to_iso(dto)}
+    if extra:
+        for k, v in extra.items():
+            if v not in (None, "", []):
+                params[k] = v
+    res = api_get(base_url, token, "/api/attendance/summary", params=params)
+    # 必ず dict で返す
+    if isinstance(res, dict):
+        return res
+    if isinstance(res, list):
+        return {"value": res}
+    return {"value": []}
+
+def get_dashboard(base_url: str, token: str, d: date, sections: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    ページの表示に使う値をまとめて取得（GET /api/dashboard）
+    {me, kpi, today: {punches, summary}, week, month, requests, approvals} のうち sections の分
+    """
+    res = api_get(base_url, token, "/api/dashboard", params=_dashboard_params(d, sections))
+    return res if isinstance(res, dict) else {}
+
+def get_dashboard_async(base_url: str, token: str, d: date, sections: Optional[List[str]] = None):
+    """get_dashboard をスレッドプールで先に投げておく（Future）"""
+    return client.get_async(base_url, token, "/api/dashboard", params=_dashboard_params(d, sections))
+
+def _dashboard_params(d: date, sections: Optional[List[str]]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"date": to_iso(d)}
+    if sections:
+        params["sections"] = ",".join(sections)
+    return params
+
+# ========= 整形 =========
+def _day_kind(v: Dict[str, Any], d: date) -> Tuple[bool, str]:
+    """(休日か, 表示名)。サーバーの勤務カレンダー注記（is_workday / holiday_name）を優先し、
+    無い応答（旧サーバー）のときだけ jpholiday と土日で判定する"""
+    if "is_workday" in v:
+        off = not v["is_workday"]
+        return off, (v.get("holiday_name") or ("土日" if off and d.weekday() >= 5 else ""))
+    is_hol, hol_name = is_jp_holiday(d)
+    return bool(is_hol or (d.weekday() >= 5)), (hol_name if is_hol else ("土日" if d.weekday() >= 5 else ""))
+
+def summary_to_df(summary_json: Any, start: date, end: date) -> pd.DataFrame:
+    vals: List[Dict[str, Any]] = []
+    if isinstance(summary_json, dict):
+        vals = summary_json.get("value", []) or []
+    elif isinstance(summary_json, list):
+        vals = summary_json
+    recmap: Dict[date, Dict[str, Any]] = {}
+    for v in vals:
+        dt = v.get("date")
+        try:
+            dt2 = pd.to_datetime(dt).date()  # type: ignore
+            recmap[dt2] = v
+        except Exception:
+            pass
+
+    rows: List[Dict[str, Any]] = []
+    cur = start
+    while cur <= end:
+        v = recmap.get(cur, {})
+        wm = safe_get(v, "work_minutes", default=0)
+        bm = safe_get(v, "break_minutes", default=0)
+        om = safe_get(v, "overtime_minutes", default=0)
+        notes = safe_get(v, "notes", default=[])
+        off, label = _day_kind(v, cur)
+        rows.append({
+            "date": cur,
+            "work_minutes": int(wm or 0),
+            "work_hours": round((wm or 0) / 60.0, 2),
+            "break_minutes": int(bm or 0),
+            "overtime_minutes": int(om or 0),
+            "is_holiday": off,
+            "holiday_name": label,
+            "notes": notes,
+        })
+        cur += timedelta(days=1)
+    return pd.DataFrame(rows)
+
+def punches_to_df(punches: Any) -> pd.DataFrame:
+    if not isinstance(punches, list) or not punches:
+        return pd.DataFrame(columns=["punched_at", "punch_type", "note"])
+    df = pd.DataFrame(punches)
+    if "punched_at" in df.columns:
+        df["punched_at"] = pd.to_datetime(df["punched_at"], errors="coerce")  # type: ignore
+        df = df.sort_values("punched_at")
+    keep = [c for c in ["punched_at", "punch_type", "note"] if c in df.columns]
+    return df[keep] if keep else df
+
+# ========= グラフ =========
+def bar_chart(df: pd.DataFrame, unit: str, overtime_hours: Optional[float]):
+    if df.empty:
+        return alt.Chart(pd.DataFrame({"x": [], "y": []})).mark_bar()
+
+    plot_df = df.copy()
+    if unit == "minutes":
+        plot_df = plot_df.assign(y=plot_df["work_minutes"])
+        y_title = "勤務（分）"
+    else:
+        plot_df = plot_df.assign(y=plot_df["work_hours"])
+        y_title = "勤務（時間）"
+
+    base = alt.Chart(plot_df).encode(
+        x=alt.X("yearmonthdate(date):T", title="日付"),
+        tooltip=[
+            alt.Tooltip("yearmonthdate(date):T", title="日付"),
+            alt.Tooltip("work_hours:Q", title="勤務h"),
+            alt.Tooltip("work_minutes:Q", title="勤務min"),
+            alt.Tooltip("overtime_minutes:Q", title="残業min"),
+            alt.Tooltip("holiday_name:N", title="祝日/備考"),
+        ],
+    )
+
+    bars = base.mark_bar().encode(
+        y=alt.Y("y:Q", title=y_title),
+        color=alt.Color("is_holiday:N", title="休日", scale=alt.Scale(range=["#4C78A8", "#F58518"])),
+    )
+    chart = bars
+
+    if (overtime_hours is not None) and (unit == "hours"):
+        line_df = pd.DataFrame({"y": [overtime_hours]})
+        line = alt.Chart(line_df).mark_rule(strokeDash=[4, 4]).encode(y="y:Q")
+        chart = chart + line
+
+    return chart.properties(height=300).interactive()
+
+# ========= /api/hr/me ヘッダー描画 =========
+EMPLOYMENT_LABELS: Dict[str, str] = {
+    "REGULAR": "正社員",
+    "CONTRACT": "契約社員",
+    "PARTTIME": "パート/アルバイト",
+    "DISPATCH": "派遣",
+    "INTERN": "インターン",
+}
+
+def render_me_header(emp: Dict[str, Any]) -> None:
+    import html
+    user = emp.get("user") or {}
+    first = (user.get("first_name") or "").strip()
+    last = (user.get("last_name") or "").strip()
+    uname = (user.get("username") or "").strip()
+    display_name = (first + " " + last).strip() or uname or "-"
+
+    code = emp.get("employee_code") or "-"
+    dept = safe_get(emp, "department", "name", default="-")
+    pos  = safe_get(emp, "position", "name", default="-")
+    et   = EMPLOYMENT_LABELS.get(emp.get("employment_type", ""), emp.get("employment_type") or "-")
+    base = emp.get("base_hours_per_day", 8.0)
+    status = emp.get("status") or "-"
+    is_mgr = bool(emp.get("is_manager"))
+
+    display_name = html.escape(str(display_name))
+    code = html.escape(str(code))
+    dept = html.escape(str(dept))
+    pos = html.escape(str(pos))
+    et = html.escape(str(et))
+    status = html.escape(str(status))
+
+    c1, c2 = st.columns([1.1, 1.9])
+    with c1:
+        st.markdown(
+            """
+            <div style="border:1px solid #eee;border-radius:10px;padding:12px;">
+              <div style="font-size:1.05rem;">👤 <b>%s</b></div>
+              <div style="color:#666;">社員コード: <b>%s</b></div>
+              <div style="margin-top:6px;">
+                %s
+              </div>
+            </div>
+            """ % (
+                display_name,
+                code,
+                "<span style='background:#ffe8a3;padding:2px 6px;border-radius:8px;'>管理職</span>" if is_mgr else ""
+            ),
+            unsafe_allow_html=True,
+        )
+    with c2:
+        st.markdown(
+            """
+            <div style="border:1px solid #eee;border-radius:10px;padding:12px;">
+              <div>🏢 部署: <b>%s</b>　🎖 役職: <b>%s</b></div>
+              <div style="margin-top:4px;">💼 雇用区分: <b>%s</b>　🕘 所定: <b>%s h/日</b></div>
+              <div style="margin-top:4px;">📌 ステータス: <b>%s</b></div>
+            </div>
+            """ % (dept, pos, et, base, status),
+            unsafe_allow_html=True,
+        )
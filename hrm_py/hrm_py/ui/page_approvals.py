@@ -0,0 +1,59 @@
+# ui/page_approvals.py
+"""
+承認：申請中の残業/休暇の承認・却下（is_staff のみ。/api/dashboard?sections=approvals）。
+操作後は一覧のフラグメントだけを再実行する。
+"""
+import streamlit as st
+
+from ui.common import api_post, auth, flash, get_dashboard, show_flash, today_local
+
+ACTIONS = [
+    ("残業を承認", "overtime", "approve", "承認しました"),
+    ("残業を却下", "overtime", "reject", "却下しました"),
+    ("休暇を承認", "leave", "approve", "承認しました"),
+    ("休暇を却下", "leave", "reject", "却下しました"),
+]
+
+
+@st.fragment
+def pending_requests() -> None:
+    base_url, access = auth()
+    show_flash()
+    try:
+        pending = get_dashboard(base_url, access, today_local(), sections=["approvals"]).get("approvals")
+    except Exception as e:
+        st.error(f"承認一覧の取得に失敗：{e}")
+        return
+    if pending is None:
+        st.info("承認は管理者（is_staff）のみ利用できます。")
+        return
+
+    st.write("**残業（申請中）**")
+    st.dataframe([{
+        "ID": x.get("id"), "社員": x.get("user"), "日付": x.get("date"), "開始": x.get("start_time"),
+        "終了": x.get("end_time"), "分": x.get("minutes"), "理由": x.get("reason","")
+    } for x in (pending.get("overtime") or [])], use_container_width=True)
+
+    st.write("**休暇（申請中）**")
+    st.dataframe([{
+        "ID": x.get("id"), "社員": x.get("user"), "区分": x.get("leave_type"),
+        "開始": x.get("start_date"), "終了": x.get("end_date"), "日数": x.get("days"), "理由": x.get("reason","")
+    } for x in (pending.get("leave") or [])], use_container_width=True)
+
+    act_id = st.text_input("承認／却下するIDを入力", "", key="approve_id_input")
+    for col, (label, kind, action, done) in zip(st.columns(4), ACTIONS):
+        with col:
+            if st.button(label):
+                try:
+                    api_post(base_url, access, f"/api/requests/{kind}/{act_id}/{action}/", {})
+                except Exception as e:
+                    st.error(f"失敗：{e}")
+                else:
+                    flash("success", done)
+                    st.rerun(scope="fragment")  # 一覧だけ取り直す
+
+
+def render() -> None:
+    st.subheader("🛠 承認・却下（管理者用）")
+    st.caption("※ `is_staff=True` のユーザーでアクセスすると承認APIが使えます。")
+    pending_requests()
@@ -0,0 +1,202 @@
+# ui/page_home.py
+"""
+ホーム：プロフィール・当月KPI・本日の打刻と集計・週/月グラフ。
+
+表示に使う値は /api/dashboard を1回（sections=kpi,today,week,month）。
+  - 本日の打刻はフラグメント：打刻ボタンはこの部分だけを再実行し、当日分（/my・/summary）だけ取り直す
+  - 週/月グラフもフラグメント：表示単位・残業ラインの変更では API を呼ばない
+KPI・週/月は次にページ全体が再実行されたとき（別ページからの移動など）に最新になる。
+"""
+import io
+from typing import Any, Dict
+
+import pandas as pd
+import streamlit as st
+
+import api_client as client
+from ui.common import (
+    auth,
+    bar_chart,
+    get_dashboard,
+    get_me,
+    punch,
+    punches_to_df,
+    render_me_header,
+    summary_to_df,
+    to_iso,
+    today_local,
+)
+
+SECTIONS = ["kpi", "today", "week", "month"]
+
+
+def render_kpi(kpi: Dict[str, Any]) -> None:
+    work_min_total = int(kpi.get("work_minutes") or 0)
+    overtime_min_total = int(kpi.get("overtime_minutes") or 0)
+    working_days = int(kpi.get("working_days") or 0)
+
+    work_hours_total = round(work_min_total / 60.0, 2)
+    overtime_hours_total = round(overtime_min_total / 60.0, 2)
+
+    st.markdown(
+        f"""
+        <style>
+          .kpi-header {{
+            position: sticky; top: 0; z-index: 999;
+            background: rgba(255,255,255,0.85); backdrop-filter: blur(6px);
+            padding: 0.5rem 0.75rem 0.35rem; border-bottom: 1px solid #eee;
+            margin-top: -0.5rem;
+          }}
+          .kpi-pill {{
+            border: 1px solid #e5e7eb; border-radius: 9999px;
+            padding: 0.45rem 0.9rem; display: inline-block;
+            margin-right: 0.5rem; margin-bottom: 0.25rem;
+            font-weight: 600; font-size: 0.95rem;
+          }}
+          .kpi-label {{ color: #6b7280; margin-right: 0.35rem; }}
+          .kpi-value {{ color: #111827; }}
+        </style>
+        <div class="kpi-header">
+          <span class="kpi-pill"><span class="kpi-label">今月の勤務時間</span><span class="kpi-value">{work_hours_total} h</span></span>
+          <span class="kpi-pill"><span class="kpi-label">残業時間</span><span class="kpi-value">{overtime_hours_total} h</span></span>
+          <span class="kpi-pill"><span class="kpi-label">出勤日数</span><span class="kpi-value">{working_days} 日</span></span>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+
+PUNCH_BUTTONS = [
+    ("🟢 出勤", "IN", "出勤"),
+    ("🔴 退勤", "OUT", "退勤"),
+    ("☕ 休憩開始", "BREAK_START", "休憩開始"),
+    ("🍱 休憩終了", "BREAK_END", "休憩終了"),
+]
+
+
+@st.fragment
+def today_section(initial: Dict[str, Any]) -> None:
+    """initial はページ全体の実行時に取った /api/dashboard の today"""
+    base_url, access = auth()
+    today = today_local()
+
+    st.markdown("### 本日の打刻")
+    cols = st.columns(2) + st.columns(2)
+    for col, (label, ptype, name) in zip(cols, PUNCH_BUTTONS):
+        with col:
+            if st.button(label, use_container_width=True):
+                try:
+                    punch(base_url, access, ptype, name)
+                    st.session_state["_today_live"] = True
+                    st.toast(f"{name}完了", icon="✅")
+                except Exception as e:
+                    st.error(f"{name}失敗: {e}")
+
+    try:
+        if st.session_state.get("_today_live"):
+            # 打刻後のフラグメント再実行：当日分だけ同時に取り直す
+            params = {"from": to_iso(today), "to": to_iso(today)}
+            my_future = client.get_async(base_url, access, "/api/attendance/my", params=params)
+            summ_future = client.get_async(base_url, access, "/api/attendance/summary", params=params)
+            punches, summ = my_future.result(), summ_future.result()
+        else:
+            punches = initial.get("punches")
+            summ = [initial["summary"]] if initial.get("summary") else []
+
+        dfp = punches_to_df(punches)
+        st.subheader("当日の打刻一覧")
+        if dfp.empty:
+            st.write("打刻なし")
+        else:
+            st.dataframe(dfp, use_container_width=True)
+
+        dfd = summary_to_df(summ, today, today)
+        st.subheader("当日集計")
+        if not dfd.empty:
+            wm = int(dfd.loc[0, "work_minutes"])
+            bm = int(dfd.loc[0, "break_minutes"])
+            om = int(dfd.loc[0, "overtime_minutes"])
+            m1, m2, m3 = st.columns(3)
+            m1.metric("勤務", f"{wm} 分（{wm/60.0:.2f} h）")
+            m2.metric("休憩", f"{bm} 分")
+            m3.metric("残業", f"{om} 分")
+        else:
+            st.write("集計なし")
+    except Exception as e:
+        st.error(f"当日データ取得エラー: {e}")
+
+
+@st.fragment
+def week_section(week: Dict[str, Any]) -> None:
+    wk_start, wk_end = pd.to_datetime(week["from"]).date(), pd.to_datetime(week["to"]).date()
+    st.write(f"対象週: **{wk_start} ~ {wk_end}**")
+
+    unit = st.radio("表示単位", ["hours", "minutes"], index=0, horizontal=True)
+    ov = st.number_input("残業ライン(時間)", min_value=0.0, max_value=24.0, value=8.0, step=0.5)
+
+    dfw = summary_to_df(week, wk_start, wk_end)
+    st.altair_chart(bar_chart(dfw, unit, ov), use_container_width=True)
+    st.caption("※ オレンジは休日/祝日。点線は残業ライン（時間表示時のみ）。")
+    st.dataframe(dfw, use_container_width=True)
+
+
+@st.fragment
+def month_section(month: Dict[str, Any]) -> None:
+    first, last = pd.to_datetime(month["from"]).date(), pd.to_datetime(month["to"]).date()
+    st.write(f"対象月: **{first} ~ {last}**")
+
+    unit_m = st.radio("表示単位（⽉）", ["hours", "minutes"], index=0, horizontal=True, key="unit_m")
+    ov_m = st.number_input("残業ライン(時間: ⽉)", min_value=0.0, max_value=24.0, value=8.0, step=0.5, key="ov_m")
+
+    dfm = summary_to_df(month, first, last)
+    st.altair_chart(bar_chart(dfm, unit_m, ov_m), use_container_width=True)
+    st.caption("※ オレンジは休日/祝日。点線は残業ライン（時間表示時のみ）。")
+    st.dataframe(dfm, use_container_width=True)
+
+    buf = io.StringIO()
+    dfm.to_csv(buf, index=False, encoding="utf-8")
+    st.download_button(
+        "⬇ 月次CSVをダウンロード",
+        data=buf.getvalue(),
+        file_name=f"attendance_summary_{first.strftime('%Y%m')}.csv",
+        mime="text/csv",
+        use_container_width=True,
+    )
+
+
+def render() -> None:
+    base_url, access = auth()
+    # ページ全体の実行：打刻後でもここで取り直した dashboard が最新なので当日分はそれを使う
+    st.session_state["_today_live"] = False
+
+    # ========= /api/hr/me（プロフィール表示） =========
+    try:
+        me = get_me(base_url, access)
+        if me:
+            render_me_header(me)
+        else:
+            st.warning("社員情報（/api/hr/me）が空でした。HR登録未作成の可能性があります。")
+    except Exception:
+        st.warning("社員情報（/api/hr/me）を取得できませんでした。HR登録未作成の可能性があります。")
+
+    try:
+        dash = get_dashboard(base_url, access, today_local(), sections=SECTIONS)
+    except Exception as e:
+        st.error(f"データ取得エラー: {e}")
+        return
+
+    # ========= KPIピル（当月サマリ） =========
+    # 当月の合計（/summary?granularity=month の1行と同じ形）
+    render_kpi(dash.get("kpi") or {})
+    st.markdown("---")
+
+    # ========= 当日の打刻 & 集計 =========
+    today_section(dash.get("today") or {})
+    st.markdown("---")
+
+    # ========= 週/月タブ =========
+    tab_week, tab_month = st.tabs(["📅 週", "🗓️ 月"])
+    with tab_week:
+        week_section(dash["week"])
+    with tab_month:
+        month_section(dash["month"])
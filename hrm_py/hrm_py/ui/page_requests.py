@@ -0,0 +1,124 @@
+# ui/page_requests.py
+"""
+申請：残業/休暇の作成と自分の申請一覧（取消）。
+
+作成フォームはフラグメント（入力の変更では API を呼ばない）。送信に成功したらページを再実行して
+一覧（/api/dashboard?sections=requests）を取り直す。取消は一覧のフラグメントだけを再実行する。
+"""
+from datetime import date, datetime
+
+import streamlit as st
+
+from ui.common import api_post, auth, flash, get_dashboard, show_flash, today_local
+
+
+@st.fragment
+def overtime_form() -> None:
+    base_url, access = auth()
+    st.subheader("残業申請を作成")
+    col1, col2 = st.columns(2)
+    with col1:
+        ov_date = st.date_input("対象日", value=date.today())
+        start_t = st.time_input("開始", value=datetime.now().replace(hour=18, minute=0, second=0, microsecond=0).time())
+    with col2:
+        end_t = st.time_input("終了", value=datetime.now().replace(hour=19, minute=0, second=0, microsecond=0).time())
+        reason = st.text_input("理由（任意）", value="", key="overtime_reason")
+
+    if st.button("残業を申請する", type="primary"):
+        try:
+            payload = {
+                "date": ov_date.isoformat(),
+                "start_time": start_t.strftime("%H:%M"),
+                "end_time": end_t.strftime("%H:%M"),
+                "reason": reason
+            }
+            data = api_post(base_url, access, "/api/requests/overtime/", payload)
+        except Exception as e:
+            st.error(f"申請に失敗しました：{e}")
+        else:
+            flash("success", f"送信しました（{data.get('minutes',0)}分）")
+            st.rerun()
+
+
+@st.fragment
+def leave_form() -> None:
+    base_url, access = auth()
+    st.subheader("休暇申請を作成")
+    leave_type = st.selectbox(
+        "休暇区分",
+        ["PAID", "SICK", "ABSENCE", "SPECIAL"],
+        index=0,
+        format_func=lambda x: {"PAID":"有給","SICK":"病休","ABSENCE":"欠勤","SPECIAL":"特別休暇"}[x],
+    )
+    c1, c2 = st.columns(2)
+    with c1:
+        lv_start = st.date_input("開始日", value=date.today())
+    with c2:
+        lv_end = st.date_input("終了日", value=date.today())
+        lv_reason = st.text_input("理由（任意）", value="", key="leave_reason")
+
+    if st.button("休暇を申請する", type="primary"):
+        try:
+            payload = {
+                "leave_type": leave_type,
+                "start_date": lv_start.isoformat(),
+                "end_date": lv_end.isoformat(),
+                "reason": lv_reason
+            }
+            data = api_post(base_url, access, "/api/requests/leave/", payload)
+        except Exception as e:
+            st.error(f"申請に失敗しました：{e}")
+        else:
+            flash("success", f"送信しました（{data.get('days','?')}日）")
+            st.rerun()
+
+
+@st.fragment
+def my_requests() -> None:
+    base_url, access = auth()
+    st.subheader("自分の申請一覧")
+    show_flash()
+    try:
+        mine = get_dashboard(base_url, access, today_local(), sections=["requests"]).get("requests") or {}
+
+        st.write("**残業申請**")
+        ov_list = mine.get("overtime")
+        st.dataframe([{
+            "ID": x.get("id"), "日付": x.get("date"), "開始": x.get("start_time"), "終了": x.get("end_time"),
+            "分": x.get("minutes"), "理由": x.get("reason",""), "状態": x.get("status")
+        } for x in (ov_list or [])], use_container_width=True)
+
+        st.write("**休暇申請**")
+        lv_list = mine.get("leave")
+        st.dataframe([{
+            "ID": x.get("id"), "区分": x.get("leave_type"), "開始": x.get("start_date"), "終了": x.get("end_date"),
+            "日数": x.get("days"), "理由": x.get("reason",""), "状態": x.get("status")
+        } for x in (lv_list or [])], use_container_width=True)
+    except Exception as e:
+        st.error(f"一覧取得に失敗：{e}")
+        return
+
+    st.caption("行を選んで取消したいIDを下に入力してください。")
+    cancel_id = st.text_input("取消ID", "", key="cancel_id_input")
+    colc1, colc2 = st.columns(2)
+    for col, kind, label in ((colc1, "overtime", "残業申請を取消"), (colc2, "leave", "休暇申請を取消")):
+        with col:
+            if st.button(label):
+                try:
+                    api_post(base_url, access, f"/api/requests/{kind}/{cancel_id}/cancel/", {})
+                except Exception as e:
+                    st.error(f"取消に失敗：{e}")
+                else:
+                    flash("success", "取消しました")
+                    st.rerun(scope="fragment")  # 一覧だけ取り直す
+
+
+def render() -> None:
+    st.subheader("📝 申請（残業・休暇）")
+    sub = st.tabs(["⏱ 残業申請", "🏖 休暇申請", "📋 申請一覧"])
+    with sub[0]:
+        overtime_form()
+    with sub[1]:
+        leave_form()
+    with sub[2]:
+        my_requests()
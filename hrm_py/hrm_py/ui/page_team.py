@@ -0,0 +1,113 @@
+# ui/page_team.py
+"""
+チーム集計（管理職のみナビゲーションに出る）。
+
+  - 絞り込み条件はフォーム：「表示」を押すまで API を呼ばない
+  - 在席状況はフラグメント（毎回最新を取る。「更新」でこの部分だけ取り直す）
+  - 表示単位・残業ラインの変更はグラフのフラグメントだけを再実行する（API は呼ばない）
+チーム集計と在席状況は同時に投げる。
+"""
+import io
+from datetime import date
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import streamlit as st
+
+import api_client as client
+from ui.common import api_get, auth, bar_chart, get_month_range, summary_to_df, to_iso, today_local
+
+STATE_LABELS = {"WORKING": "勤務中", "ON_BREAK": "休憩中", "OFF": "勤務外"}
+
+
+@st.fragment
+def presence_section(department: Optional[str]) -> None:
+    base_url, access = auth()
+    head, btn = st.columns([4, 1])
+    head.markdown("**在席状況**")
+    btn.button("🔄 更新", key="presence_refresh")  # 押すとこのフラグメントだけ再実行
+    # 在席状況（状態テーブルを引くだけなので集計より軽い）
+    try:
+        pres = api_get(base_url, access, "/api/attendance/presence",
+                       params={"department": department} if department else None, cache=False)
+        counts = pres.get("counts") or {}
+        p1, p2, p3 = st.columns(3)
+        p1.metric("勤務中", f"{counts.get('WORKING', 0)} 人")
+        p2.metric("休憩中", f"{counts.get('ON_BREAK', 0)} 人")
+        p3.metric("勤務外", f"{counts.get('OFF', 0)} 人")
+        with st.expander("在席一覧", expanded=False):
+            st.dataframe([{
+                "社員コード": m.get("employee_code"), "氏名": m.get("name"),
+                "状態": STATE_LABELS[state], "打刻": m.get("since") or "",
+            } for state in ("WORKING", "ON_BREAK", "OFF") for m in (pres.get("members") or {}).get(state, [])],
+                use_container_width=True)
+    except Exception as e:
+        st.caption(f"在席状況を取得できませんでした: {e}")
+
+
+@st.fragment
+def team_chart(dft: pd.DataFrame, team_from: date, team_to: date) -> None:
+    unit_t = st.radio("表示単位（チーム）", ["hours", "minutes"], index=0, horizontal=True, key="unit_team")
+    ov_t = st.number_input("残業ライン(時間: チーム)", min_value=0.0, max_value=24.0, value=8.0, step=0.5, key="ov_team")
+    st.altair_chart(bar_chart(dft, unit_t, ov_t), use_container_width=True)
+
+    agg = dft.agg({"work_minutes":"sum","break_minutes":"sum","overtime_minutes":"sum"})
+    c1, c2, c3 = st.columns(3)
+    c1.metric("合計勤務", f"{int(agg.work_minutes)} 分（{agg.work_minutes/60.0:.2f} h）")
+    c2.metric("合計休憩", f"{int(agg.break_minutes)} 分")
+    c3.metric("合計残業", f"{int(agg.overtime_minutes)} 分")
+
+    st.dataframe(dft, use_container_width=True)
+
+    buf_team = io.StringIO()
+    dft.to_csv(buf_team, index=False, encoding="utf-8")
+    st.download_button(
+        "⬇ チームCSVをダウンロード",
+        data=buf_team.getvalue(),
+        file_name=f"team_summary_{team_from.strftime('%Y%m%d')}_{team_to.strftime('%Y%m%d')}.csv",
+        mime="text/csv",
+        use_container_width=True,
+    )
+
+
+def render() -> None:
+    base_url, access = auth()
+    today = today_local()
+    st.subheader("👥 チーム集計（管理者向け）")
+
+    with st.form("team_filter"):
+        colf1, colf2, colf3, colf4 = st.columns([1.2, 1.2, 1.2, 1])
+        with colf1:
+            team_from = st.date_input("From", value=get_month_range(today)[0], format="YYYY-MM-DD")
+        with colf2:
+            team_to = st.date_input("To", value=get_month_range(today)[1], format="YYYY-MM-DD")
+        with colf3:
+            dept_id = st.text_input("部署ID（任意）", value="")
+        with colf4:
+            pos_id = st.text_input("役職ID（任意）", value="")
+
+        colf5, colf6 = st.columns([1.2, 1.2])
+        with colf5:
+            ecode = st.text_input("社員コード（任意）", value="")
+        with colf6:
+            uid = st.text_input("ユーザーID（任意）", value="")
+        st.form_submit_button("表示", use_container_width=True)
+
+    params: Dict[str, Any] = {"from": to_iso(team_from), "to": to_iso(team_to)}
+    if dept_id.strip(): params["department"] = dept_id.strip()
+    if pos_id.strip():  params["position"] = pos_id.strip()
+    if ecode.strip():   params["employee_code"] = ecode.strip()
+    if uid.strip():     params["user_id"] = uid.strip()
+
+    # 集計を先に投げ、在席状況の取得と重ねる
+    team_future = client.get_async(base_url, access, "/api/attendance/summary", params=params)
+
+    presence_section(dept_id.strip() or None)
+
+    try:
+        team_summ = team_future.result()
+        if isinstance(team_summ, list):
+            team_summ = {"value": team_summ}
+        team_chart(summary_to_df(team_summ, team_from, team_to), team_from, team_to)
+    except Exception as e:
+        st.error(f"チーム集計エラー: {e}")